@@ -0,0 +1,482 @@
+import argparse
+import contextlib
+import gc
+import json
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import date, timedelta
+import controller as ctrl
+import model as mdl
+import view as v
+
+# ============================ СИНТЕТИЧНІ ДАНІ ============================
+
+def make_record(i: int) -> mdl.Record:
+    """Створює типовий контакт: ім'я, телефон, email, дата народження."""
+    name = "Контакт " + "".join(chr(ord('a') + int(d)) for d in str(i))
+    record = mdl.Record(name)
+    record.add_phone(f"{i:010d}")
+    record.add_email(f"user{i}@example.com")
+    record.add_birthday(date.fromordinal(date(1950, 1, 1).toordinal() + i % 20000))
+    return record
+
+
+# Реалістичніший розподіл для набору сценаріїв: (кирилиця, латиниця для email)
+FIRST_NAMES = [("Олена", "olena"), ("Іван", "ivan"), ("Марія", "mariia"), ("Андрій", "andrii"), ("Ольга", "olha"),
+               ("Петро", "petro"), ("Наталія", "nataliia"), ("Юрій", "yurii"), ("Ірина", "iryna"), ("Тарас", "taras"),
+               ("Світлана", "svitlana"), ("Богдан", "bohdan"), ("Катерина", "kateryna"), ("Дмитро", "dmytro"),
+               ("Оксана", "oksana"), ("Василь", "vasyl"), ("Софія", "sofiia"), ("Максим", "maksym")]
+LAST_NAMES = [("Коваль", "koval"), ("Шевченко", "shevchenko"), ("Бондаренко", "bondarenko"), ("Ткаченко", "tkachenko"),
+              ("Кравченко", "kravchenko"), ("Мельник", "melnyk"), ("Олійник", "oliinyk"), ("Лисенко", "lysenko"),
+              ("Руденко", "rudenko"), ("Савченко", "savchenko"), ("Петренко", "petrenko"), ("Мороз", "moroz"),
+              ("Павленко", "pavlenko"), ("Гончар", "honchar"), ("Поліщук", "polishchuk"), ("Марченко", "marchenko")]
+OPERATOR_CODES = ("050", "063", "066", "067", "068", "073", "093", "095", "096", "097", "098", "099")
+EMAIL_DOMAINS = ("gmail.com", "ukr.net", "i.ua", "meta.ua", "outlook.com")
+PHONES_PER_CONTACT = ((1, 2, 3), (70, 22, 8))   # Кількість телефонів та її частота, %
+EMAILS_PER_CONTACT = ((0, 1, 2), (35, 55, 10))
+BIRTHDAY_SHARE = 0.8                            # Частка контактів з датою народження
+
+Row = tuple[str, list[str], list[str], date | None]
+
+
+def _suffix(number: int) -> str:
+    """Число -> літери (імена можуть містити лише літери, пробіл, дефіс та апостроф)."""
+    letters = ""
+    while True:
+        number, digit = divmod(number, 26)
+        letters += chr(ord('a') + digit)
+        if not number:
+            return letters
+
+
+def make_rows(count: int, seed: int = 42) -> list[Row]:
+    """Відтворювані синтетичні контакти: ім'я, телефони, emails, дата народження (або None)."""
+    rng = random.Random(seed)
+    today = date.today()
+    rows = []
+    for i in range(count):
+        (first, first_latin), (last, last_latin) = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        name = f"{first}-{last}-{_suffix(i)}" # Без пробілів - щоб до контакту можна було звернутись командою
+        phones = [rng.choice(OPERATOR_CODES) + f"{rng.randrange(10 ** 7):07d}"
+                  for _ in range(rng.choices(*PHONES_PER_CONTACT)[0])]
+        emails = [f"{first_latin}.{last_latin}{i}{'' if k == 0 else k}@{rng.choice(EMAIL_DOMAINS)}"
+                  for k in range(rng.choices(*EMAILS_PER_CONTACT)[0])]
+        birthday = today - timedelta(days=rng.randrange(18 * 365, 80 * 365)) if rng.random() < BIRTHDAY_SHARE else None
+        rows.append((name, list(dict.fromkeys(phones)), emails, birthday))
+    return rows
+
+
+def make_contact(row: Row) -> mdl.Record:
+    name, phones, emails, birthday = row
+    record = mdl.Record(name)
+    for phone in phones:
+        record.add_phone(phone)
+    for email in emails:
+        record.add_email(email)
+    if birthday:
+        record.add_birthday(birthday)
+    return record
+
+
+def make_book(rows: list[Row]) -> mdl.AddressBook:
+    book = mdl.AddressBook()
+    for row in rows:
+        book.add_record(make_contact(row))
+    return book
+
+
+# ============================ БЕНЧМАРКИ ============================
+
+class _DictField:
+    """Попередня модель поля (атрибути у __dict__) - еталон для bench_memory."""
+    def __init__(self, value) -> None:
+        self._value = value
+
+    @property
+    def value(self):
+        return self._value
+
+
+class _DictRecord:
+    """Попередня модель запису: поля з __dict__, телефони та email у списках."""
+    def __init__(self, name: str) -> None:
+        self.name = _DictField(name)
+        self.phones: list[_DictField] = []
+        self.emails: list[_DictField] = []
+        self.birthday: _DictField | None = None
+
+
+def _make_dict_record(i: int) -> _DictRecord:
+    """Той самий контакт, що й make_record, у попередній моделі (без валідації - вона не займає пам'яті)."""
+    record = _DictRecord("Контакт " + "".join(chr(ord('a') + int(d)) for d in str(i)))
+    record.phones.append(_DictField(f"{i:010d}"))
+    record.emails.append(_DictField(f"user{i}@example.com"))
+    record.birthday = _DictField(date.fromordinal(date(1950, 1, 1).toordinal() + i % 20000))
+    return record
+
+
+def _traced_bytes(build: Callable[[], object]) -> int:
+    """Скільки пам'яті займає результат build() (поки він живий)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return used
+
+
+def bench_memory(count: int) -> dict[str, float]:
+    """
+    Середня кількість байтів пам'яті на контакт: записи поточної моделі (__slots__) проти
+    попередньої (__dict__, списки) - обидва набори в простому словнику, - та вся книга з індексами.
+    """
+    def book() -> mdl.AddressBook:
+        book = mdl.AddressBook()
+        for i in range(count):
+            book.add_record(make_record(i))
+        return book
+
+    def records(make: Callable[[int], object]) -> Callable[[], dict]:
+        return lambda: {record.name.value: record for record in map(make, range(count))}
+
+    return {
+        "__slots__" : _traced_bytes(records(make_record)) / count,
+        "__dict__"  : _traced_bytes(records(_make_dict_record)) / count,
+        "книга"     : _traced_bytes(book) / count,
+    }
+
+
+def _scan_upcoming(birthdays: list[tuple[str, date]], today: date, days: int) -> int:
+    """Попередній підхід: перебір усіх записів з побудовою дати на кожен (29.02 - на 28.02)."""
+    found = 0
+    for _, bday in birthdays:
+        month, day = (2, 28) if (bday.month, bday.day) == (2, 29) else (bday.month, bday.day)
+        birthday_this_year = date(today.year, month, day)
+        if birthday_this_year < today:
+            birthday_this_year = date(today.year + 1, month, day)
+        if 0 <= (birthday_this_year - today).days < days:
+            found += 1
+    return found
+
+
+def bench_birthdays(count: int, days: int = 7) -> dict[str, float]:
+    """Час вибірки вікна днів народження (мс): календарний індекс проти повного перебору."""
+    rng = random.Random(42)
+    first = date(1950, 1, 1).toordinal()
+    birthdays = [(f"n{i}", date.fromordinal(first + rng.randrange(365 * 50))) for i in range(count)]
+    index = mdl.BirthdayIndex()
+    for name, bday in birthdays:
+        index.add(name, bday)
+    today = date.today()
+    results = {}
+    for policy in mdl.LeapDayPolicy:
+        start = time.perf_counter()
+        found = sum(1 for _ in index.upcoming(today, days, policy))
+        results[f"index/{policy.value}"] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    _scan_upcoming(birthdays, today, days)
+    results["scan"] = (time.perf_counter() - start) * 1000
+    results["found"] = found
+    return results
+
+
+def bench_search(count: int, queries: tuple[str, ...] = ("Контакт bcd", "кнтакт bcdef", "bcdfe")) -> dict[str, float]:
+    """Час побудови пошукового індексу імен і окремих запитів (мс)."""
+    names = [make_record(i).name.value for i in range(count)]
+    index = mdl.NameIndex()
+    start = time.perf_counter()
+    index.build(names)
+    results = {"build": (time.perf_counter() - start) * 1000}
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query)
+        results[query] = (time.perf_counter() - start) * 1000
+    return results
+
+
+def bench_phone_search(count: int, queries: tuple[str, ...] = ("4567", "123456")) -> dict[str, float]:
+    """Час пошуку телефонів за частиною цифр (мс): n-грамний індекс проти перебору."""
+    rng = random.Random(42)
+    phones = {f"{rng.randrange(10 ** 10):010d}" for _ in range(count)}
+    index = mdl.SubstringIndex(mdl.PHONE_GRAM_SIZE)
+    start = time.perf_counter()
+    index.build(phones)
+    results = {"build": (time.perf_counter() - start) * 1000}
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query)
+        results[query] = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        sorted(phone for phone in phones if query in phone)
+        results[f"{query}/scan"] = (time.perf_counter() - start) * 1000
+    return results
+
+
+def bench_render(count: int) -> float:
+    """Час виводу сторінки з count контактів (мс) у /dev/null з порядковою буферизацією, як у терміналі."""
+    book = mdl.AddressBook()
+    for i in range(count):
+        book.add_record(make_record(i))
+    records = book.page(1, count)
+    with open(os.devnull, "w", encoding="utf-8", buffering=1) as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        v.show_contacts_page(records, page=1, pages=1, total=count)
+        v.flush()
+        return (time.perf_counter() - start) * 1000
+
+
+def bench_snapshot(count: int) -> dict[str, dict[str, float]]:
+    """Розмір (МБ) і час збереження/завантаження знімка (мс): двійковий формат проти pickle."""
+    book = make_book(make_rows(count))
+    formats = {
+        "двійковий" : (mdl.encode_book, mdl.decode_book),
+        "pickle"    : (lambda book: pickle.dumps(book, protocol=pickle.HIGHEST_PROTOCOL), pickle.loads),
+    }
+    results = {}
+    for name, (dumps, loads) in formats.items():
+        gc.collect()
+        start = time.perf_counter()
+        payload = dumps(book)
+        saved = time.perf_counter()
+        loads(payload) # Разом з відновленням індексів
+        loaded = time.perf_counter()
+        results[name] = {"size": len(payload) / 2**20, "save": (saved - start) * 1000, "load": (loaded - saved) * 1000}
+    return results
+
+
+# ============================ НАБІР СЦЕНАРІЇВ ============================
+# Кожен сценарій готує дані (поза виміром) і повертає (кількість операцій, функція для виміру).
+# Підготовка повторюється для окремого проходу з tracemalloc, бо виміряна функція змінює дані.
+
+MAX_OPS = 100_000     # Скільки окремих операцій (пошуків, змін) виконувати в одному сценарії
+EXECUTE_OPS = 20_000  # Команд у сценарії execute (кожна проходить увесь шлях контролера)
+
+Case = Callable[[list[Row]], tuple[int, Callable[[], object]]]
+
+
+def _sample(rows: list[Row], count: int) -> list[Row]:
+    """Різні контакти (не більше, ніж є у книзі)."""
+    return random.Random(7).sample(rows, min(count, len(rows)))
+
+
+def _choices(rows: list[Row], count: int) -> list[Row]:
+    """Рівно count контактів з повтореннями - час сценарію не залежить від розміру книги."""
+    return random.Random(7).choices(rows, k=count)
+
+
+def case_add_record(rows: list[Row]):
+    records = [make_contact(row) for row in rows]
+    book = mdl.AddressBook()
+    def run():
+        for record in records:
+            book.add_record(record)
+    return len(records), run
+
+
+def case_find(rows: list[Row]):
+    book = make_book(rows)
+    names = [row[0] for row in _choices(rows, MAX_OPS)]
+    def run():
+        for name in names:
+            book.find(name)
+    return len(names), run
+
+
+def case_upcoming_birthdays(rows: list[Row]):
+    book = make_book(rows)
+    repeats = 20
+    def run():
+        for _ in range(repeats):
+            book.get_upcoming_birthdays(7)
+    return repeats, run
+
+
+def case_add_phone(rows: list[Row]):
+    book = make_book(rows)
+    records = [book.data[row[0]] for row in _sample(rows, MAX_OPS)]
+    phones = [f"09{i:08d}" for i in range(len(records))] # Префікс 09 не перетинається з OPERATOR_CODES
+    def run():
+        for record, phone in zip(records, phones):
+            record.add_phone(phone)
+    return len(records), run
+
+
+def case_save(rows: list[Row]):
+    book = make_book(rows)
+    filename = os.path.join(tempfile.mkdtemp(), "contacts.pkl")
+    return len(rows), lambda: mdl.save_contacts(book, filename)
+
+
+def case_load(rows: list[Row]):
+    filename = os.path.join(tempfile.mkdtemp(), "contacts.pkl")
+    mdl.save_contacts(make_book(rows), filename)
+    return len(rows), lambda: mdl.load_contacts(filename)
+
+
+def case_save_pickle(rows: list[Row]):
+    """Збереження у форматі попередніх версій (pickle) - для порівняння з 'save'."""
+    book = make_book(rows)
+    filename = os.path.join(tempfile.mkdtemp(), "contacts.pkl")
+    return len(rows), lambda: mdl._write_snapshot(filename, pickle.dumps(book, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def case_load_pickle(rows: list[Row]):
+    """Завантаження файлу pickle попередніх версій - для порівняння з 'load'."""
+    filename = os.path.join(tempfile.mkdtemp(), "contacts.pkl")
+    mdl._write_snapshot(filename, pickle.dumps(make_book(rows), protocol=pickle.HIGHEST_PROTOCOL))
+    return len(rows), lambda: mdl.load_contacts(filename)
+
+
+def case_execute(rows: list[Row]):
+    """Повний шлях команди 'phone <ім'я>' через controller.execute (вивід вимкнено)."""
+    book = make_book(rows)
+    commands = [ctrl.parse_input(f"phone {row[0]}") for row in _choices(rows, EXECUTE_OPS)]
+    ctrl.set_storage(mdl.SnapshotStorage(os.path.join(tempfile.mkdtemp(), "contacts.pkl")))
+    def run():
+        v.configure(colors=False, enabled=False, terminal=False)
+        try:
+            for command, args in commands:
+                ctrl.execute(command, args, book)
+        finally:
+            v.configure()
+    return len(commands), run
+
+
+def case_render(rows: list[Row]):
+    """Вивід сторінки 'all' з 1000 контактів у /dev/null (10 разів)."""
+    book = make_book(rows)
+    records = book.page(1, 1000)
+    repeats = 10
+    def run():
+        with open(os.devnull, "w", encoding="utf-8", buffering=1) as devnull, contextlib.redirect_stdout(devnull):
+            for _ in range(repeats):
+                v.show_contacts_page(records, page=1, pages=1, total=len(rows))
+                v.flush()
+    return len(records) * repeats, run
+
+
+SUITE: dict[str, Case] = {
+    'add_record'        : case_add_record,          # AddressBook.add_record з усіма індексами
+    'find'              : case_find,                # AddressBook.find
+    'upcoming_birthdays': case_upcoming_birthdays,  # get_upcoming_birthdays(7)
+    'add_phone'         : case_add_phone,           # Record.add_phone у книзі
+    'save'              : case_save,                # save_contacts (контактів/с)
+    'load'              : case_load,                # load_contacts (контактів/с)
+    'save_pickle'       : case_save_pickle,         # Те саме у форматі pickle
+    'load_pickle'       : case_load_pickle,         # Завантаження старого файлу pickle
+    'execute'           : case_execute,             # Диспетчеризація команди
+    'render'            : case_render,              # view: сторінка контактів
+}
+
+
+def run_case(case: Case, rows: list[Row], memory: bool = True, repeat: int = 3) -> dict[str, float]:
+    """
+    Вимірює сценарій: найкращий час з repeat повторів (кожен на свіжих даних) і пропускну здатність,
+    а окремим проходом - пік пам'яті виміряної частини.
+    """
+    seconds = float("inf")
+    for _ in range(repeat):
+        ops, run = case(rows)
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        seconds = min(seconds, time.perf_counter() - start)
+    result = {"ops": ops, "seconds": seconds, "ops_per_s": ops / seconds if seconds else float("inf")}
+    if memory:
+        del run
+        ops, run = case(rows)
+        gc.collect()
+        tracemalloc.start()
+        run()
+        result["peak_kb"] = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    return result
+
+
+def run_suite(sizes: list[int], cases: list[str], memory: bool = True, repeat: int = 3) -> dict[str, dict[str, float]]:
+    """Запускає вибрані сценарії для кожного розміру книги. Ключ результату - 'сценарій@розмір'."""
+    results = {}
+    for size in sizes:
+        rows = make_rows(size)
+        for name in cases:
+            results[f"{name}@{size}"] = result = run_case(SUITE[name], rows, memory, repeat)
+            peak = f", пік {result['peak_kb']:.0f} КБ" if "peak_kb" in result else ""
+            print(f"{name + '@' + str(size):<28} {result['ops_per_s']:>14,.0f} оп/с  ({result['seconds'] * 1000:.1f} мс{peak})")
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Сценарії, пропускна здатність яких впала більше ніж на tolerance (частка) відносно базової."""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base and result["ops_per_s"] < base["ops_per_s"] * (1 - tolerance):
+            change = result["ops_per_s"] / base["ops_per_s"] - 1
+            regressions.append(f"{key}: {base['ops_per_s']:,.0f} -> {result['ops_per_s']:,.0f} оп/с ({change:+.0%})")
+    return regressions
+
+
+def suite_main(options: argparse.Namespace) -> int:
+    sizes = [int(size) for size in options.suite.split(",")]
+    cases = options.cases.split(",") if options.cases else list(SUITE)
+    results = run_suite(sizes, cases, memory=not options.no_memory, repeat=options.repeat)
+    if options.save_baseline:
+        with open(options.save_baseline, "w", encoding="utf-8") as file:
+            json.dump({"python": sys.version.split()[0], "results": results}, file, indent=2)
+        print(f"Базові результати збережено у '{options.save_baseline}'.")
+    if options.baseline:
+        with open(options.baseline, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file)["results"], options.tolerance)
+        for line in regressions:
+            print(f"Регресія: {line}")
+        if regressions:
+            return 1
+        print("Регресій відносно базових результатів немає.")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки адресної книги")
+    parser.add_argument("--contacts", type=int, default=100_000, help="Кількість контактів")
+    parser.add_argument("--birthdays", type=int, default=1_000_000, help="Кількість днів народження")
+    parser.add_argument("--page", type=int, default=10_000, help="Контактів на сторінці для бенчмарку виводу")
+    parser.add_argument("--names", type=int, default=1_000_000, help="Кількість імен для пошуку")
+    parser.add_argument("--suite", metavar="SIZES",
+                        help="Набір сценаріїв для книг заданих розмірів через кому (наприклад 10000,100000,1000000)")
+    parser.add_argument("--cases", help=f"Лише ці сценарії через кому: {', '.join(SUITE)}")
+    parser.add_argument("--repeat", type=int, default=3, help="Повторів кожного сценарію (береться найкращий час)")
+    parser.add_argument("--no-memory", action="store_true", help="Не вимірювати пік пам'яті (вдвічі швидше)")
+    parser.add_argument("--save-baseline", metavar="FILE", help="Зберегти результати як базові (JSON)")
+    parser.add_argument("--baseline", metavar="FILE", help="Порівняти з базовими результатами")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Допустиме падіння пропускної здатності відносно базової (частка)")
+    options = parser.parse_args()
+    if options.suite:
+        sys.exit(suite_main(options))
+
+    sizes = ", ".join(f"{key} {value:.0f}" for key, value in bench_memory(options.contacts).items())
+    print(f"Пам'ять на контакт ({options.contacts} контактів), байт: {sizes}")
+    print(f"Вивід сторінки з {options.page} контактів: {bench_render(options.page):.1f} мс")
+    for name, result in bench_snapshot(options.contacts).items():
+        print(f"Знімок {name} ({options.contacts}): {result['size']:.1f} МБ, "
+              f"збереження {result['save']:.1f} мс, завантаження {result['load']:.1f} мс")
+    for days in (7, 30):
+        results = bench_birthdays(options.birthdays, days)
+        timings = ", ".join(f"{key} {value:.1f} мс" for key, value in results.items() if key != "found")
+        print(f"Дні народження ({options.birthdays}, вікно {days} дн., знайдено {results['found']}): {timings}")
+    timings = ", ".join(f"{key} {value:.1f} мс" for key, value in bench_search(options.names).items())
+    print(f"Пошук імен ({options.names}): {timings}")
+    timings = ", ".join(f"{key} {value:.1f} мс" for key, value in bench_phone_search(options.names).items())
+    print(f"Пошук телефонів ({options.names}): {timings}")
+
+
+if __name__ == "__main__":
+    main()
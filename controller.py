@@ -1,9 +1,15 @@
 import view as v
 import model as mdl
+import data_io
+import metrics
+import profiling
+import time
+from contextlib import nullcontext
 from functools import wraps
+from typing import Callable
 from model import AddressBook, Record, ModelError # Імпортуємо ModelError та класи моделі
 # Імпортуємо кастомні винятки
-from model import CommandException, ContactException, PhoneException, EmailException, BirthdayException
+from model import CommandException, ContactException, PhoneException, EmailException, BirthdayException, StorageException
 
 
 # ============================ ДЕКОРАТОР ОБРОБКИ ПОМИЛОК ============================
@@ -39,7 +45,7 @@ def input_error(func):
             return False
         except Exception as e: # Захоплюємо будь-які інші несподівані винятки
             v.error("unknown_error", error_message=str(e))
-            print(f"[Debug] Неочікувана помилка: {type(e).__name__}: {e}") # Для відладки
+            v.write(f"[Debug] Неочікувана помилка: {type(e).__name__}: {e}") # Для відладки
             return False
     return wrapper
 
@@ -51,9 +57,13 @@ def parse_input(user_input: str) -> tuple[str, list[str]]:
     Розбирає рядок вводу на команду та аргументи.
     Повертає команду в нижньому регістрі та список аргументів.
     """
+    if metrics.enabled:
+        start = time.perf_counter()
     parts = user_input.strip().split()
     command = parts[0].lower() if parts else ""
     args = parts[1:]
+    if metrics.enabled and command in COMMANDS:
+        metrics.record(command, "parse", time.perf_counter() - start)
     return command, args
 
 
@@ -241,10 +251,57 @@ def show_contact_details(args: list[str], book: AddressBook):
 
 @input_error
 def show_all_handler(args: list[str], book: AddressBook):
-    """Обробляє команду 'all'. Показує всі контакти."""
-    if args: # Команда 'all' не повинна мати аргументів
-        raise CommandException(ModelError.INVALID_COMMAND, message="Команда 'all' не приймає аргументів.")
-    v.show_all_contacts(book)
+    """Обробляє команду 'all [сторінка] [розмір] [name|birthday]'. Показує контакти посторінково."""
+    numbers = [arg for arg in args if arg.isdigit()]
+    orders = [arg.lower() for arg in args if not arg.isdigit()]
+    if len(numbers) > 2 or len(orders) > 1 or (orders and orders[0] not in mdl.PAGE_ORDERS) \
+            or any(int(number) <= 0 for number in numbers):
+        raise CommandException(ModelError.INVALID_COMMAND, message="Невірні аргументи для команди 'all'. Очікується: [сторінка] [розмір] [name|birthday]")
+    page = int(numbers[0]) if numbers else 1
+    size = int(numbers[1]) if len(numbers) > 1 else mdl.PAGE_SIZE
+    order = orders[0] if orders else "name"
+    total = len(book.data)
+    v.show_contacts_page(book.page(page, size, order), page=page, pages=-(-total // size), total=total)
+    return False
+
+
+@input_error
+def search_handler(args: list[str], book: AddressBook):
+    """Обробляє 'search'. Шукає контакти за частиною імені або з одруківками."""
+    if not args:
+        raise CommandException(ModelError.INVALID_COMMAND, message="Невірна кількість аргументів для команди 'search'. Очікується: <запит>")
+    query = " ".join(args) # Ім'я може містити пробіли
+    v.show_search_results(book.search(query), query=query)
+    return False
+
+
+@input_error
+def who_phone_handler(args: list[str], book: AddressBook):
+    """Обробляє 'who-phone'. Показує власників телефону."""
+    if len(args) != 1:
+        raise CommandException(ModelError.INVALID_COMMAND, message="Невірна кількість аргументів для команди 'who-phone'. Очікується: <телефон>")
+    phone = args[0]
+    v.show_owners(book.find_by_phone(phone), value=phone)
+    return False
+
+
+@input_error
+def find_phone_handler(args: list[str], book: AddressBook):
+    """Обробляє 'find-phone'. Шукає телефони за частиною цифр (наприклад, останніми 4-6)."""
+    if len(args) != 1 or not args[0].isdigit():
+        raise CommandException(ModelError.INVALID_COMMAND, message="Невірні аргументи для команди 'find-phone'. Очікується: <цифри>")
+    digits = args[0]
+    v.show_phone_matches(book.search_phones(digits), digits=digits)
+    return False
+
+
+@input_error
+def who_email_handler(args: list[str], book: AddressBook):
+    """Обробляє 'who-email'. Показує власників email."""
+    if len(args) != 1:
+        raise CommandException(ModelError.INVALID_COMMAND, message="Невірна кількість аргументів для команди 'who-email'. Очікується: <email>")
+    email = args[0]
+    v.show_owners(book.find_by_email(email), value=email)
     return False
 
 
@@ -308,6 +365,142 @@ def show_upcoming_birthdays_handler(args: list[str], book: AddressBook):
     return False
 
 
+# --- Обмін даними ---
+
+@input_error
+def import_handler(args: list[str], book: AddressBook) -> bool:
+    """Обробляє 'import'. Імпортує контакти з CSV/JSONL файлу, зберігаючи книгу один раз наприкінці."""
+    if len(args) != 1:
+        raise CommandException(ModelError.INVALID_COMMAND, message="Невірна кількість аргументів для команди 'import'. Очікується: <файл>")
+    report = data_io.import_contacts(book, args[0])
+    v.show_import_report(report)
+    return report["added"] + report["updated"] > 0
+
+
+@input_error
+def export_handler(args: list[str], book: AddressBook):
+    """Обробляє 'export'. Потоково вивантажує книгу у CSV/JSONL/vCard."""
+    if len(args) not in (1, 2):
+        raise CommandException(ModelError.INVALID_COMMAND, message="Невірна кількість аргументів для команди 'export'. Очікується: <файл> [формат]")
+    filename = args[0]
+    count = data_io.export_contacts(book, filename, args[1] if len(args) == 2 else None)
+    v.success("export_done", count=count, filename=filename)
+    return False
+
+
+# --- Транзакції ---
+
+@input_error
+def begin_handler(args: list[str], book: AddressBook) -> bool:
+    """Обробляє 'begin'. Наступні зміни не зберігаються до 'commit' і скасовуються 'rollback'."""
+    if args:
+        raise CommandException(ModelError.INVALID_COMMAND, message="Команда 'begin' не приймає аргументів.")
+    book.begin()
+    v.info("transaction_started")
+    return False
+
+
+@input_error
+def commit_handler(args: list[str], book: AddressBook) -> bool:
+    """Обробляє 'commit'. Закриває транзакцію; збереження змін виконує execute."""
+    if args:
+        raise CommandException(ModelError.INVALID_COMMAND, message="Команда 'commit' не приймає аргументів.")
+    count = book.commit()
+    v.success("transaction_committed", count=count)
+    return count > 0
+
+
+@input_error
+def rollback_handler(args: list[str], book: AddressBook) -> bool:
+    """Обробляє 'rollback'. Скасовує всі зміни з моменту 'begin'."""
+    if args:
+        raise CommandException(ModelError.INVALID_COMMAND, message="Команда 'rollback' не приймає аргументів.")
+    count = book.rollback()
+    v.success("transaction_rolled_back", count=count)
+    return count > 0 # Зворотні зміни теж фіксуються сховищем (журнал, SQLite)
+
+
+# --- Історія змін ---
+
+@input_error
+def undo_handler(args: list[str], book: AddressBook) -> bool:
+    """Обробляє 'undo'. Скасовує зміни останньої модифікуючої команди."""
+    if args:
+        raise CommandException(ModelError.INVALID_COMMAND, message="Команда 'undo' не приймає аргументів.")
+    if _history is None:
+        raise CommandException(ModelError.NOTHING_TO_UNDO)
+    v.success("undone", command=_history.undo())
+    return True
+
+
+@input_error
+def redo_handler(args: list[str], book: AddressBook) -> bool:
+    """Обробляє 'redo'. Повторює останню скасовану команду."""
+    if args:
+        raise CommandException(ModelError.INVALID_COMMAND, message="Команда 'redo' не приймає аргументів.")
+    if _history is None:
+        raise CommandException(ModelError.NOTHING_TO_REDO)
+    v.success("redone", command=_history.redo())
+    return True
+
+
+# --- Метрики ---
+
+@input_error
+def stats_handler(args: list[str], book: AddressBook) -> bool:
+    """Обробляє 'stats'. Показує кількість і затримки команд за фазами; 'stats reset' - очищує їх."""
+    if not metrics.enabled:
+        v.info("metrics_disabled")
+    elif args[:1] == ["reset"]:
+        metrics.reset()
+        v.success("metrics_reset")
+    else:
+        v.show_stats(metrics.stats())
+    return False
+
+
+# --- Профілювання ---
+
+@input_error
+def profile_handler(args: list[str], book: AddressBook) -> bool:
+    """Обробляє 'profile'. 'profile on [мс]' / 'profile off' - вмикає/вимикає профілювання повільних команд."""
+    mode = args[0].lower() if args else ""
+    if mode == "on":
+        threshold = None
+        if len(args) > 1:
+            try:
+                threshold = float(args[1])
+                if threshold < 0:
+                    raise ValueError
+            except ValueError:
+                raise CommandException(ModelError.INVALID_COMMAND, message="Невірний поріг для команди 'profile'. Очікується кількість мілісекунд.")
+        profiling.configure(True, threshold)
+    elif mode == "off":
+        profiling.configure(False)
+    elif mode:
+        raise CommandException(ModelError.INVALID_COMMAND, message="Невірний аргумент для команди 'profile'. Очікується: on [мс] | off")
+    if profiling.enabled:
+        v.info("profiling_enabled", threshold=profiling.threshold_ms, directory=profiling.directory)
+    else:
+        v.info("profiling_disabled")
+    return False
+
+
+def _save_profile(command: str, args: list[str], profile, elapsed_ms: float) -> None:
+    """Записує профіль повільної команди та повідомляє, де його шукати."""
+    try:
+        v.info("profile_saved", command=command, elapsed=elapsed_ms,
+               filename=profiling.save(profile, command, args, elapsed_ms))
+    except OSError as e:
+        v.error("profile_save_failed", error_message=str(e))
+
+
+def rollback_open_transaction(book: AddressBook | None) -> None:
+    """Скасовує незавершену транзакцію (при виході чи в кінці пакетного скрипта)."""
+    if book is not None and book.in_transaction:
+        v.warn("transaction_aborted", count=book.rollback())
+
+
 # --- Допоміжні команди ---
 
 def hello_handler(*args, **kwargs): # Може приймати book, але не використовує
@@ -328,9 +521,25 @@ def clear_screen_handler(*args, **kwargs):
      return False
 
 
+# Команди завершення роботи (у пакетному режимі означають кінець скрипта)
+QUIT_COMMANDS = {'exit', 'close', 'quit'}
+
+
+def close_storage() -> None:
+    """Закриває сховище; якщо файл довго тримає інший процес, повідомляє про це замість падіння."""
+    try:
+        _storage.close()
+    except StorageException as e:
+        v.error(e.error_code.value, **e.kwargs)
+
+
 def quit_handler(*args, **kwargs):
-    """Обробляє 'exit'/'close'/'quit'. Завершує програму."""
+    """Обробляє 'exit'/'close'/'quit'. Завершує програму (незавершена транзакція скасовується)."""
+    rollback_open_transaction(_storage.book)
+    close_storage() # Дописуємо все, що ще не збережено
+    metrics.close()
     v.info("goodbye_message")
+    v.flush()
     exit(0) # Виконуємо вихід з програми
 
 
@@ -355,7 +564,11 @@ COMMANDS = {
 
     # Показ
     'phone'          : show_contact_details,     # Показати деталі контакту (замість 'show', 'contact')
-    'all'            : show_all_handler,         # Показати всі контакти
+    'all'            : show_all_handler,         # Показати контакти посторінково
+    'search'         : search_handler,           # Пошук за частиною імені / з одруківками
+    'who-phone'      : who_phone_handler,        # Чий це телефон
+    'who-email'      : who_email_handler,        # Чий це email
+    'find-phone'     : find_phone_handler,       # Пошук телефонів за частиною цифр
 
     # Видалення
     'delete'         : delete_contact,           # Видалити контакт повністю
@@ -372,6 +585,23 @@ COMMANDS = {
     'birthdays'      : show_upcoming_birthdays_handler, # Показати наступні ДН
     'all-bd'         : show_upcoming_birthdays_handler, # Аліас
 
+    # Обмін даними
+    'import'         : import_handler,           # Імпорт з CSV/JSONL
+    'export'         : export_handler,           # Експорт у CSV/JSONL/vCard
+
+    # Транзакції
+    'begin'          : begin_handler,            # Почати транзакцію
+    'commit'         : commit_handler,           # Зберегти зміни транзакції
+    'rollback'       : rollback_handler,         # Скасувати зміни транзакції
+
+    # Метрики та профілювання
+    'stats'          : stats_handler,            # Затримки команд за фазами
+    'profile'        : profile_handler,          # Профілювання повільних команд
+
+    # Історія змін
+    'undo'           : undo_handler,             # Скасувати останню зміну
+    'redo'           : redo_handler,             # Повторити скасовану зміну
+
     # Інші
     'clr'            : clear_screen_handler,     # Очистити екран
     '?'              : show_help_handler,        # Довідка
@@ -388,21 +618,123 @@ MODIFYING_COMMANDS = {
     'delete', 'del-phone', 'del-email',
     'add-birthday', 'add-bd',
     'del-birthday', 'del-bd',
+    'import',
+    'commit', 'rollback',
+    'undo', 'redo',
 }
 
+# Команди, що виконуються під виключним блокуванням файлу контактів
+# ('begin' - бо відкрита транзакція тримає його до commit/rollback)
+LOCKING_COMMANDS = MODIFYING_COMMANDS | {'begin'}
+
+
+# ============================ ЗБЕРЕЖЕННЯ ============================
+
+# Поточна стратегія збереження (обирається при старті в main)
+_storage = mdl.SnapshotStorage()
+
+def set_storage(storage: mdl.SnapshotStorage) -> None:
+    """Встановлює стратегію збереження, яку використовує execute."""
+    global _storage
+    _storage = storage
+
+
+# Історія змін для undo/redo (None - вимкнена)
+_history: mdl.History | None = None
+
+def set_history(history: mdl.History | None) -> None:
+    """Встановлює історію, у якій execute закриває крок після кожної команди."""
+    global _history
+    _history = history
+
 
 # ============================ ГОЛОВНА ФУНКЦІЯ ВИКОНАННЯ ============================
 
-def execute(command: str, args: list[str], book: AddressBook):
+def _refresh(book: AddressBook) -> bool:
+    """
+    Перечитує книгу, якщо файл змінив інший процес.
+
+    Returns:
+        bool: True, якщо файл не вдалося прочитати (книга застаріла).
+    """
+    try:
+        if _storage.refresh(book): # Лише порівняння відбитка файлу, поки його ніхто не змінив
+            v.info("contacts_reloaded")
+    except StorageException as e:
+        # Чужий файл не прочитано: читати можна попередній стан, але зміни записали б його поверх файлу
+        v.error(e.error_code.value, **e.kwargs)
+        return True
+    return False
+
+def _run_handler(command: str, args: list[str], book: AddressBook, handler: Callable, commit: bool,
+                 stale: bool, timed: bool, refresh_time: float) -> tuple[bool, tuple | None]:
+    """
+    Викликає обробник під уже взятим блокуванням сховища, закриває крок історії та зберігає зміни.
+
+    Returns:
+        tuple: (чи змінила команда книгу, (профіль, мс) або None).
+    """
+    if timed:
+        handler_start = time.perf_counter()
+    result, slow = False, None
+    if not stale:
+        result, slow = profiling.run(handler, args, book=book)
+    if _history is not None and command in LOCKING_COMMANDS: # Усі зміни команди - один крок історії
+        label = " ".join([command, *args])
+        if _history.checkpoint(label):
+            v.warn("history_step_too_large", command=label, limit=_history.max_bytes)
+    if timed:
+        persist_start = time.perf_counter()
+        metrics.record(command, "handler", persist_start - handler_start)
+    changed = bool(result) and command in MODIFYING_COMMANDS
+    if changed and commit and not book.in_transaction:
+        _storage.commit(book)
+    if timed:
+        metrics.record(command, "persist", refresh_time + time.perf_counter() - persist_start)
+    return changed, slow
+
+
+def execute(command: str, args: list[str], book: AddressBook, commit: bool = True) -> bool:
     """
     Знаходить та викликає відповідний обробник команди.
-    Зберігає зміни, якщо команда модифікуюча.
+    Зберігає зміни, якщо команда модифікуюча і транзакція не відкрита (commit=False - збереження
+    робить викликач, наприклад пакетний режим один раз наприкінці).
+
+    Returns:
+        bool: True, якщо команда змінила книгу.
     """
     handler = COMMANDS.get(command)
-    if handler:
-        result = handler(args, book=book)
-        if result and command in MODIFYING_COMMANDS:
-            mdl.save_contacts(book)
-    else:
-        # Використовуємо ключ з ModelError Enum та передаємо аргумент 'command'
-        v.warn(ModelError.INVALID_COMMAND.value, command=command)
\ No newline at end of file
+    changed = False
+    slow = None # (профіль, мс), якщо команда під профілюванням перевищила поріг
+    timed = metrics.enabled and handler is not None # Вимкнені метрики коштують лише перевірок прапорця
+    try:
+        if handler:
+            writes = command in LOCKING_COMMANDS
+            exclusive = writes or command in QUIT_COMMANDS # Вихід скасовує транзакцію і дописує зміни
+            try:
+                # Фонове збереження не побачить книгу посеред зміни, а інші процеси - не запишуть файл
+                with _storage.lock, _storage.writing(book) if writes else nullcontext():
+                    start = time.perf_counter() if timed else 0.0
+                    stale = _refresh(book) and writes
+                    refresh_time = time.perf_counter() - start if timed else 0.0
+                    if exclusive:
+                        changed, slow = _run_handler(command, args, book, handler, commit, stale, timed, refresh_time)
+                if not exclusive:
+                    # Звірку з файлом (яка може перечитати книгу) зроблено виключно, а сама команда лише читає -
+                    # під спільним блокуванням, паралельно з іншими читачами (сервер)
+                    with _storage.lock.shared():
+                        changed, slow = _run_handler(command, args, book, handler, commit, stale, timed, refresh_time)
+            except StorageException as e: # Файл довго тримає інший процес (наприклад, відкрита транзакція)
+                v.error(e.error_code.value, **e.kwargs)
+            if slow is not None: # Запис профілю - вже без блокування файлу контактів
+                _save_profile(command, args, *slow)
+        else:
+            # Використовуємо ключ з ModelError Enum та передаємо аргумент 'command'
+            v.warn(ModelError.INVALID_COMMAND.value, command=command)
+    finally:
+        if timed:
+            render_start = time.perf_counter()
+        v.flush() # Увесь вивід команди - одним записом
+        if timed:
+            metrics.record(command, "render", time.perf_counter() - render_start)
+    return changed
\ No newline at end of file
@@ -0,0 +1,242 @@
+import csv
+import gzip
+import json
+import os
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from model import AddressBook, Record, Name, Phone, Email, Birthday, ModelError, CommandException, parse_date, format_date
+
+# ============================ ФОРМАТИ ФАЙЛІВ ============================
+
+# Стовпці CSV; кілька телефонів чи email в одній клітинці розділяються ';'
+# (у самих значеннях його бути не може - це відкидає валідація телефонів та email)
+CSV_COLUMNS = ("name", "phones", "emails", "birthday")
+MULTI_VALUE_SEPARATOR = ";"
+IMPORT_CHUNK_SIZE = 1000 # Скільки рядків валідуються одним пакетом
+
+
+WRITE_BUFFER_SIZE = 1 << 20 # Буфер запису експорту (1 МБ)
+
+
+def detect_format(filename: str, supported: dict, file_format: str | None = None) -> str:
+    """
+    Визначає формат за явно вказаною назвою або за розширенням (ігноруючи .gz).
+    Кидає CommandException для непідтримуваних форматів.
+    """
+    if file_format is None:
+        base = filename[:-3] if filename.endswith(".gz") else filename
+        file_format = os.path.splitext(base)[1]
+    file_format = file_format.lower().lstrip(".")
+    if file_format not in supported:
+        raise CommandException(ModelError.UNSUPPORTED_FORMAT, filename=filename,
+                               formats=", ".join(supported))
+    return file_format
+
+
+def open_text(filename: str, mode: str = "r", compressed: bool | None = None):
+    """Відкриває текстовий файл, прозоро стискаючи/розпаковуючи gzip (за замовчуванням - для .gz)."""
+    if compressed is None:
+        compressed = filename.endswith(".gz")
+    # Excel та Блокнот у Windows пишуть UTF-8 з BOM - при читанні його пропускаємо, інакше він потрапить у назву стовпця
+    encoding = "utf-8" if "w" in mode else "utf-8-sig"
+    if compressed:
+        return gzip.open(filename, mode + "t", encoding=encoding, newline="")
+    return open(filename, mode, encoding=encoding, newline="", buffering=WRITE_BUFFER_SIZE if "w" in mode else -1)
+
+
+def _split_values(value) -> list[str]:
+    """Клітинка з кількома значеннями -> список (для JSONL допускається і список)."""
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in str(value).split(MULTI_VALUE_SEPARATOR) if item.strip()]
+
+
+# ============================ ІМПОРТ ============================
+
+def _read_csv(file) -> Iterator[tuple[int, dict]]:
+    reader = csv.DictReader(file)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _read_jsonl(file) -> Iterator[tuple[int, dict]]:
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        # Непридатний рядок передаємо далі як порожній - він дасть помилку валідації імені
+        yield line_number, row if isinstance(row, dict) else {"name": None}
+
+
+READERS = {
+    'csv'   : _read_csv,
+    'jsonl' : _read_jsonl,
+}
+
+
+def _normalize(rows: Iterable[tuple[int, dict]]) -> Iterator[tuple[int, str, list[str], list[str], str]]:
+    """Приводить рядки будь-якого формату до (рядок, ім'я, телефони, emails, дата)."""
+    for line_number, row in rows:
+        name = str(row.get("name") or "").strip()
+        birthday = str(row.get("birthday") or "").strip()
+        yield line_number, name, _split_values(row.get("phones")), _split_values(row.get("emails")), birthday
+
+
+def _chunks(rows: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _validated(chunks: Iterable[list]) -> Iterator[tuple[tuple, list[tuple[ModelError, dict]]]]:
+    """Валідує кожен пакет стовпцями (Field.validate_many) і повертає рядки з їхніми помилками."""
+    for chunk in chunks:
+        name_errors = Name.validate_many(row[1] for row in chunk)
+        phone_errors = iter(Phone.validate_many(phone for row in chunk for phone in row[2]))
+        email_errors = iter(Email.validate_many(email for row in chunk for email in row[3]))
+        birthday_errors = iter(Birthday.validate_many(row[4] for row in chunk if row[4]))
+        for row, name_error in zip(chunk, name_errors):
+            _, name, phones, emails, birthday = row
+            errors = []
+            if name_error:
+                errors.append((name_error, {"name": name}))
+            errors += [(error, {"phone": phone}) for phone in phones if (error := next(phone_errors))]
+            errors += [(error, {"email": email}) for email in emails if (error := next(email_errors))]
+            if birthday and (error := next(birthday_errors)):
+                errors.append((error, {"birthday": birthday}))
+            yield row, errors
+
+
+def import_contacts(book: AddressBook, filename: str) -> dict:
+    """
+    Потоково імпортує контакти з CSV або JSONL (можна .gz) і зливає їх з книгою:
+    нові контакти додаються, існуючим дописуються нові телефони та email, дата народження оновлюється.
+    Рядки з некоректними даними пропускаються цілком.
+    Якщо файл не вдалося дочитати (пошкоджене кодування, обірваний gzip), уже злиті рядки лишаються
+    у книзі, а причина потрапляє у звіт ('interrupted') - щоб викликач зберіг їх і повідомив про збій.
+    Якщо не злито жодного рядка, кидає CommandException.
+
+    Returns:
+        dict: {'added': int, 'updated': int, 'errors': [(номер рядка, код помилки, kwargs), ...],
+               'interrupted': текст помилки читання або None}
+    """
+    reader = READERS[detect_format(filename, READERS)]
+    report = {"added": 0, "updated": 0, "errors": [], "interrupted": None}
+    try:
+        with open_text(filename) as file:
+            for row, errors in _validated(_chunks(_normalize(reader(file)), IMPORT_CHUNK_SIZE)):
+                line_number, name, phones, emails, birthday = row
+                if errors:
+                    report["errors"] += [(line_number, error.value, kwargs) for error, kwargs in errors]
+                    continue
+                _merge(book, report, name, phones, emails, birthday)
+    except (OSError, csv.Error, UnicodeDecodeError) as e:
+        if not report["added"] and not report["updated"]:
+            raise CommandException(ModelError.FILE_ERROR, filename=filename, error_message=str(e))
+        report["interrupted"] = str(e)
+    return report
+
+
+def _merge(book: AddressBook, report: dict, name: str, phones: list[str], emails: list[str], birthday: str) -> None:
+    """Додає один перевірений рядок до книги. Дублікати телефонів та email пропускаються."""
+    record = book.data.get(name)
+    is_new = record is None
+    if is_new:
+        record = Record(name)
+    changed = False
+    for phone in phones:
+        if not record.has_phone(phone):
+            record.add_phone(phone)
+            changed = True
+    for email in emails:
+        if not record.has_email(email):
+            record.add_email(email)
+            changed = True
+    if birthday and (record.birthday is None or record.birthday.value != parse_date(birthday)):
+        record.add_birthday(birthday)
+        changed = True
+    if is_new:
+        book.add_record(record)
+        report["added"] += 1
+    elif changed:
+        report["updated"] += 1
+
+
+# ============================ ЕКСПОРТ ============================
+# Записи читаються з книги по одному і одразу пишуться у буферизований файл,
+# тож пам'ять не залежить від розміру книги.
+
+def _write_csv(file, records: Iterable[Record]) -> int:
+    writer = csv.writer(file)
+    writer.writerow(CSV_COLUMNS)
+    count = 0
+    for record in records:
+        writer.writerow((record.name.value,
+                         MULTI_VALUE_SEPARATOR.join(p.value for p in record.phones),
+                         MULTI_VALUE_SEPARATOR.join(e.value for e in record.emails),
+                         format_date(record.birthday.value) if record.birthday else ""))
+        count += 1
+    return count
+
+
+def _write_jsonl(file, records: Iterable[Record]) -> int:
+    count = 0
+    for record in records:
+        row = {"name": record.name.value,
+               "phones": [p.value for p in record.phones],
+               "emails": [e.value for e in record.emails],
+               "birthday": format_date(record.birthday.value) if record.birthday else None}
+        file.write(json.dumps(row, ensure_ascii=False))
+        file.write("\n")
+        count += 1
+    return count
+
+
+def _write_vcard(file, records: Iterable[Record]) -> int:
+    """vCard 3.0; ім'я, телефон та email не містять символів, що потребують екранування."""
+    count = 0
+    for record in records:
+        lines = ["BEGIN:VCARD", "VERSION:3.0", f"FN:{record.name.value}", f"N:{record.name.value};;;;"]
+        lines += [f"TEL;TYPE=CELL:{p.value}" for p in record.phones]
+        lines += [f"EMAIL:{e.value}" for e in record.emails]
+        if record.birthday:
+            lines.append(f"BDAY:{record.birthday.value.isoformat()}")
+        lines.append("END:VCARD")
+        file.write("\r\n".join(lines))
+        file.write("\r\n")
+        count += 1
+    return count
+
+
+WRITERS = {
+    'csv'   : _write_csv,
+    'jsonl' : _write_jsonl,
+    'vcf'   : _write_vcard,
+    'vcard' : _write_vcard,
+}
+
+
+def export_contacts(book: AddressBook, filename: str, file_format: str | None = None) -> int:
+    """
+    Потоково експортує всі контакти у CSV, JSONL або vCard (з .gz - стиснено).
+    Файл пишеться під тимчасовим ім'ям і з'являється лише повністю записаним.
+
+    Returns:
+        int: Кількість експортованих контактів.
+    """
+    writer = WRITERS[detect_format(filename, WRITERS, file_format)]
+    tmp_filename = filename + ".part"
+    try:
+        with open_text(tmp_filename, "w", compressed=filename.endswith(".gz")) as file:
+            count = writer(file, book.data.values())
+        os.replace(tmp_filename, filename)
+    except OSError as e:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise CommandException(ModelError.FILE_ERROR, filename=filename, error_message=str(e))
+    return count
@@ -1,14 +1,165 @@
+import argparse
+import os
+import sys
+import time
 import controller as ctrl
+import metrics
 import model as mdl
+import profiling
+import server
+import sqlite_storage
 import view as v # Додаємо імпорт view для доступу до clear_screen
 
+# Доступні стратегії збереження
+STORAGES = {
+    'snapshot'   : mdl.SnapshotStorage,              # Повний знімок після кожної зміни
+    'journal'    : mdl.JournalStorage,               # Журнал змін + періодичне ущільнення
+    'background' : mdl.BackgroundStorage,            # Відкладене збереження окремим потоком
+    'sqlite'     : sqlite_storage.SqliteStorage,     # База SQLite з індексами
+}
+
+def parse_arguments() -> argparse.Namespace:
+    """Розбирає аргументи командного рядка."""
+    parser = argparse.ArgumentParser(description="Адресна книга")
+    parser.add_argument("--file", help="Файл контактів (за замовчуванням contacts.pkl або contacts.db для sqlite)")
+    parser.add_argument("--storage", choices=STORAGES, default='snapshot', help="Спосіб збереження змін")
+    parser.add_argument("--backups", type=int, default=0, help="Скільки попередніх поколінь файлу зберігати")
+    parser.add_argument("--save-delay", type=int, default=mdl.SAVE_DELAY_MS,
+                        help="Фонове збереження: не частіше ніж раз на N мс")
+    parser.add_argument("--save-every", type=int, default=mdl.SAVE_MAX_CHANGES,
+                        help="Фонове збереження: одразу після M змін")
+    parser.add_argument("--leap-day", choices=[policy.value for policy in mdl.LeapDayPolicy],
+                        default=mdl.LEAP_DAY_POLICY.value,
+                        help="Коли вітати народжених 29 лютого у невисокосний рік")
+    parser.add_argument("--history", type=int, default=mdl.HISTORY_MAX_ENTRIES,
+                        help="Скільки кроків можна скасувати командою undo (0 - вимкнути історію)")
+    parser.add_argument("--history-bytes", type=int, default=mdl.HISTORY_MAX_BYTES,
+                        help="Орієнтовна межа пам'яті під історію змін, байт")
+    parser.add_argument("--batch", nargs="?", const="-", metavar="FILE",
+                        help="Пакетний режим: виконати команди з файлу (або зі stdin, якщо '-' чи без імені)")
+    parser.add_argument("--metrics", action="store_true", help="Збирати затримки команд (команда 'stats')")
+    parser.add_argument("--metrics-file", help="Записати метрики у JSON при виході (вмикає --metrics)")
+    parser.add_argument("--serve", action="store_true",
+                        help="Режим сервера: одна книга в пам'яті для всіх клієнтів на локальному сокеті")
+    parser.add_argument("--connect", action="store_true", help="Підключитися до запущеного сервера як клієнт")
+    parser.add_argument("--host", default=server.SERVER_HOST, help="Адреса сервера")
+    parser.add_argument("--port", type=int, default=server.SERVER_PORT, help="Порт сервера")
+    parser.add_argument("--socket", metavar="PATH",
+                        help="Unix-сокет замість TCP: доступ до сервера лише власнику (права 0600)")
+    parser.add_argument("--check-indexes", action="store_true",
+                        help="Відладка: звіряти індекси з записами після кожного завантаження книги")
+    parser.add_argument("--quiet", action="store_true", help="Пакетний режим: не виводити результати команд")
+    return parser.parse_args()
+
+def create_storage(options: argparse.Namespace) -> mdl.SnapshotStorage:
+    """Створює обрану стратегію збереження."""
+    if options.storage == 'sqlite':
+        # Файл pickle (якщо є) буде перенесено у нову базу при першому запуску
+        return sqlite_storage.SqliteStorage(options.file or sqlite_storage.DEFAULT_DB_FILENAME, backups=options.backups)
+    filename = options.file or mdl.DEFAULT_FILENAME
+    if options.storage == 'background':
+        return mdl.BackgroundStorage(filename, backups=options.backups,
+                                     delay_ms=options.save_delay, max_changes=options.save_every)
+    return STORAGES[options.storage](filename, backups=options.backups)
+
+def create_history(options: argparse.Namespace, contacts: mdl.AddressBook) -> mdl.History | None:
+    """Створює історію змін для undo/redo (або None, якщо її вимкнено)."""
+    if options.history <= 0:
+        return None
+    return mdl.History(contacts, max_entries=options.history, max_bytes=options.history_bytes)
+
+def run_batch(storage: mdl.SnapshotStorage, contacts: mdl.AddressBook, source) -> None:
+    """
+    Виконує команди з файлу (по одній на рядок) без інтерактиву та терміналу.
+    Порожні рядки та рядки з '#' пропускаються, 'exit'/'close'/'quit' завершує скрипт.
+    Зміни зберігаються один раз наприкінці, після чого виводиться підсумок часу.
+    """
+    commands = changed = 0
+    start = time.perf_counter()
+    try:
+        # Увесь скрипт - під виключним блокуванням файлу: інші процеси не запишуть між командами і збереженням
+        with storage.writing(contacts):
+            for line in source:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                command, args = ctrl.parse_input(line)
+                if command in ctrl.QUIT_COMMANDS:
+                    break
+                commands += 1
+                changed += ctrl.execute(command, args, contacts, commit=False)
+            ctrl.rollback_open_transaction(contacts) # Скрипт без 'commit' не залишає половину змін
+            save_start = time.perf_counter()
+            if changed:
+                storage.commit(contacts)
+    except mdl.StorageException as e: # Файл довго тримає інший процес - скрипт не виконано (або не збережено)
+        v.error(e.error_code.value, **e.kwargs)
+        v.flush()
+        ctrl.close_storage()
+        metrics.close()
+        sys.exit(1)
+    ctrl.close_storage()
+    metrics.close()
+    end = time.perf_counter()
+    v.configure(colors=False, terminal=False) # Підсумок виводиться навіть у тихому режимі
+    v.info("batch_summary", commands=commands, changed=changed, total_ms=(end - start) * 1000,
+           save_ms=(end - save_start) * 1000, rate=commands / (end - start) if end > start else 0)
+    v.flush()
+
+def configure_terminal() -> None:
+    """Кольори - лише для термінала і якщо їх не вимкнено змінною NO_COLOR; очищення екрана - для будь-якого термінала."""
+    terminal = sys.stdout.isatty()
+    v.configure(colors=terminal and "NO_COLOR" not in os.environ, terminal=terminal)
+
+def load_contacts(storage: mdl.SnapshotStorage) -> mdl.AddressBook:
+    """Завантажує книгу; якщо файл довго тримає інший процес, повідомляє про це і завершує роботу."""
+    try:
+        return storage.load()
+    except mdl.StorageException as e:
+        v.error(e.error_code.value, **e.kwargs)
+        v.flush()
+        sys.exit(1)
+
 def main():
     """Головна функція додатку."""
+    options = parse_arguments()
+    mdl.LEAP_DAY_POLICY = mdl.LeapDayPolicy(options.leap_day)
+    mdl.CHECK_INDEXES = options.check_indexes
+    metrics.configure(options.metrics, options.metrics_file)
+    profiling.configure_from_env() # ADDRESSBOOK_PROFILE=<мс> - профілювати повільні команди
+    if options.connect:
+        # Клієнт не завантажує книгу - лише показує вивід сервера
+        configure_terminal()
+        server.run_client(options.host, options.port, options.socket)
+        return
+    if options.serve:
+        storage = create_storage(options)
+        contacts = load_contacts(storage)
+        ctrl.set_storage(storage)
+        server.run_server(storage, contacts, options.host, options.port, options.socket)
+        return
+    if options.batch:
+        # Без кольорів, очищення екрана та привітань - лише результати команд
+        v.configure(colors=False, enabled=not options.quiet, terminal=False)
+        storage = create_storage(options)
+        contacts = load_contacts(storage)
+        ctrl.set_storage(storage)
+        ctrl.set_history(create_history(options, contacts))
+        if options.batch == "-":
+            run_batch(storage, contacts, sys.stdin)
+        else:
+            with open(options.batch, encoding="utf-8") as source:
+                run_batch(storage, contacts, source)
+        return
+    configure_terminal()
     # Очищення екрану та привітання
     v.clear_screen()
 
     # Завантаження контактів відбувається тут
-    contacts = mdl.load_contacts(mdl.DEFAULT_FILENAME)
+    storage = create_storage(options)
+    contacts = load_contacts(storage)
+    ctrl.set_storage(storage)
+    ctrl.set_history(create_history(options, contacts))
     ctrl.hello_handler() # Викликаємо обробник напряму
 
     while True:
@@ -0,0 +1,105 @@
+import json
+import threading
+import time
+
+# ============================ ПАРАМЕТРИ ============================
+# Фази виконання команди:
+#   parse   - розбір рядка вводу;
+#   handler - обробник команди разом з форматуванням виводу у буфер view;
+#   persist - звірка файлу з іншими процесами та збереження змін сховищем;
+#   render  - вивід накопиченого буфера в термінал.
+PHASES = ("parse", "handler", "persist", "render")
+BUCKETS = 40 # Кошики гістограми: i-й - тривалості до 2**i мкс (останній - усе довше)
+
+# Поки вимкнено, виклики зводяться до перевірки одного прапорця
+enabled = False
+dump_filename: str | None = None
+
+
+# ============================ ГІСТОГРАМИ ============================
+
+class Histogram:
+    """Гістограма затримок з логарифмічними кошиками (фіксована пам'ять за будь-якої кількості вимірів)."""
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0 # Секунд
+        self.max = 0.0
+        self.buckets = [0] * BUCKETS
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[min(int(seconds * 1_000_000).bit_length(), BUCKETS - 1)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Верхня межа кошика, в який потрапляє заданий перцентиль (секунд)."""
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                return min((1 << index) / 1_000_000, self.max)
+        return self.max
+
+    def summary(self) -> dict[str, float]:
+        """Кількість та затримки у мілісекундах."""
+        return {
+            "count" : self.count,
+            "mean"  : self.total / self.count * 1000 if self.count else 0.0,
+            "p50"   : self.percentile(0.5) * 1000,
+            "p95"   : self.percentile(0.95) * 1000,
+            "max"   : self.max * 1000,
+        }
+
+
+# Команда -> фаза -> гістограма
+_histograms: dict[str, dict[str, Histogram]] = {}
+_lock = threading.Lock() # Команди сервера виконуються у кількох потоках
+
+
+def configure(enable: bool = True, filename: str | None = None) -> None:
+    """Вмикає збір метрик; filename - куди записати їх у JSON при завершенні роботи."""
+    global enabled, dump_filename
+    enabled = enable or filename is not None
+    dump_filename = filename
+
+
+def record(command: str, phase: str, seconds: float) -> None:
+    """Додає вимір тривалості фази команди."""
+    with _lock:
+        phases = _histograms.get(command)
+        if phases is None:
+            phases = _histograms[command] = {phase: Histogram() for phase in PHASES}
+        phases[phase].add(seconds)
+
+
+def reset() -> None:
+    with _lock:
+        _histograms.clear()
+
+
+def stats() -> dict[str, dict[str, dict[str, float]]]:
+    """Зведення: команда -> фаза -> {count, mean, p50, p95, max} (мс); порожні фази пропускаються."""
+    with _lock:
+        return {command: {phase: histogram.summary() for phase, histogram in phases.items() if histogram.count}
+                for command, phases in sorted(_histograms.items())}
+
+
+def dump(filename: str) -> None:
+    """Записує зведення метрик у JSON."""
+    with open(filename, "w", encoding="utf-8") as file:
+        json.dump({"generated": time.strftime("%Y-%m-%dT%H:%M:%S"), "commands": stats()},
+                  file, ensure_ascii=False, indent=2)
+
+
+def close() -> None:
+    """Викликається при виході: записує метрики у файл, якщо його вказано."""
+    if enabled and dump_filename:
+        try:
+            dump(dump_filename)
+        except OSError as e:
+            print(f"Не вдалося записати метрики у '{dump_filename}': {e}")
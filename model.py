@@ -1,8 +1,28 @@
 import re
+import os
+import gc
+import json
+import time
+import shutil
 import pickle   # Додано імпорт pickle
-from collections import UserDict
-from datetime import datetime, date, timedelta
+import struct
+import heapq
+import sys
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter, UserDict, deque
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from datetime import date, timedelta
 from enum import Enum
+from itertools import accumulate, islice, pairwise
+
+try:
+    import fcntl # POSIX
+except ImportError:
+    fcntl = None
+    import msvcrt # Windows
 
 # ============================= ENUMS ТА КОНСТАНТИ =============================
 
@@ -23,6 +43,14 @@ class ModelError(Enum):
     EMPTY_CONTACTS         = "empty_contacts"
     INVALID_INDEX          = "invalid_index"
     EMPTY_CONTACT_FIELDS   = "empty_contact_fields"
+    FILE_ERROR             = "file_error"
+    UNSUPPORTED_FORMAT     = "unsupported_format"
+    TRANSACTION_ACTIVE     = "transaction_active"
+    NO_TRANSACTION         = "no_transaction"
+    NOTHING_TO_UNDO        = "nothing_to_undo"
+    NOTHING_TO_REDO        = "nothing_to_redo"
+    RELOAD_FAILED          = "reload_failed"
+    FILE_BUSY              = "file_busy"
 
 
 # ============================= КЛАСИ ВИКЛЮЧЕНЬ =============================
@@ -62,15 +90,70 @@ class BirthdayException(Exception):
         self.kwargs = kwargs # Зберігаємо kwargs
         super().__init__(message)
 
+class StorageException(Exception):
+    """Базовий клас для винятків сховища (файл контактів недоступний або нечитабельний)."""
+    def __init__(self, error_code: ModelError, message="Помилка сховища", **kwargs):
+        self.error_code = error_code
+        self.kwargs = kwargs
+        super().__init__(message)
+
+
+# ============================= ВАЛІДАЦІЯ =============================
+# Шаблони компілюються один раз при імпорті, а не при кожному створенні поля
+
+NAME_PATTERN  = re.compile(r"[A-Za-zА-Яа-яІіЇїЄєҐґ' -]{1,50}") # Додав пробіл та дефіс
+PHONE_PATTERN = re.compile(r"\d{10}")
+# ';' без лапок в адресі не допускає і RFC 5322, а в CSV він розділяє кілька email однієї клітинки
+EMAIL_PATTERN = re.compile(r"[^@\s;]+@[^@\s;]+\.[a-zA-Z]{2,}")
+
+
+def parse_date(text: str) -> date:
+    """
+    Швидкий розбір дати DD.MM.YYYY (день і місяць можуть бути з однієї цифри, як у strptime).
+    Кидає ValueError, якщо рядок не є коректною датою.
+    """
+    parts = text.split('.')
+    if len(parts) != 3:
+        raise ValueError(f"Невірний формат дати: {text}")
+    day, month, year = parts
+    if not (0 < len(day) <= 2 and 0 < len(month) <= 2 and len(year) == 4
+            and (day + month + year).isascii() and (day + month + year).isdigit()):
+        raise ValueError(f"Невірний формат дати: {text}")
+    return date(int(year), int(month), int(day)) # Сам перевіряє діапазон дня та місяця
+
+
+def format_date(value: date) -> str:
+    """Форматує дату як DD.MM.YYYY (швидше за strftime)."""
+    return f"{value.day:02d}.{value.month:02d}.{value.year:04d}"
+
 
 # ============================= КЛАСИ ДАНИХ =============================
 
 # (Field, Name, Phone, Email - без змін)
 class Field:
     """Базовий клас для полів запису."""
+    # __slots__ замість __dict__: на мільйонах контактів це основна частина пам'яті
+    __slots__ = ('_value',)
+
     def __init__(self, value: str) -> None:
         self._value = value
 
+    def __getstate__(self):
+        return self._value
+
+    def __setstate__(self, state) -> None:
+        # Файли, збережені до переходу на __slots__, містять словник атрибутів
+        if isinstance(state, dict):
+            state = state['_value']
+        self._value = state
+
+    @classmethod
+    def _restore(cls, value):
+        """Створює поле зі збереженого (вже перевіреного) значення без повторної валідації."""
+        field = object.__new__(cls)
+        field._value = value
+        return field
+
     @property
     def value(self) -> str:
         return self._value
@@ -85,8 +168,22 @@ class Field:
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}('{self._value}')"
 
+    @classmethod
+    def validate_many(cls, values: Iterable[str]) -> list[ModelError | None]:
+        """
+        Перевіряє цілий стовпець значень (для масового імпорту) без створення об'єктів і винятків.
+
+        Returns:
+            list[ModelError | None]: Для кожного значення - код помилки або None, якщо воно коректне.
+        """
+        validate, error = cls.validate, cls.ERROR
+        return [None if validate(value) else error for value in values]
+
 class Name(Field):
     """Клас для зберігання та валідації імені контакту."""
+    __slots__ = ()
+    ERROR = ModelError.INVALID_CONTACT_NAME
+
     def __init__(self, value: str) -> None:
         if not self.validate(value):
              # Передаємо name
@@ -96,10 +193,13 @@ class Name(Field):
     @staticmethod
     def validate(name: str) -> bool:
         """Перевіряє коректність імені."""
-        return bool(re.fullmatch(r"[A-Za-zА-Яа-яІіЇїЄєҐґ' -]{1,50}", name)) # Додав пробіл та дефіс
+        return NAME_PATTERN.fullmatch(name) is not None
 
 class Phone(Field):
     """Клас для зберігання та валідації номера телефону."""
+    __slots__ = ()
+    ERROR = ModelError.INVALID_PHONE
+
     def __init__(self, value: str) -> None:
         if not self.validate(value):
              # Передаємо phone
@@ -109,10 +209,13 @@ class Phone(Field):
     @staticmethod
     def validate(phone: str) -> bool:
         """Перевіряє, чи телефон складається рівно з 10 цифр."""
-        return bool(re.fullmatch(r"\d{10}", phone))
+        return PHONE_PATTERN.fullmatch(phone) is not None
 
 class Email(Field):
     """Клас для зберігання та валідації email."""
+    __slots__ = ()
+    ERROR = ModelError.INVALID_EMAIL
+
     def __init__(self, value: str) -> None:
         if not self.validate(value):
              # Передаємо email
@@ -122,32 +225,50 @@ class Email(Field):
     @staticmethod
     def validate(email: str) -> bool:
         """Перевіряє базовий формат email."""
-        return bool(re.fullmatch(r"[^@\s]+@[^@\s]+\.[a-zA-Z]{2,}", email))
+        return EMAIL_PATTERN.fullmatch(email) is not None
 
 # --- Необхідні зміни в Birthday для сумісності з Pickle ---
 class Birthday(Field):
     """Клас для зберігання та валідації дати народження."""
+    __slots__ = ()
+    ERROR = ModelError.INVALID_BIRTHDAY
+
     # Ініціалізатор має приймати або рядок (для створення) або date (при завантаженні pickle)
     def __init__(self, value: str | date) -> None:
-        parsed_date = None
-        error_value = value
+        # Зберігаємо саме об'єкт date
+        super().__init__(self.parse(value)) # Викликаємо __init__ базового класу Field
+
+    @staticmethod
+    def parse(value: str | date, today: date | None = None) -> date:
+        """Перетворює рядок DD.MM.YYYY (або date) на дату. Кидає BirthdayException, якщо дата некоректна або майбутня."""
         if isinstance(value, date): # Якщо pickle завантажив готовий об'єкт date
             parsed_date = value
         elif isinstance(value, str): # Якщо створюємо з рядка
-             error_value = value
              try:
-                 parsed_date = datetime.strptime(value, '%d.%m.%Y').date()
+                 parsed_date = parse_date(value)
              except ValueError:
                  # Передаємо рядок, що спричинив помилку
-                 raise BirthdayException(ModelError.INVALID_BIRTHDAY, birthday=error_value)
+                 raise BirthdayException(ModelError.INVALID_BIRTHDAY, birthday=value)
         else: # Обробка інших непередбачуваних типів
-            raise BirthdayException(ModelError.INVALID_BIRTHDAY, birthday=str(error_value))
+            raise BirthdayException(ModelError.INVALID_BIRTHDAY, birthday=str(value))
 
         # Перевірка на майбутню дату
-        if parsed_date and parsed_date > date.today():
-             raise BirthdayException(ModelError.INVALID_BIRTHDAY, birthday=str(error_value))
-        # Зберігаємо саме об'єкт date
-        super().__init__(parsed_date) # Викликаємо __init__ базового класу Field
+        if parsed_date > (today or date.today()):
+             raise BirthdayException(ModelError.INVALID_BIRTHDAY, birthday=str(value))
+        return parsed_date
+
+    @staticmethod
+    def validate(birthday: str, today: date | None = None) -> bool:
+        """Перевіряє, чи рядок є коректною датою DD.MM.YYYY не з майбутнього."""
+        try:
+            return parse_date(birthday) <= (today or date.today())
+        except ValueError:
+            return False
+
+    @classmethod
+    def validate_many(cls, values: Iterable[str]) -> list[ModelError | None]:
+        today = date.today() # Одна дата на весь стовпець
+        return [None if cls.validate(value, today) else cls.ERROR for value in values]
 
     # Property повертає саме об'єкт date
     @property
@@ -157,100 +278,192 @@ class Birthday(Field):
     # Сетер також має приймати або рядок, або date
     @value.setter
     def value(self, new_value: str | date) -> None:
-        parsed_date = None
-        error_value = new_value
-        if isinstance(new_value, date):
-            parsed_date = new_value
-        elif isinstance(new_value, str):
-             error_value = new_value
-             try:
-                 parsed_date = datetime.strptime(new_value, '%d.%m.%Y').date()
-             except ValueError:
-                 raise BirthdayException(ModelError.INVALID_BIRTHDAY, birthday=error_value)
-        else:
-            raise BirthdayException(ModelError.INVALID_BIRTHDAY, birthday=str(error_value))
-
-        # Перевірка на майбутню дату
-        if parsed_date and parsed_date > date.today():
-            raise BirthdayException(ModelError.INVALID_BIRTHDAY, birthday=str(error_value))
         # Зберігаємо саме об'єкт date
-        self._value = parsed_date
+        self._value = self.parse(new_value)
 
     def __str__(self) -> str:
         """Повертає дату у форматі DD.MM.YYYY або 'Не вказано'."""
         # _value може бути None, якщо поле не встановлено або видалено
-        return self._value.strftime('%d.%m.%Y') if self._value else "Не вказано"
+        return format_date(self._value) if self._value else "Не вказано"
 
 
 # ============================= ЗАПИС КОНТАКТУ =============================
+# Події змін полів (listener(op, name, *args)):
+#   add_phone/add_email       - (значення,)
+#   edit_phone/edit_email     - (індекс, нове значення, старе значення)
+#   remove_phone/remove_email - (індекс або None для видалення за значенням, старе значення)
+
+def _key_at(fields: dict, index: int) -> str:
+    """Ключ на позиції index (без копіювання всіх ключів у список)."""
+    return next(islice(fields, index, None))
+
+
+def _replace_key(fields: dict, old_key: str, field: Field) -> dict:
+    """Новий словник, де old_key замінено на field.value на тій самій позиції."""
+    return {(field.value if key == old_key else key): (field if key == old_key else value)
+            for key, value in fields.items()}
+
 
 class Record:
     """Клас для представлення запису контакту в адресній книзі."""
+    __slots__ = ('name', '_phones', '_emails', 'birthday', '_book', '__weakref__')
+
     def __init__(self, name: str) -> None:
-        """Ініціалізує запис з іменем та порожніми списками полів."""
+        """Ініціалізує запис з іменем та порожніми наборами полів."""
         # Ім'я валідується при створенні об'єкта Name
         self.name: Name = Name(name)
-        # Використовуємо списки для легшого керування індексами
-        self.phones: list[Phone] = []
-        self.emails: list[Email] = []
+        # Впорядковані множини "значення -> поле": перевірка дублікатів, пошук і видалення за значенням - O(1),
+        # а порядок вставки зберігає індекси для команд change/del-phone/del-email
+        # (операції за індексом - O(n) у межах контакту: словник не має доступу за позицією)
+        self._phones: dict[str, Phone] = {}
+        self._emails: dict[str, Email] = {}
         self.birthday: Birthday | None = None
+        # Адресна книга, якій належить запис (встановлюється в AddressBook.add_record)
+        self._book: "AddressBook | None" = None
+
+    def __getstate__(self) -> tuple:
+        """Не серіалізуємо зворотне посилання на книгу (його відновлює AddressBook)."""
+        return self.name, self.phones, self.emails, self.birthday
+
+    def __setstate__(self, state: tuple | dict) -> None:
+        # Файли, збережені до переходу на __slots__, містять словник атрибутів
+        if isinstance(state, dict):
+            state = state['name'], state['phones'], state['emails'], state.get('birthday')
+        self.name, self.phones, self.emails, self.birthday = state
+        self._book = None
+
+    @classmethod
+    def _restore(cls, name: str, phones: Iterable[str], emails: Iterable[str], birthday: int) -> "Record":
+        """Відновлює запис зі стовпців знімка без валідації (birthday - ordinal дати або 0)."""
+        record = object.__new__(cls)
+        record.name = Name._restore(name)
+        record._phones = {phone: Phone._restore(phone) for phone in phones}
+        record._emails = {email: Email._restore(email) for email in emails}
+        record.birthday = Birthday._restore(date.fromordinal(birthday)) if birthday else None
+        record._book = None
+        return record
+
+    @property
+    def phones(self) -> list[Phone]:
+        """Телефони у порядку додавання (індекси відповідають позиціям у списку)."""
+        return list(self._phones.values())
+
+    @phones.setter
+    def phones(self, phones: Iterable[Phone]) -> None:
+        self._phones = {phone.value: phone for phone in phones}
+
+    @property
+    def emails(self) -> list[Email]:
+        """Email у порядку додавання."""
+        return list(self._emails.values())
+
+    @emails.setter
+    def emails(self, emails: Iterable[Email]) -> None:
+        self._emails = {email.value: email for email in emails}
+
+    def _notify(self, op: str, *args) -> None:
+        """Повідомляє книгу-власника про зміну запису (журнал, індекси тощо)."""
+        if self._book is not None:
+            self._book._on_change(op, self.name.value, *args)
 
     # --- Робота з телефонами ---
+    def has_phone(self, phone_str: str) -> bool:
+        return phone_str in self._phones
+
     def add_phone(self, phone_str: str) -> None:
         """Додає телефон до контакту. Кидає PhoneException при помилках."""
-        if any(p.value == phone_str for p in self.phones):
+        if phone_str in self._phones:
             # Передаємо name та phone для форматування
             raise PhoneException(ModelError.DUPLICATE_PHONE, name=self.name.value, phone=phone_str)
         # Валідація відбудеться при створенні Phone
-        self.phones.append(Phone(phone_str))
+        self._phones[phone_str] = Phone(phone_str)
+        self._notify("add_phone", phone_str)
 
     def edit_phone(self, index: int, new_phone_str: str) -> None:
-        """Редагує телефон за індексом. Кидає PhoneException при помилках."""
+        """
+        Редагує телефон за індексом, зберігаючи його позицію (O(n) у межах контакту).
+        Кидає PhoneException при помилках.
+        """
         try:
-            self.phones[index] = Phone(new_phone_str)
+            index = range(len(self._phones))[index] # Нормалізуємо від'ємний індекс
+            new_phone = Phone(new_phone_str)
         except IndexError:
             # Передаємо name та index для форматування
             raise PhoneException(ModelError.PHONE_NOT_FOUND, name=self.name.value, index=index)
         except PhoneException as e: # Якщо Phone() кинув помилку формату
              e.kwargs['name'] = self.name.value # Додамо ім'я до існуючих kwargs
              raise e
+        old_phone_str = _key_at(self._phones, index)
+        if new_phone_str != old_phone_str and new_phone_str in self._phones:
+            raise PhoneException(ModelError.DUPLICATE_PHONE, name=self.name.value, phone=new_phone_str)
+        self._phones = _replace_key(self._phones, old_phone_str, new_phone)
+        self._notify("edit_phone", index, new_phone_str, old_phone_str)
 
     def remove_phone(self, index: int) -> None:
-        """Видаляє телефон за індексом. Кидає PhoneException при помилці."""
+        """Видаляє телефон за індексом (O(n) у межах контакту). Кидає PhoneException при помилці."""
         try:
-            del self.phones[index]
+            index = range(len(self._phones))[index]
         except IndexError:
             # Передаємо name та index
             raise PhoneException(ModelError.PHONE_NOT_FOUND, name=self.name.value, index=index)
+        old_phone = self._phones.pop(_key_at(self._phones, index))
+        self._notify("remove_phone", index, old_phone.value)
+
+    def remove_phone_value(self, phone_str: str) -> None:
+        """Видаляє телефон за значенням за O(1). Кидає PhoneException, якщо такого немає."""
+        if phone_str not in self._phones:
+            raise PhoneException(ModelError.PHONE_NOT_FOUND, name=self.name.value, index=phone_str)
+        del self._phones[phone_str]
+        self._notify("remove_phone", None, phone_str) # Позиція не обчислюється - слухачам досить значення
 
     # --- Робота з email (аналогічно) ---
+    def has_email(self, email_str: str) -> bool:
+        return email_str in self._emails
+
     def add_email(self, email_str: str) -> None:
-        if any(e.value == email_str for e in self.emails):
+        if email_str in self._emails:
             # Передаємо name та email
             raise EmailException(ModelError.DUPLICATE_EMAIL, name=self.name.value, email=email_str)
-        self.emails.append(Email(email_str))
+        self._emails[email_str] = Email(email_str)
+        self._notify("add_email", email_str)
 
     def edit_email(self, index: int, new_email_str: str) -> None:
         try:
-            self.emails[index] = Email(new_email_str)
+            index = range(len(self._emails))[index]
+            new_email = Email(new_email_str)
         except IndexError:
             # Передаємо name та index
             raise EmailException(ModelError.EMAIL_NOT_FOUND, name=self.name.value, index=index)
         except EmailException as e: # Якщо Email() кинув помилку формату
              e.kwargs['name'] = self.name.value # Додамо ім'я
              raise e
+        old_email_str = _key_at(self._emails, index)
+        if new_email_str != old_email_str and new_email_str in self._emails:
+            raise EmailException(ModelError.DUPLICATE_EMAIL, name=self.name.value, email=new_email_str)
+        self._emails = _replace_key(self._emails, old_email_str, new_email)
+        self._notify("edit_email", index, new_email_str, old_email_str)
 
     def remove_email(self, index: int) -> None:
         try:
-            del self.emails[index]
+            index = range(len(self._emails))[index]
         except IndexError:
             # Передаємо name та index
             raise EmailException(ModelError.EMAIL_NOT_FOUND, name=self.name.value, index=index)
+        old_email = self._emails.pop(_key_at(self._emails, index))
+        self._notify("remove_email", index, old_email.value)
+
+    def remove_email_value(self, email_str: str) -> None:
+        """Видаляє email за значенням за O(1). Кидає EmailException, якщо такого немає."""
+        if email_str not in self._emails:
+            raise EmailException(ModelError.EMAIL_NOT_FOUND, name=self.name.value, index=email_str)
+        del self._emails[email_str]
+        self._notify("remove_email", None, email_str)
 
     # --- Робота з днем народження  ---
     # Дозволяємо передавати str або date для гнучкості
     def add_birthday(self, birthday_input: str | date) -> None:
         """Додає або оновлює день народження."""
+        old_date = self.birthday.value if self.birthday else None
         try:
             if self.birthday:
                 # Якщо день народження вже існує, оновлюємо через сетер
@@ -266,11 +479,14 @@ class Record:
              if isinstance(birthday_input, str) and 'birthday' not in e.kwargs:
                 e.kwargs['birthday'] = birthday_input
              raise e # Перекидаємо виняток з доповненими kwargs
+        self._notify("set_birthday", self.birthday.value, old_date)
 
     def remove_birthday(self) -> None:
          if self.birthday is None:
              raise BirthdayException(ModelError.BIRTHDAY_NOT_SET, name=self.name.value)
+         old_date = self.birthday.value
          self.birthday = None
+         self._notify("remove_birthday", old_date)
 
     def __str__(self) -> str:
         """Повертає рядкове представлення запису."""
@@ -284,16 +500,708 @@ class Record:
                 f"  День народження: {birthday_str}")
 
 
+# ============================= КАЛЕНДАР ДНІВ НАРОДЖЕННЯ =============================
+
+class LeapDayPolicy(Enum):
+    """Коли вітати народжених 29 лютого у невисокосний рік."""
+    FEB_28 = "feb28"
+    MAR_1  = "mar1"
+
+# Політика за замовчуванням (можна змінити при старті: main.py --leap-day)
+LEAP_DAY_POLICY = LeapDayPolicy.FEB_28
+
+
+def _build_calendar(leap_year: bool, policy: LeapDayPolicy) -> tuple[tuple[tuple[int, int], ...], ...]:
+    """
+    Таблиця року: номер дня року (з 0) -> ключі (місяць, день), які святкуються цього дня.
+    У невисокосний рік ключ (2, 29) додається до 28 лютого або 1 березня згідно з політикою.
+    """
+    first = date(2000 if leap_year else 2001, 1, 1).toordinal()
+    calendar = []
+    for offset in range(366 if leap_year else 365):
+        day = date.fromordinal(first + offset)
+        keys = ((day.month, day.day),)
+        if not leap_year:
+            if policy == LeapDayPolicy.FEB_28 and keys[0] == (2, 28):
+                keys = ((2, 28), (2, 29))
+            elif policy == LeapDayPolicy.MAR_1 and keys[0] == (3, 1):
+                keys = ((2, 29), (3, 1))
+        calendar.append(keys)
+    return tuple(calendar)
+
+# Таблиці будуються один раз: (високосний рік, політика) -> календар
+_CALENDARS = {(leap, policy): _build_calendar(leap, policy) for leap in (False, True) for policy in LeapDayPolicy}
+
+
+def _is_leap(year: int) -> bool:
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+def calendar_window(today: date, days: int, policy: LeapDayPolicy | None = None) -> Iterator[tuple[int, tuple]]:
+    """
+    Проходить дні [today, today + days) цілочисельною арифметикою по номеру дня року
+    і повертає (ordinal дня, ключі (місяць, день), що святкуються цього дня).
+    Кожен ключ з'являється не більше одного разу - лише найближче святкування.
+    """
+    policy = policy or LEAP_DAY_POLICY
+    ordinal = today.toordinal()
+    year = today.year
+    day_of_year = ordinal - date(year, 1, 1).toordinal()
+    calendar = _CALENDARS[_is_leap(year), policy]
+    first_keys = calendar[day_of_year]
+    for offset in range(min(days, 366)):
+        if day_of_year == len(calendar): # Перехід на наступний рік
+            year += 1
+            day_of_year = 0
+            calendar = _CALENDARS[_is_leap(year), policy]
+        keys = calendar[day_of_year]
+        if offset >= 365:
+            # Через рік знову ті самі ключі - вони вже враховані на початку вікна
+            keys = tuple(key for key in keys if key not in first_keys)
+        yield ordinal + offset, keys
+        day_of_year += 1
+
+
+# ============================= ІНДЕКСИ =============================
+
+class BirthdayIndex:
+    """
+    Календарний індекс днів народження: (місяць, день) -> {ім'я: дата народження}.
+    Запит вікна переглядає лише дні цього вікна, а не всі записи книги.
+    """
+    def __init__(self) -> None:
+        self._days: dict[tuple[int, int], dict[str, date]] = {}
+
+    def add(self, name: str, birthday: date) -> None:
+        self._days.setdefault((birthday.month, birthday.day), {})[name] = birthday
+
+    def discard(self, name: str, birthday: date) -> None:
+        key = (birthday.month, birthday.day)
+        bucket = self._days.get(key)
+        if bucket is not None:
+            bucket.pop(name, None)
+            if not bucket:
+                del self._days[key]
+
+    def clear(self) -> None:
+        self._days.clear()
+
+    def upcoming(self, today: date, days: int, policy: LeapDayPolicy | None = None) -> Iterator[tuple[date, str, date]]:
+        """
+        Повертає (дата привітання за календарем, ім'я, дата народження) для днів [today, today + days)
+        у порядку дат. Об'єкт date створюється лише для днів, на які хтось народився.
+        """
+        days_map = self._days
+        for ordinal, keys in calendar_window(today, days, policy):
+            for key in keys:
+                bucket = days_map.get(key)
+                if bucket:
+                    day = date.fromordinal(ordinal)
+                    for name in sorted(bucket): # В межах дня - за іменем
+                        yield day, name, bucket[name]
+
+
+PHONE_GRAM_SIZE = 3 # Довжина цифрових n-грам індексу телефонів (коротші запити - перебором)
+
+class SubstringIndex:
+    """
+    N-грамний індекс підрядків значень (для телефонів - цифрові триграми).
+    Запит довжиною від n символів перетинає списки своїх n-грам і перевіряє лише кандидатів;
+    коротші запити переглядають усі значення індексу.
+    Будується ліниво при першому запиті, далі підтримується інкрементно.
+    """
+    def __init__(self, n: int = 3) -> None:
+        self.n = n
+        self.built = False
+        self._ids: dict[str, int] = {}
+        self._values: list[str | None] = [] # id -> значення (None - видалене)
+        self._grams: dict[str, array] = {}  # n-грама -> id значень
+        self._dead = 0
+
+    def reset(self) -> None:
+        """Скидає індекс; він знову збудується при наступному запиті."""
+        self.__init__(self.n)
+
+    def build(self, values: Iterable[str]) -> None:
+        self.reset()
+        self.built = True
+        for value in values:
+            self._insert(value)
+
+    def add(self, value: str) -> None:
+        if self.built and value not in self._ids:
+            self._insert(value)
+
+    def discard(self, value: str) -> None:
+        if self.built and value in self._ids:
+            self._values[self._ids.pop(value)] = None
+            self._dead += 1
+            if self._dead > len(self._ids): # Видалених більше, ніж живих - перебудовуємо
+                self.build(list(self._ids))
+
+    def _insert(self, value: str) -> None:
+        value_id = len(self._values)
+        self._ids[value] = value_id
+        self._values.append(value)
+        n = self.n
+        for gram in {value[i:i + n] for i in range(len(value) - n + 1)}:
+            postings = self._grams.get(gram)
+            if postings is None:
+                self._grams[gram] = array('I', (value_id,))
+            else:
+                postings.append(value_id)
+
+    def search(self, part: str) -> list[str]:
+        """Відсортовані значення, що містять part."""
+        n = self.n
+        if len(part) < n:
+            return sorted(value for value in self._ids if part in value)
+        postings = []
+        for gram in {part[i:i + n] for i in range(len(part) - n + 1)}:
+            if gram not in self._grams:
+                return []
+            postings.append(self._grams[gram])
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for other in postings[1:]:
+            candidates.intersection_update(other)
+        values = self._values
+        return sorted(values[i] for i in candidates if values[i] is not None and part in values[i])
+
+
+class ValueIndex:
+    """
+    Зворотний хеш-індекс значення поля (телефону чи email) -> імена власників.
+    Необов'язковий SubstringIndex отримує значення, коли з'являється перший власник, і втрачає - з останнім.
+    """
+    def __init__(self, substrings: SubstringIndex | None = None) -> None:
+        # значення -> ім'я єдиного власника (найчастіший випадок) або впорядкована множина імен
+        self._owners: dict[str, str | dict[str, None]] = {}
+        self.substrings = substrings
+
+    def add(self, value: str, name: str) -> None:
+        owners = self._owners.get(value)
+        if owners is None:
+            self._owners[value] = name
+            if self.substrings is not None:
+                self.substrings.add(value)
+        elif isinstance(owners, str):
+            if owners != name:
+                self._owners[value] = {owners: None, name: None}
+        else:
+            owners[name] = None
+
+    def discard(self, value: str, name: str) -> None:
+        owners = self._owners.get(value)
+        if owners == name:
+            del self._owners[value]
+            if self.substrings is not None:
+                self.substrings.discard(value)
+        elif isinstance(owners, dict) and name in owners:
+            del owners[name]
+            if len(owners) == 1:
+                self._owners[value] = next(iter(owners))
+
+    def owners(self, value: str) -> list[str]:
+        """Імена контактів, що мають це значення (у порядку появи)."""
+        owners = self._owners.get(value)
+        if owners is None:
+            return []
+        return [owners] if isinstance(owners, str) else list(owners)
+
+    def containing(self, part: str) -> list[str]:
+        """Усі значення, що містять part (через SubstringIndex, якщо він є)."""
+        if self.substrings is None:
+            return sorted(value for value in self._owners if part in value)
+        if not self.substrings.built:
+            self.substrings.build(self._owners)
+        return self.substrings.search(part)
+
+    def clear(self) -> None:
+        self._owners.clear()
+        if self.substrings is not None:
+            self.substrings.reset()
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, ValueIndex) and self._owners == other._owners
+
+
+# Варіанти апострофа, які люди вводять замість ' з дозволеного алфавіту імен
+APOSTROPHES = str.maketrans({"’": "'", "ʼ": "'", "‘": "'", "`": "'"})
+SEARCH_LIMIT = 10            # Скільки результатів повертає пошук за замовчуванням
+SEARCH_MIN_SIMILARITY = 0.4  # Мінімальна схожість слів за триграмами для нечіткого збігу
+SEARCH_WORD_CANDIDATES = 50  # Скільки слів словника розглядати на одне слово запиту
+SEARCH_SCORE_LIMIT = 2000    # Більше кандидатів спершу звужується перетином за іншими словами запиту
+SEARCH_INSORT_LIMIT = 64     # До скількох нових слів вставляти у відсортований словник поштучно
+
+# Оцінка збігу слова запиту зі словом імені
+EXACT_SCORE  = 1.0
+PREFIX_SCORE = 0.9
+FUZZY_WEIGHT = 0.8 # множиться на схожість за триграмами
+
+
+def normalize_name(text: str) -> str:
+    """Ключ пошуку: без регістру (коректно і для кирилиці), з єдиним апострофом і пробілами."""
+    return " ".join(text.translate(APOSTROPHES).casefold().split())
+
+
+def _trigrams(word: str) -> set[str]:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """
+    Пошуковий індекс імен на рівні слів: слово -> id імен, відсортований словник слів (префікси)
+    та триграми слів словника (пошук з одруківками). Слів значно менше, ніж імен,
+    тож збіги шукаються у словнику, а імена дістаються з їхніх списків.
+    Будується ліниво при першому пошуку, далі підтримується інкрементно.
+    """
+    def __init__(self) -> None:
+        self.built = False
+        self._ids: dict[str, int] = {}
+        self._names: list[str | None] = []      # id -> ім'я (None - видалене)
+        self._postings: dict[str, array] = {}   # слово -> id імен, що його містять
+        self._vocabulary: list[str] = []        # відсортовані слова
+        self._new_words: list[str] = []         # ще не вставлені у _vocabulary
+        self._grams: dict[str, list[str]] = {}  # триграма -> слова словника
+        self._dead = 0
+
+    def reset(self) -> None:
+        """Скидає індекс; він знову збудується при наступному пошуку."""
+        self.__init__()
+
+    def build(self, names: Iterable[str]) -> None:
+        self.reset()
+        self.built = True
+        for name in names:
+            self._insert(name)
+        self._vocabulary, self._new_words = sorted(self._new_words), []
+
+    def add(self, name: str) -> None:
+        if self.built:
+            self._insert(name)
+
+    def discard(self, name: str) -> None:
+        if self.built and name in self._ids:
+            self._names[self._ids.pop(name)] = None
+            self._dead += 1
+
+    def _insert(self, name: str) -> None:
+        name_id = len(self._names)
+        self._ids[name] = name_id
+        self._names.append(name)
+        # Повтор слова в імені дасть повтор id у списку - пошук їх все одно об'єднує
+        for word in name.translate(APOSTROPHES).casefold().split():
+            postings = self._postings.get(word)
+            if postings is not None:
+                postings.append(name_id)
+                continue
+            self._postings[word] = array('I', (name_id,))
+            self._new_words.append(word)
+            for gram in _trigrams(word):
+                self._grams.setdefault(gram, []).append(word)
+
+    def _refresh(self) -> None:
+        """Вставляє нові слова у словник перед пошуком; прибирає видалені імена, коли їх забагато."""
+        if self._dead > len(self._ids):
+            self.build(list(self._ids))
+        elif len(self._new_words) <= SEARCH_INSORT_LIMIT:
+            for word in self._new_words:
+                insort(self._vocabulary, word)
+            self._new_words.clear()
+        else:
+            self._vocabulary += self._new_words
+            self._vocabulary.sort() # Timsort зливає дві відсортовані частини за лінійний час
+            self._new_words.clear()
+
+    def _word_matches(self, query_word: str) -> dict[str, float]:
+        """Слова словника, що збігаються зі словом запиту: точно, за префіксом або з одруківкою."""
+        matches = {}
+        vocabulary = self._vocabulary
+        i = bisect_left(vocabulary, query_word)
+        while i < len(vocabulary) and len(matches) < SEARCH_WORD_CANDIDATES and vocabulary[i].startswith(query_word):
+            matches[vocabulary[i]] = EXACT_SCORE if vocabulary[i] == query_word else PREFIX_SCORE
+            i += 1
+        if len(matches) >= SEARCH_WORD_CANDIDATES: # Збігів за префіксом достатньо
+            return matches
+        grams = _trigrams(query_word)
+        counts = Counter()
+        for gram in grams:
+            counts.update(self._grams.get(gram, ()))
+        # len(word) + 1 - кількість триграм слова з доповненням (без урахування повторів)
+        similar = ((2 * common / (len(grams) + len(word) + 1), word) for word, common in counts.items())
+        for similarity, word in heapq.nlargest(SEARCH_WORD_CANDIDATES, similar):
+            if similarity < SEARCH_MIN_SIMILARITY:
+                break
+            matches.setdefault(word, FUZZY_WEIGHT * similarity)
+        return matches
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> list[str]:
+        """
+        Повертає до limit імен, впорядкованих за середньою оцінкою слів запиту:
+        точний збіг слова > збіг за початком слова > схоже слово (одруківка).
+        Імена, що містять усі слова запиту, йдуть перед частковими збігами.
+        """
+        query_words = normalize_name(query).split()
+        if not query_words:
+            return []
+        self._refresh()
+        names, postings = self._names, self._postings
+        word_matches = [self._word_matches(word) for word in query_words]
+        if len(word_matches) == 1:
+            # Одне слово: оцінка імені - оцінка слова, тож імена беремо зі списків найкращих слів
+            found: dict[str, None] = {}
+            for word, _ in sorted(word_matches[0].items(), key=lambda item: -item[1]):
+                for name_id in postings[word]:
+                    if names[name_id] is not None:
+                        found[names[name_id]] = None
+                        if len(found) >= limit:
+                            return list(found)
+            return list(found)
+        # Кілька слів: кандидати беремо зі списків найрідшого слова запиту (лише якщо їх замало -
+        # і наступних), оцінка імені - сума найкращих оцінок кожного слова запиту
+        ordered = sorted(word_matches, key=lambda matches: sum(len(postings[word]) for word in matches))
+        candidates: set[int] = set()
+        for matches in ordered:
+            for word in matches:
+                candidates.update(postings[word])
+            if len(candidates) >= limit:
+                break
+        # Забагато кандидатів для оцінки - лишаємо ті, що містять і інші слова запиту (перетин множин)
+        for matches in ordered[1:]:
+            if len(candidates) <= SEARCH_SCORE_LIMIT:
+                break
+            narrowed: set[int] = set()
+            for word in matches:
+                narrowed.update(candidates.intersection(postings[word]))
+            if len(narrowed) < limit:
+                break
+            candidates = narrowed
+        if len(candidates) <= SEARCH_SCORE_LIMIT:
+            # Небагато кандидатів - дешевше оцінити кожного за словами його імені
+            def total(name_id: int) -> tuple[float, int]:
+                words = names[name_id].translate(APOSTROPHES).casefold().split()
+                return sum(max(matches.get(word, 0.0) for word in words) for matches in word_matches), -name_id
+            ranked = heapq.nlargest(limit, (i for i in candidates if names[i] is not None), key=total)
+            return [names[name_id] for name_id in ranked]
+        scores = []
+        for matches in word_matches:
+            best: dict[int, float] = {}
+            for word, word_score in sorted(matches.items(), key=lambda item: item[1]):
+                best.update(dict.fromkeys(candidates.intersection(postings[word]), word_score)) # Вищі перезаписують
+            scores.append(best)
+        total = lambda name_id: (sum(best.get(name_id, 0.0) for best in scores), -name_id)
+        ranked = heapq.nlargest(limit, (i for i in candidates if names[i] is not None), key=total)
+        return [names[name_id] for name_id in ranked]
+
+
+def _name_order_key(name: str, birthday: date | None) -> tuple:
+    return name.casefold(), name
+
+
+def _birthday_order_key(name: str, birthday: date | None) -> tuple:
+    """За календарем (місяць, день), контакти без дати - наприкінці."""
+    day = (birthday.month, birthday.day) if birthday else (13, 0)
+    return day, name.casefold(), name
+
+
+class SortedOrder:
+    """
+    Відсортований список ключів контактів для посторінкового виводу.
+    Будується ліниво при першому запиті сторінки, далі підтримується інкрементно:
+    нові ключі накопичуються і зливаються разом (масовий імпорт не сортує список щоразу).
+    """
+    def __init__(self, key: Callable[[str, date | None], tuple]) -> None:
+        self.key = key
+        self.built = False
+        self._items: list[tuple] = []
+        self._pending: list[tuple] = []
+
+    def reset(self) -> None:
+        self.built = False
+        self._items, self._pending = [], []
+
+    def build(self, entries: Iterable[tuple[str, date | None]]) -> None:
+        key = self.key
+        self._items = sorted(key(name, birthday) for name, birthday in entries)
+        self._pending = []
+        self.built = True
+
+    def add(self, name: str, birthday: date | None) -> None:
+        if self.built:
+            self._pending.append(self.key(name, birthday))
+
+    def discard(self, name: str, birthday: date | None) -> None:
+        if not self.built:
+            return
+        self._refresh()
+        entry = self.key(name, birthday)
+        i = bisect_left(self._items, entry)
+        if i < len(self._items) and self._items[i] == entry:
+            del self._items[i]
+
+    def _refresh(self) -> None:
+        if len(self._pending) <= SEARCH_INSORT_LIMIT:
+            for entry in self._pending:
+                insort(self._items, entry)
+        else:
+            self._items += self._pending
+            self._items.sort() # Timsort зливає дві відсортовані частини за лінійний час
+        self._pending.clear()
+
+    def names(self, start: int, stop: int) -> list[str]:
+        """Імена з позицій [start, stop) у порядку сортування."""
+        self._refresh()
+        return [entry[-1] for entry in self._items[start:stop]]
+
+
 # ============================= АДРЕСНА КНИГА =============================
 
+PAGE_SIZE = 20 # Контактів на сторінці команди 'all' за замовчуванням
+PAGE_ORDERS = ("name", "birthday")
+
+# Слухач змін книги: listener(op, name, *args)
+ChangeListener = Callable[..., None]
+
 class AddressBook(UserDict):
     """Клас для представлення адресної книги."""
 
+    # Атрибути, що не зберігаються у файл (відновлюються після завантаження)
+    _TRANSIENT = ('_listeners', '_birthdays', '_owners', '_names', '_orders', '_undo', '_lazy')
+
+    def __init__(self, *args, **kwargs) -> None:
+        self._listeners: list[ChangeListener] = []
+        # Ліниві індекси (пошук, сортування, цифри телефонів) добудовуються під час читання:
+        # паралельні читачі роблять це по черзі
+        self._lazy = threading.Lock()
+        self._birthdays = BirthdayIndex()
+        # Зворотні індекси полів: 'phone'/'email' -> ValueIndex
+        self._owners = self._new_owner_indexes()
+        self._names = NameIndex()
+        self._orders = self._new_orders()
+        # Журнал відкату відкритої транзакції: [(op, name, args), ...] або None поза транзакцією
+        self._undo: list[tuple[str, str, tuple]] | None = None
+        # Номер останнього застосованого запису журналу (зберігається у знімку)
+        self.journal_seq: int = 0
+        super().__init__(*args, **kwargs)
+
+    # --- Серіалізація: слухачі та індекси не зберігаються, записи знову прив'язуються до книги ---
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        for attribute in self._TRANSIENT:
+            state.pop(attribute, None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._listeners = []
+        self._lazy = threading.Lock()
+        self._birthdays = BirthdayIndex()
+        self._owners = self._new_owner_indexes()
+        self._names = NameIndex()
+        self._orders = self._new_orders()
+        self._undo = None
+        self.__dict__.setdefault('journal_seq', 0) # Файли, збережені до появи журналу
+        for record in self.data.values():
+            record._book = self
+        self.rebuild_indexes()
+
+    # --- Індекси ---
+    @staticmethod
+    def _new_owner_indexes() -> dict[str, ValueIndex]:
+        """Зворотні індекси полів: 'phone'/'email' -> ValueIndex (телефони - ще й за цифрами)."""
+        return {"phone": ValueIndex(SubstringIndex(PHONE_GRAM_SIZE)), "email": ValueIndex()}
+
+    @staticmethod
+    def _new_orders() -> dict[str, SortedOrder]:
+        """Порядки сортування для посторінкового виводу: назва -> SortedOrder."""
+        return {"name": SortedOrder(_name_order_key), "birthday": SortedOrder(_birthday_order_key)}
+
+    def rebuild_indexes(self) -> None:
+        """Повністю перебудовує індекси з записів книги."""
+        self._birthdays.clear()
+        self._names.reset()
+        for order in self._orders.values():
+            order.reset()
+        for index in self._owners.values():
+            index.clear()
+        for name, record in self.data.items():
+            self._index_record(name, record, added=True)
+
+    def _replace_contents(self, other: "AddressBook") -> None:
+        """Переймає записи іншої книги (перечитаної з файлу), лишаючи слухачів; індекси будуються заново."""
+        self.data = other.data
+        self.journal_seq = other.journal_seq
+        for record in self.data.values():
+            record._book = self
+        self.rebuild_indexes()
+
+    @contextmanager
+    def _muted(self):
+        """Зміни всередині блоку оновлюють індекси, але не доходять до слухачів (журнал, історія)."""
+        listeners, self._listeners = self._listeners, []
+        try:
+            yield
+        finally:
+            self._listeners = listeners
+
+    def check_indexes(self, repair: bool = True) -> list[str]:
+        """
+        Порівнює індекси з побудованими заново із записів книги.
+
+        Returns:
+            list[str]: Назви неузгоджених індексів ('phone', 'email'); при repair=True вони перебудовуються.
+        """
+        expected = {field: ValueIndex() for field in self._owners}
+        for name, record in self.data.items():
+            for phone in record.phones:
+                expected["phone"].add(phone.value, name)
+            for email in record.emails:
+                expected["email"].add(email.value, name)
+        broken = [field for field, index in expected.items() if self._owners[field] != index]
+        if broken and repair:
+            self.rebuild_indexes()
+        return broken
+
+    def _index_record(self, name: str, record: "Record", added: bool) -> None:
+        """Додає (added=True) або прибирає всі поля запису з індексів."""
+        phones, emails = self._owners["phone"], self._owners["email"]
+        for phone in record.phones:
+            (phones.add if added else phones.discard)(phone.value, name)
+        for email in record.emails:
+            (emails.add if added else emails.discard)(email.value, name)
+        if record.birthday:
+            (self._birthdays.add if added else self._birthdays.discard)(name, record.birthday.value)
+
+    def _index_lookups(self, op: str, name: str, *args) -> None:
+        """Оновлює ліниві індекси пошуку та порядки сортування (спільні для всіх реалізацій книги)."""
+        if op == "add_record" or op == "delete":
+            record: Record = args[0]
+            birthday = record.birthday.value if record.birthday else None
+            if op == "add_record":
+                self._names.add(name)
+                for order in self._orders.values():
+                    order.add(name, birthday)
+            else:
+                self._names.discard(name)
+                for order in self._orders.values():
+                    order.discard(name, birthday)
+        elif op == "set_birthday" or op == "remove_birthday":
+            new_date, old_date = args if op == "set_birthday" else (None, args[0])
+            self._orders["birthday"].discard(name, old_date)
+            self._orders["birthday"].add(name, new_date)
+
+    def _index_change(self, op: str, name: str, *args) -> None:
+        """Оновлює індекси відповідно до події зміни."""
+        self._index_lookups(op, name, *args)
+        action, _, field = op.partition("_")
+        if op == "add_record":
+            self._index_record(name, args[0], added=True)
+        elif op == "delete":
+            self._index_record(name, args[0], added=False)
+        elif field in self._owners:
+            owners = self._owners[field]
+            if action == "add":
+                owners.add(args[0], name)
+            elif action == "edit":
+                _, new_value, old_value = args
+                owners.discard(old_value, name)
+                owners.add(new_value, name)
+            elif action == "remove":
+                owners.discard(args[1], name)
+        elif op == "set_birthday":
+            new_date, old_date = args
+            if old_date is not None:
+                self._birthdays.discard(name, old_date)
+            self._birthdays.add(name, new_date)
+        elif op == "remove_birthday":
+            self._birthdays.discard(name, args[0])
+
+    # --- Сповіщення про зміни ---
+    def subscribe(self, listener: ChangeListener) -> None:
+        """Підписує слухача на всі зміни книги та її записів."""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: ChangeListener) -> None:
+        self._listeners.remove(listener)
+
+    def _on_change(self, op: str, name: str, *args) -> None:
+        """Оновлює індекси та розсилає подію зміни всім слухачам."""
+        self._index_change(op, name, *args)
+        for listener in self._listeners:
+            listener(op, name, *args)
+
+    # --- Транзакції ---
+    # Поки транзакція відкрита, кожна подія зміни дописується у журнал відкату (без копіювання записів),
+    # а відкат застосовує зворотні операції у зворотному порядку через звичайні методи моделі -
+    # тож індекси, журнал сховища та SQLite бачать його як звичайні зміни.
+    @property
+    def in_transaction(self) -> bool:
+        return self._undo is not None
+
+    def begin(self) -> None:
+        """Відкриває транзакцію. Кидає CommandException, якщо вона вже відкрита."""
+        if self._undo is not None:
+            raise CommandException(ModelError.TRANSACTION_ACTIVE)
+        self._undo = []
+        self.subscribe(self._record_undo)
+
+    def _record_undo(self, op: str, name: str, *args) -> None:
+        """Слухач змін книги: запам'ятовує подію для відкату."""
+        self._undo.append((op, name, args))
+
+    def _end_transaction(self) -> list[tuple[str, str, tuple]]:
+        if self._undo is None:
+            raise CommandException(ModelError.NO_TRANSACTION)
+        undo, self._undo = self._undo, None
+        self.unsubscribe(self._record_undo)
+        return undo
+
+    def commit(self) -> int:
+        """
+        Закриває транзакцію, залишаючи зміни (зберегти їх - справа сховища).
+
+        Returns:
+            int: Кількість змін у транзакції.
+        """
+        return len(self._end_transaction())
+
+    def rollback(self) -> int:
+        """
+        Скасовує всі зміни відкритої транзакції.
+
+        Returns:
+            int: Кількість скасованих змін.
+        """
+        undo = self._end_transaction()
+        for op, name, args in reversed(undo):
+            _revert_change(self, op, name, args)
+        return len(undo)
+
     def add_record(self, record: Record) -> None:
         if record.name.value in self.data:
             # Передаємо name
             raise ContactException(ModelError.CONTACT_EXISTS, name=record.name.value)
         self.data[record.name.value] = record
+        record._book = self
+        self._on_change("add_record", record.name.value, record)
+
+    # --- Доступ як до dict: book[name] = record, del book[name] (а з ними update, pop, clear, setdefault
+    # з MutableMapping) ідуть через add_record/delete - з індексами, слухачами, історією і транзакціями ---
+    def __setitem__(self, name: str, record: Record) -> None:
+        if name != record.name.value:
+            raise ValueError(f"Ключ '{name}' не збігається з ім'ям контакту '{record.name.value}'")
+        if self.data.get(name) is record:
+            return
+        if name in self.data: # Заміна запису - як у dict
+            self.delete(name)
+        self.add_record(record)
+
+    def __delitem__(self, name: str) -> None:
+        if name not in self.data:
+            raise KeyError(name) # Як у dict: pop(name, default) та popitem покладаються на KeyError
+        self.delete(name)
 
     def find(self, name: str) -> Record:
         record = self.data.get(name)
@@ -302,94 +1210,1195 @@ class AddressBook(UserDict):
             raise ContactException(ModelError.CONTACT_NOT_FOUND, name=name)
         return record
 
+    def _order_entries(self) -> Iterable[tuple[str, date | None]]:
+        """(ім'я, дата народження) усіх контактів - для побудови порядків сортування."""
+        return ((name, record.birthday.value if record.birthday else None) for name, record in self.data.items())
+
+    def page(self, number: int, size: int = PAGE_SIZE, order: str = "name") -> list[Record]:
+        """
+        Повертає записи сторінки number (з 1) розміром size у порядку order (один з PAGE_ORDERS).
+        Порядок береться з готового відсортованого списку; з книги дістаються лише записи цієї сторінки.
+        """
+        sorted_order = self._orders[order]
+        start = (number - 1) * size
+        with self._lazy:
+            if not sorted_order.built:
+                sorted_order.build(self._order_entries())
+            names = sorted_order.names(start, start + size)
+        return [self.data[name] for name in names]
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> list[Record]:
+        """
+        Шукає контакти за початком імені (або будь-якого слова в ньому) і нечітко - з одруківками.
+        Регістр та різновиди апострофа не враховуються. Результати впорядковані за релевантністю.
+        """
+        with self._lazy:
+            if not self._names.built:
+                self._names.build(self.data.keys())
+            names = self._names.search(query, limit)
+        return [self.data[name] for name in names]
+
+    def find_by_phone(self, phone: str) -> list[Record]:
+        """Контакти з цим телефоном (пошук за зворотним індексом, без перебору книги)."""
+        return [self.data[name] for name in self._owners["phone"].owners(phone)]
+
+    def search_phones(self, digits: str) -> dict[str, list[Record]]:
+        """Телефони, що містять задані цифри (за n-грамним індексом), з їхніми власниками."""
+        owners = self._owners["phone"]
+        with self._lazy:
+            phones = owners.containing(digits)
+        return {phone: [self.data[name] for name in owners.owners(phone)] for phone in phones}
+
+    def find_by_email(self, email: str) -> list[Record]:
+        """Контакти з цим email (пошук за зворотним індексом, без перебору книги)."""
+        return [self.data[name] for name in self._owners["email"].owners(email)]
+
     def delete(self, name: str) -> None:
         if name not in self.data:
             # Передаємо name
             raise ContactException(ModelError.CONTACT_NOT_FOUND, name=name)
-        del self.data[name]
+        record = self.data.pop(name)
+        record._book = None
+        self._on_change("delete", name, record)
 
-    def get_upcoming_birthdays(self, days: int = 7) -> list[dict[str, str]]:
+    def get_upcoming_birthdays(self, days: int = 7, leap_day: LeapDayPolicy | None = None) -> list[dict[str, str]]:
         """
         Повертає список користувачів, яких потрібно привітати на наступному тижні.
+        Використовує календарний індекс: переглядаються лише дні вікна, результат вже впорядкований.
 
         Args:
             days (int): Кількість днів наперед для перевірки (за замовчуванням 7).
+            leap_day (LeapDayPolicy): Коли вітати народжених 29 лютого у невисокосний рік
+                                      (за замовчуванням LEAP_DAY_POLICY).
 
         Returns:
             list[dict[str, str]]: Список словників з ім'ям та датою привітання.
                                    Приклад: [{'name': 'Ім'я', 'congratulation_date': 'DD.MM.YYYY'}]
         """
-        upcoming_birthdays = []
-        today = date.today()
-        for record in self.data.values():
-            # Перевіряємо наявність birthday та його значення (value повертає date)
-            if record.birthday and record.birthday.value:
-                bday: date = record.birthday.value
-                # Переносимо дату народження на поточний рік
-                birthday_this_year = bday.replace(year=today.year)
-
-                # Якщо день народження вже минув цього року, розглядаємо наступний рік
-                if birthday_this_year < today:
-                    birthday_this_year = bday.replace(year=today.year + 1)
-
-                # Порівнюємо з сьогоднішньою датою та інтервалом 'days'
-                days_to_birthday = (birthday_this_year - today).days
-                if 0 <= days_to_birthday < days:
-                    # Визначаємо день тижня
-                    weekday = birthday_this_year.weekday() # Пн=0..Нд=6
-
-                    # Визначаємо дату привітання (переносимо з вихідних на Пн)
-                    congratulation_date = birthday_this_year
-                    if weekday >= 5: # Сб або Нд
-                        days_to_monday = 7 - weekday
-                        congratulation_date += timedelta(days=days_to_monday)
-                    upcoming_birthdays.append({
-                        "name": record.name.value,
-                        "congratulation_date": congratulation_date.strftime('%d.%m.%Y'),
-                        "birthday_date": bday.strftime('%d.%m.%Y'), # Додамо реальну дату для інформації
-                        "original_weekday": birthday_this_year.weekday() # Для можливого відображення дня тижня
-                    })
-        # Сортуємо за датою привітання
-        upcoming_birthdays.sort(key=lambda x: datetime.strptime(x['congratulation_date'], '%d.%m.%Y').date())
-        return upcoming_birthdays
-
-
-# ============================= СЕРІАЛІЗАЦІЯ (з використанням Pickle) =============================
-
-# Змінено ім'я файлу за замовчуванням на відповідне для pickle
+        return [self._greeting(name, bday, day)
+                for day, name, bday in self._birthdays.upcoming(date.today(), days, leap_day)]
+
+    @staticmethod
+    def _greeting(name: str, bday: date, birthday_this_year: date) -> dict:
+        """Формує запис привітання для дня народження, що припадає на birthday_this_year."""
+        # Визначаємо день тижня
+        weekday = birthday_this_year.weekday() # Пн=0..Нд=6
+
+        # Визначаємо дату привітання (переносимо з вихідних на Пн)
+        # Перенесення лише на майбутній понеділок, тому порядок дат привітання зберігається
+        congratulation_date = birthday_this_year
+        if weekday >= 5: # Сб або Нд
+            days_to_monday = 7 - weekday
+            congratulation_date += timedelta(days=days_to_monday)
+        return {
+            "name": name,
+            "congratulation_date": format_date(congratulation_date),
+            "congratulation_day": congratulation_date, # Та сама дата об'єктом - для виводу без розбору рядка
+            "birthday_date": format_date(bday), # Додамо реальну дату для інформації
+            "original_weekday": weekday # Для можливого відображення дня тижня
+        }
+
+
+# ============================= БЛОКУВАННЯ ФАЙЛІВ =============================
+# Кілька процесів (main.py, сервер) можуть працювати з тим самим файлом контактів.
+# Рекомендаційне блокування окремого файлу filename.lock: спільне - для читання, виключне - для запису.
+
+LOCK_SUFFIX = ".lock"
+# Скільки чекати на блокування, яке тримає інший процес (msvcrt.LK_LOCK сам здається приблизно за 10 с)
+LOCK_TIMEOUT = 10.0
+LOCK_POLL_INTERVAL = 0.05
+
+
+def _lock_file(file, exclusive: bool) -> None:
+    """Бере блокування ОС; TimeoutError, якщо інший процес не відпускає його LOCK_TIMEOUT секунд."""
+    if fcntl is not None:
+        mode = (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | fcntl.LOCK_NB
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while True:
+            try:
+                fcntl.flock(file.fileno(), mode)
+                return
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"файл '{file.name}' заблоковано іншим процесом")
+                time.sleep(LOCK_POLL_INTERVAL)
+    else:
+        file.seek(0)
+        try:
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1) # msvcrt вміє лише виключне блокування
+        except OSError as e: # LK_LOCK кидає OSError, вичерпавши спроби
+            raise TimeoutError(f"файл '{file.name}' заблоковано іншим процесом") from e
+
+
+def _unlock_file(file) -> None:
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """
+    Блокування файлу між процесами. Повторно вхідне в межах процесу:
+    вкладені захоплення лише збільшують лічильник (блокування ОС береться один раз, з режимом першого).
+    Якщо інший процес тримає блокування довше за LOCK_TIMEOUT, кидає StorageException(FILE_BUSY)
+    (однаково на POSIX і Windows).
+    """
+    def __init__(self, filename: str) -> None:
+        self.target = filename # Файл, доступ до якого впорядковується
+        self.filename = filename + LOCK_SUFFIX
+        self._file = None
+        self._depth = 0
+        self._guard = threading.RLock() # Потоки одного процесу чекають один на одного
+
+    def acquire(self, exclusive: bool = True) -> None:
+        self._guard.acquire()
+        if self._depth == 0:
+            try:
+                self._file = open(self.filename, "a+b")
+                _lock_file(self._file, exclusive)
+            except OSError as e:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._guard.release()
+                if isinstance(e, TimeoutError):
+                    raise StorageException(ModelError.FILE_BUSY, filename=self.target) from e
+                raise
+        self._depth += 1
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            _unlock_file(self._file)
+            self._file.close()
+            self._file = None
+        self._guard.release()
+
+    @contextmanager
+    def hold(self, exclusive: bool = True):
+        self.acquire(exclusive)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class ReadWriteLock:
+    """
+    Блокування «багато читачів або один письменник» між потоками процесу.
+    with lock: - виключне (повторно вхідне для власника), with lock.shared(): - спільне.
+    Письменники мають перевагу: нові читачі чекають, поки пройде той, що вже чекає.
+    Обидва блокування повторно вхідні; власник виключного може брати і спільне,
+    але читач не може підвищити блокування до виключного.
+    """
+    def __init__(self) -> None:
+        self._condition = threading.Condition(threading.Lock())
+        self._readers: dict[int, int] = {} # Потік -> глибина спільного блокування
+        self._writer: int | None = None # Ідентифікатор потоку-власника
+        self._depth = 0
+        self._waiting_writers = 0
+
+    def acquire(self) -> bool:
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer == me:
+                self._depth += 1
+                return True
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer, self._depth = me, 1
+        return True
+
+    def release(self) -> None:
+        with self._condition:
+            self._depth -= 1
+            if self._depth == 0:
+                self._writer = None
+                self._condition.notify_all()
+
+    def __enter__(self) -> "ReadWriteLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+    @contextmanager
+    def shared(self):
+        me = threading.get_ident()
+        if self._writer == me: # Власник виключного блокування вже читає безпечно
+            yield
+            return
+        with self._condition:
+            if me not in self._readers: # Повторний вхід читача не чекає письменника (інакше - взаємне очікування)
+                while self._writer is not None or self._waiting_writers:
+                    self._condition.wait()
+            self._readers[me] = self._readers.get(me, 0) + 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers[me] -= 1
+                if not self._readers[me]:
+                    del self._readers[me]
+                    if not self._readers:
+                        self._condition.notify_all()
+
+
+def file_signature(filename: str) -> tuple[int, int, int] | None:
+    """Дешевий відбиток файлу для виявлення змін: (inode, розмір, mtime у нс) або None, якщо файлу немає."""
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+# ============================= ДВІЙКОВИЙ ФОРМАТ ЗНІМКА =============================
+# Замість pickle графа об'єктів книга зберігається стовпцями:
+#   MAGIC | версія (u16) | довжина заголовка (u32) | заголовок JSON | стовпці
+# Заголовок описує схему: кількість контактів, journal_seq і перелік стовпців [назва, тип].
+# Кожен стовпець - довжина у байтах (u64) і вміст: u32/i32 - масив чисел little-endian,
+# utf8 - рядки підряд (їх довжини в символах - в окремому стовпці <назва>_len).
+# Завантаження - кілька масових операцій (array.frombytes, decode) замість відновлення
+# мільйонів об'єктів pickle; невідомі стовпці ігноруються, а файли старіших версій
+# доводяться до поточної міграціями.
+
+SNAPSHOT_MAGIC = b"ABKS"
+SNAPSHOT_VERSION = 1
+_SNAPSHOT_PREFIX = struct.Struct("<4sHI")
+_COLUMN_SIZE = struct.Struct("<Q")
+
+# Коди array для 4-байтових цілих (розмір 'I'/'l' залежить від платформи)
+_ARRAY_CODES = {
+    "u32" : next(code for code in "IL" if array(code).itemsize == 4),
+    "i32" : next(code for code in "il" if array(code).itemsize == 4),
+}
+
+# Стовпці поточної версії: назва -> тип
+SNAPSHOT_COLUMNS = {
+    "names_len"    : "u32",   # Довжини імен
+    "names"        : "utf8",
+    "phone_counts" : "u32",   # Скільки телефонів у кожного контакту
+    "phones_len"   : "u32",
+    "phones"       : "utf8",
+    "email_counts" : "u32",
+    "emails_len"   : "u32",
+    "emails"       : "utf8",
+    "birthdays"    : "i32",   # date.toordinal() або 0 - без дати
+}
+
+# Міграції: версія -> функція, що переводить заголовок і стовпці цієї версії на наступну (на місці)
+SNAPSHOT_MIGRATIONS: dict[int, Callable[[dict, dict[str, memoryview]], None]] = {}
+
+
+def _pack_column(kind: str, values: Iterable[int]) -> bytes:
+    column = array(_ARRAY_CODES[kind], values)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column.tobytes()
+
+
+def _unpack_column(columns: dict[str, memoryview], name: str) -> array:
+    column = array(_ARRAY_CODES[SNAPSHOT_COLUMNS[name]])
+    column.frombytes(columns[name])
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+def _split_strings(columns: dict[str, memoryview], name: str) -> list[str]:
+    """Розрізає utf8-стовпець на рядки за довжинами з <назва>_len."""
+    text = str(columns[name], "utf-8")
+    offsets = [0, *accumulate(_unpack_column(columns, name + "_len"))]
+    if offsets[-1] != len(text):
+        raise ValueError(f"довжини стовпця '{name}' не збігаються з його вмістом")
+    return [text[start:end] for start, end in pairwise(offsets)]
+
+
+def encode_book(book: AddressBook) -> bytes:
+    """Серіалізує книгу у двійковий знімок поточної версії."""
+    names, phones, emails = [], [], []
+    phone_counts, email_counts, birthdays = [], [], []
+    for name, record in book.data.items():
+        names.append(name)
+        phone_counts.append(len(record._phones))
+        phones.extend(record._phones) # Ключі - самі значення, у порядку додавання
+        email_counts.append(len(record._emails))
+        emails.extend(record._emails)
+        birthdays.append(record.birthday.value.toordinal() if record.birthday else 0)
+    columns = {
+        "names_len"    : _pack_column("u32", map(len, names)),
+        "names"        : "".join(names).encode("utf-8"),
+        "phone_counts" : _pack_column("u32", phone_counts),
+        "phones_len"   : _pack_column("u32", map(len, phones)),
+        "phones"       : "".join(phones).encode("utf-8"),
+        "email_counts" : _pack_column("u32", email_counts),
+        "emails_len"   : _pack_column("u32", map(len, emails)),
+        "emails"       : "".join(emails).encode("utf-8"),
+        "birthdays"    : _pack_column("i32", birthdays),
+    }
+    header = json.dumps({
+        "count"       : len(names),
+        "journal_seq" : book.journal_seq,
+        "columns"     : [[name, SNAPSHOT_COLUMNS[name]] for name in columns],
+    }).encode("utf-8")
+    parts = [_SNAPSHOT_PREFIX.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(header)), header]
+    for data in columns.values():
+        parts += (_COLUMN_SIZE.pack(len(data)), data)
+    return b"".join(parts)
+
+
+def decode_book(data: bytes) -> AddressBook:
+    """Відновлює книгу з двійкового знімка. Кидає ValueError, якщо знімок пошкоджено або він новіший за програму."""
+    magic, version, header_size = _SNAPSHOT_PREFIX.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("файл не є знімком адресної книги")
+    if version > SNAPSHOT_VERSION:
+        raise ValueError(f"знімок версії {version} створено новішою програмою (підтримується до {SNAPSHOT_VERSION})")
+    offset = _SNAPSHOT_PREFIX.size
+    header = json.loads(data[offset:offset + header_size])
+    offset += header_size
+    view = memoryview(data)
+    columns: dict[str, memoryview] = {}
+    for name, _kind in header["columns"]:
+        (size,) = _COLUMN_SIZE.unpack_from(data, offset)
+        offset += _COLUMN_SIZE.size
+        if offset + size > len(data):
+            raise ValueError(f"знімок обрізано на стовпці '{name}'")
+        columns[name] = view[offset:offset + size]
+        offset += size
+    for old_version in range(version, SNAPSHOT_VERSION):
+        SNAPSHOT_MIGRATIONS[old_version](header, columns)
+
+    count = header["count"]
+    names = _split_strings(columns, "names")
+    phones = _split_strings(columns, "phones")
+    emails = _split_strings(columns, "emails")
+    phone_counts = _unpack_column(columns, "phone_counts")
+    email_counts = _unpack_column(columns, "email_counts")
+    birthdays = _unpack_column(columns, "birthdays")
+    if not (len(names) == len(phone_counts) == len(email_counts) == len(birthdays) == count):
+        raise ValueError("стовпці знімка мають різну довжину")
+    if sum(phone_counts) != len(phones) or sum(email_counts) != len(emails):
+        raise ValueError("кількість телефонів або email не збігається зі стовпцями")
+
+    restore = Record._restore
+    records = {}
+    phone_end = email_end = 0
+    # Мільйони нових об'єктів без циклічних посилань раз у раз запускали б збирач сміття (удвічі довше)
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for name, phone_count, email_count, birthday in zip(names, phone_counts, email_counts, birthdays):
+            phone_start, phone_end = phone_end, phone_end + phone_count
+            email_start, email_end = email_end, email_end + email_count
+            records[name] = restore(name, phones[phone_start:phone_end], emails[email_start:email_end], birthday)
+        book = AddressBook.__new__(AddressBook)
+        book.__setstate__({"data": records, "journal_seq": header["journal_seq"]}) # Прив'язка записів та індекси
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return book
+
+
+# ============================= СЕРІАЛІЗАЦІЯ =============================
+
+# Ім'я файлу лишається старим: файли pickle попередніх версій читаються так само
 DEFAULT_FILENAME = "contacts.pkl"
+# Звіряти індекси з записами після кожного завантаження (відладка: помітна частка часу завантаження)
+CHECK_INDEXES = False
 
-def save_contacts(book: AddressBook, filename: str = DEFAULT_FILENAME) -> None:
-    """Зберігає адресну книгу у файл за допомогою pickle."""
+def save_contacts(book: AddressBook, filename: str = DEFAULT_FILENAME, backups: int = 0) -> bool:
+    """
+    Атомарно зберігає адресну книгу у файл (двійковий знімок encode_book).
+
+    Знімок пишеться у тимчасовий файл поруч, скидається на диск (fsync)
+    і лише потім замінює основний файл, тож збій посеред запису не псує книгу.
+
+    Args:
+        backups (int): Скільки попередніх поколінь зберігати (filename.1 ... filename.N).
+
+    Returns:
+        bool: True у разі успіху.
+    """
+    with FileLock(filename).hold():
+        return _save_book(book, filename, backups)
+
+
+def _save_book(book: AddressBook, filename: str, backups: int = 0) -> bool:
+    """save_contacts без блокування (викликач уже тримає блокування файлу)."""
     try:
-        # Відкриваємо файл для бінарного запису ('wb')
-        with open(filename, "wb") as file:
-            # Використовуємо pickle.dump для серіалізації всього об'єкта book
-            pickle.dump(book, file)
-    except (IOError, pickle.PicklingError) as e:
-        # Обробляємо можливі помилки запису або серіалізації pickle
+        payload = encode_book(book)
+    except (ValueError, OverflowError) as e: # Рядок, що не кодується в UTF-8, або переповнення лічильника
         print(f"Помилка збереження файлу '{filename}': {e}")
+        return False
+    return _write_snapshot(filename, payload, backups)
+
+
+def _write_snapshot(filename: str, payload: bytes, backups: int = 0) -> bool:
+    """Атомарно записує готові байти знімка у файл. Повертає True у разі успіху."""
+    directory = os.path.dirname(os.path.abspath(filename))
+    tmp_filename = f"{filename}.tmp{os.getpid()}"
+    try:
+        # Відкриваємо тимчасовий файл для бінарного запису ('wb')
+        with open(tmp_filename, "wb") as file:
+            file.write(payload)
+            file.flush()
+            os.fsync(file.fileno())
+        if backups > 0:
+            _rotate_backups(filename, backups)
+        os.replace(tmp_filename, filename) # Атомарна заміна
+        _fsync_directory(directory)
+        return True
+    except IOError as e:
+        # Обробляємо можливі помилки запису
+        print(f"Помилка збереження файлу '{filename}': {e}")
+        try:
+            os.remove(tmp_filename)
+        except OSError:
+            pass
+        return False
+
+
+def _rotate_backups(filename: str, backups: int) -> None:
+    """Зсуває покоління filename.1..N і робить поточний файл поколінням .1."""
+    if not os.path.exists(filename):
+        return
+    newest = _shift_backups(filename, backups)
+    try:
+        os.link(filename, newest) # Основний файл лишається на місці до os.replace
+    except OSError:
+        shutil.copy2(filename, newest) # ФС без жорстких посилань
+
+
+def _shift_backups(filename: str, backups: int) -> str:
+    """Зсуває покоління filename.1..N-1 на одне (найстаріше відкидається) і повертає звільнене ім'я filename.1."""
+    for generation in range(backups - 1, 0, -1):
+        older = f"{filename}.{generation}"
+        if os.path.exists(older):
+            os.replace(older, f"{filename}.{generation + 1}")
+    newest = f"{filename}.1"
+    if os.path.exists(newest):
+        os.remove(newest)
+    return newest
+
+
+def _fsync_directory(directory: str) -> None:
+    """Фіксує на диску перейменування у каталозі (там, де це підтримується)."""
+    if os.name == 'nt':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
 
 
 def load_contacts(filename: str = DEFAULT_FILENAME) -> AddressBook:
-    """Завантажує адресну книгу з файлу за допомогою pickle."""
+    """
+    Завантажує адресну книгу з файлу (двійковий знімок або pickle попередніх версій).
+    Якщо поруч є журнал змін, дозастосовує його записи, новіші за знімок,
+    після чого звіряє індекси з записами і за потреби перебудовує їх.
+    """
+    with FileLock(filename).hold(exclusive=False):
+        return _load_book(filename)
+
+
+def _load_book(filename: str, fallback: bool = True) -> AddressBook:
+    """load_contacts без блокування (викликач уже тримає блокування файлу)."""
+    book = _load_snapshot(filename, fallback)
+    replay_journal(book, filename + JOURNAL_SUFFIX)
+    if CHECK_INDEXES and (repaired := book.check_indexes()):
+        print(f"Індекси книги з файлу '{filename}' не збігалися з записами і були перебудовані: {', '.join(repaired)}.")
+    return book
+
+
+# Помилки, які може спричинити пошкоджений або несумісний файл знімка чи pickle
+# (TypeError може виникнути, якщо структура класів змінилась несумісно)
+SNAPSHOT_ERRORS = (pickle.UnpicklingError, struct.error, EOFError, AttributeError, ImportError,
+                   LookupError, TypeError, ValueError)
+
+def _load_snapshot(filename: str, fallback: bool = True) -> AddressBook:
+    """
+    Завантажує лише знімок адресної книги (без журналу).
+    Якщо основний файл пошкоджено, пробує попередні покоління filename.1, filename.2, ...
+    fallback=False (перечитування вже відкритої книги) - жодних запасних варіантів:
+    помилка читання пробрасується, щоб порожня чи застаріла книга не замінила живу.
+    """
+    if not fallback:
+        return _read_snapshot(filename)
     try:
-        # Відкриваємо файл для бінарного читання ('rb')
-        with open(filename, "rb") as file:
-            # Використовуємо pickle.load для десеріалізації об'єкта
-            book = pickle.load(file)
-            # Додаткова перевірка типу завантаженого об'єкта
-            if isinstance(book, AddressBook):
-                return book
-            else:
-                print(f"Помилка: Файл '{filename}' містить не об'єкт AddressBook.")
-                return AddressBook() # Повертаємо порожню книгу
+        return _read_snapshot(filename)
     except FileNotFoundError:
         # Це нормально, якщо файл ще не створено
         print(f"Файл контактів '{filename}' не знайдено. Буде створено новий при збереженні.")
         return AddressBook() # Повертаємо нову порожню книгу
-    except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, IndexError, IOError, TypeError) as e:
-        # Ловимо ширший спектр можливих помилок при завантаженні pickle
-        # TypeError може виникнути, якщо структура класів змінилась несумісно
-        print(f"Помилка завантаження даних з файлу '{filename}': {e}. Створення нової адресної книги.")
-        return AddressBook() # Повертаємо порожню книгу у разі помилки
\ No newline at end of file
+    except (IOError, *SNAPSHOT_ERRORS) as e:
+        print(f"Помилка завантаження даних з файлу '{filename}': {e}.")
+
+    generation = 1
+    while os.path.exists(backup := f"{filename}.{generation}"):
+        try:
+            book = _read_snapshot(backup)
+            print(f"Завантажено попереднє покоління '{backup}'.")
+            return book
+        except (IOError, *SNAPSHOT_ERRORS) as e:
+            print(f"Помилка завантаження даних з файлу '{backup}': {e}.")
+        generation += 1
+    print("Створення нової адресної книги.")
+    return AddressBook() # Повертаємо порожню книгу у разі помилки
+
+
+def _read_snapshot(filename: str) -> AddressBook:
+    """Читає один файл знімка. Кидає виняток, якщо він недійсний."""
+    # Відкриваємо файл для бінарного читання ('rb')
+    with open(filename, "rb") as file:
+        data = file.read()
+    if data.startswith(SNAPSHOT_MAGIC):
+        return decode_book(data)
+    # Файли попередніх версій програми - pickle об'єкта AddressBook
+    book = pickle.loads(data)
+    # Додаткова перевірка типу завантаженого об'єкта
+    if not isinstance(book, AddressBook):
+        raise TypeError("файл містить не об'єкт AddressBook")
+    return book
+
+
+# ============================= ЖУРНАЛ ЗМІН (write-ahead) =============================
+# Кожна зміна книги дописується одним рядком JSON: [seq, op, name, *args].
+# Телефони та email видаляються і правляться за значенням (правка - ще й з позицією та старим значенням):
+# позиції зсуваються після чужих змін, тож запис, застосований до іншої версії книги (злиття у
+# BackgroundStorage), зачіпає саме те значення або не застосовується зовсім. Записи старого формату
+# з позицією (remove: [індекс], edit: [індекс, нове]) читаються як раніше.
+# Знімок зберігає номер останнього врахованого запису (AddressBook.journal_seq),
+# тому при завантаженні застосовуються лише новіші записи, а повторне застосування
+# після збою під час ущільнення неможливе.
+
+JOURNAL_SUFFIX = ".journal"
+JOURNAL_COMPACT_EVERY = 1000 # Після скількох записів журнал ущільнюється у знімок
+
+
+def _encode_change(seq: int, op: str, name: str, args: tuple) -> list:
+    """Перетворює подію зміни на компактний запис журналу."""
+    if op == "add_record":
+        record: Record = args[0]
+        birthday = record.birthday.value.toordinal() if record.birthday else None
+        return [seq, op, name, [p.value for p in record.phones], [e.value for e in record.emails], birthday]
+    if op in ("edit_phone", "edit_email"):
+        return [seq, op, name, *args] # Індекс, нове і старе значення
+    if op in ("remove_phone", "remove_email"):
+        return [seq, op, name, args[1]] # Видалене значення, а не позиція
+    if op in ("add_phone", "add_email"):
+        return [seq, op, name, args[0]]
+    if op == "set_birthday":
+        return [seq, op, name, args[0].toordinal()]
+    return [seq, op, name] # delete, remove_birthday
+
+
+def _apply_change(book: AddressBook, op: str, name: str, args: list) -> None:
+    """Застосовує запис журналу до книги через звичайні методи моделі."""
+    if op == "add_record":
+        phones, emails, birthday = args
+        record = Record(name)
+        for phone in phones:
+            record.add_phone(phone)
+        for email in emails:
+            record.add_email(email)
+        if birthday is not None:
+            record.add_birthday(date.fromordinal(birthday))
+        book.add_record(record)
+    elif op == "delete":
+        book.delete(name)
+    elif op == "set_birthday":
+        book.find(name).add_birthday(date.fromordinal(args[0]))
+    elif op in ("remove_phone", "remove_email") and isinstance(args[0], str):
+        getattr(book.find(name), f"{op}_value")(args[0]) # Кидає Phone/EmailException, якщо значення вже немає
+    elif op in ("edit_phone", "edit_email") and len(args) == 3:
+        record = book.find(name)
+        _, new_value, old_value = args
+        # Правиться те значення, що було змінене, на його поточній позиції (ValueError - його вже немає)
+        index = [item.value for item in getattr(record, f"{op[5:]}s")].index(old_value)
+        getattr(record, op)(index, new_value)
+    elif op in ("add_phone", "edit_phone", "remove_phone", "add_email", "edit_email", "remove_email", "remove_birthday"):
+        getattr(book.find(name), op)(*args)
+    else:
+        raise ValueError(f"Невідома операція журналу: {op}")
+
+
+def _revert_change(book: AddressBook, op: str, name: str, args: tuple) -> None:
+    """Скасовує подію зміни (з аргументами як у слухачів) зворотною операцією."""
+    if op == "add_record":
+        book.delete(name)
+    elif op == "delete":
+        book.add_record(args[0]) # Видалений запис не змінювався - повертаємо той самий об'єкт
+    elif op == "set_birthday":
+        new_date, old_date = args
+        if old_date is None:
+            book.find(name).remove_birthday()
+        else:
+            book.find(name).add_birthday(old_date)
+    elif op == "remove_birthday":
+        book.find(name).add_birthday(args[0])
+    else:
+        record = book.find(name)
+        action, _, field = op.partition("_")
+        if action == "add":
+            getattr(record, f"remove_{field}_value")(args[0])
+        elif action == "edit":
+            getattr(record, op)(args[0], args[2])
+        elif action == "remove":
+            # Значення повертається на свою позицію: поля після неї знімаються (з кінця, за індексом -
+            # щоб і ці зміни відкочувались на свої місця) і додаються знову.
+            # Видалене за значенням (без позиції) повертається в кінець: так видаляє лише відкат add_*.
+            index, old_value = args
+            tail = [item.value for item in getattr(record, f"{field}s")[index:]] if index is not None else []
+            for _ in tail:
+                getattr(record, f"remove_{field}")(-1)
+            getattr(record, f"add_{field}")(old_value)
+            for value in tail:
+                getattr(record, f"add_{field}")(value)
+        else:
+            raise ValueError(f"Невідома операція: {op}")
+
+
+def replay_journal(book: AddressBook, journal_filename: str, start: int = 0) -> int:
+    """
+    Дозастосовує до книги записи журналу, новіші за book.journal_seq.
+    Обірваний останній рядок (збій під час запису) ігнорується.
+    start - зсув, з якого читати (для дочитування записів, дописаних іншим процесом).
+
+    Returns:
+        int: Довжина цілої (коректної) частини журналу в байтах.
+    """
+    try:
+        file = open(journal_filename, "rb")
+    except FileNotFoundError:
+        return 0
+    valid_length = start
+    with file:
+        file.seek(start)
+        for line in file:
+            if not line.endswith(b"\n"):
+                break # Обірваний хвіст - запис не був завершений
+            valid_length += len(line)
+            try:
+                seq, op, name, *args = json.loads(line)
+            except ValueError:
+                print(f"Пропущено пошкоджений запис журналу '{journal_filename}'.")
+                continue
+            if seq <= book.journal_seq:
+                continue # Вже врахований у знімку
+            try:
+                _apply_change(book, op, name, args)
+            except (CommandException, ContactException, PhoneException, EmailException, BirthdayException, ValueError) as e:
+                print(f"Не вдалося застосувати запис журналу #{seq} ({op} {name}): {e}")
+            book.journal_seq = seq
+    return valid_length
+
+
+# ============================= ІСТОРІЯ ЗМІН (undo/redo) =============================
+# Історія зберігає не записи, а компактні дельти подій зміни - кортежі рядків і чисел
+# з усім потрібним для руху в обидва боки (старі й нові значення, поля видаленого контакту).
+
+HISTORY_MAX_ENTRIES = 100      # Скільки кроків можна скасувати
+HISTORY_MAX_BYTES = 1 << 20    # Орієнтовна межа пам'яті під історію (1 МБ)
+
+Delta = tuple
+
+
+def _encode_delta(op: str, name: str, args: tuple) -> Delta:
+    """Подія зміни -> компактна дельта (дати як порядкові номери)."""
+    if op == "add_record" or op == "delete":
+        record: Record = args[0]
+        birthday = record.birthday.value.toordinal() if record.birthday else None
+        return (op, name, tuple(record._phones), tuple(record._emails), birthday)
+    if op == "set_birthday":
+        new_date, old_date = args
+        return (op, name, new_date.toordinal(), old_date.toordinal() if old_date else None)
+    if op == "remove_birthday":
+        return (op, name, args[0].toordinal())
+    return (op, name, *args) # add_*/edit_*/remove_* - вже рядки та індекси
+
+
+def _decode_delta(delta: Delta) -> tuple[str, str, tuple]:
+    """Дельта -> (op, name, args) у форматі подій зміни (для видаленого контакту - новий Record)."""
+    op, name, *args = delta
+    if op == "add_record" or op == "delete":
+        phones, emails, birthday = args
+        record = Record(name)
+        record.phones = [Phone(phone) for phone in phones]
+        record.emails = [Email(email) for email in emails]
+        if birthday is not None:
+            record.birthday = Birthday(date.fromordinal(birthday))
+        return op, name, (record,)
+    if op == "set_birthday":
+        new_date, old_date = args
+        return op, name, (date.fromordinal(new_date), date.fromordinal(old_date) if old_date is not None else None)
+    if op == "remove_birthday":
+        return op, name, (date.fromordinal(args[0]),)
+    return op, name, tuple(args)
+
+
+def _delta_size(delta: Delta) -> int:
+    """Орієнтовний розмір дельти в пам'яті, байт."""
+    size = sys.getsizeof(delta)
+    for item in delta:
+        size += sys.getsizeof(item)
+        if isinstance(item, tuple):
+            size += sum(map(sys.getsizeof, item))
+    return size
+
+
+def _repeat_change(book: AddressBook, op: str, name: str, args: tuple) -> None:
+    """Повторно застосовує подію зміни (redo) через звичайні методи моделі."""
+    if op == "add_record":
+        book.add_record(args[0])
+    elif op == "delete":
+        book.delete(name)
+    elif op == "set_birthday":
+        book.find(name).add_birthday(args[0])
+    elif op == "remove_birthday":
+        book.find(name).remove_birthday()
+    elif op.startswith("edit_"):
+        getattr(book.find(name), op)(args[0], args[1])
+    elif op.startswith("remove_"):
+        index, old_value = args
+        if index is None:
+            getattr(book.find(name), f"{op}_value")(old_value)
+        else:
+            getattr(book.find(name), op)(index)
+    else:
+        getattr(book.find(name), op)(*args) # add_phone, add_email
+
+
+class History:
+    """
+    Історія змін для undo/redo. Слухає події книги, а checkpoint() закриває крок -
+    усі зміни однієї команди. Старі кроки відкидаються, щойно перевищено max_entries або max_bytes;
+    останній крок лишається завжди, навіть якщо сам більший за max_bytes.
+    """
+    def __init__(self, book: AddressBook, max_entries: int = HISTORY_MAX_ENTRIES,
+                 max_bytes: int = HISTORY_MAX_BYTES) -> None:
+        self.book = book
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._pending: list[Delta] = []                         # Зміни поточного кроку
+        self._undo: deque[tuple[str, tuple[Delta, ...], int]] = deque() # (мітка, дельти, розмір)
+        self._redo: list[tuple[str, tuple[Delta, ...], int]] = []
+        self._bytes = 0 # Розмір усіх кроків в обох стеках
+        self._replaying = False
+        book.subscribe(self._record)
+
+    def _record(self, op: str, name: str, *args) -> None:
+        """Слухач змін книги (зміни, зроблені самим undo/redo, не записуються)."""
+        if not self._replaying:
+            self._pending.append(_encode_delta(op, name, args))
+
+    def checkpoint(self, label: str) -> bool:
+        """
+        Закриває крок історії з накопиченими змінами (якщо вони є); нова зміна очищає redo.
+
+        Returns:
+            bool: True, якщо крок більший за max_bytes - тоді з історії лишається лише він.
+        """
+        if not self._pending:
+            return False
+        deltas, self._pending = tuple(self._pending), []
+        size = sys.getsizeof(deltas) + sum(map(_delta_size, deltas))
+        self._bytes -= sum(entry[2] for entry in self._redo)
+        self._redo.clear()
+        self._undo.append((label, deltas, size))
+        self._bytes += size
+        # Новий крок не відкидається: інакше одна велика команда стерла б усю історію, включно з собою
+        while len(self._undo) > 1 and (len(self._undo) > self.max_entries or self._bytes > self.max_bytes):
+            self._bytes -= self._undo.popleft()[2]
+        return size > self.max_bytes
+
+    def _apply(self, entry: tuple, deltas: Iterable[Delta], apply: Callable) -> None:
+        """Застосовує дельти кроку; крок, що не вдалося застосувати, з історії відкидається."""
+        self._replaying = True
+        try:
+            for delta in deltas:
+                apply(self.book, *_decode_delta(delta))
+        except Exception:
+            self._bytes -= entry[2]
+            raise
+        finally:
+            self._replaying = False
+
+    def undo(self) -> str:
+        """
+        Скасовує останній крок. Кидає CommandException, якщо скасовувати нічого.
+
+        Returns:
+            str: Мітка скасованого кроку.
+        """
+        if not self._undo:
+            raise CommandException(ModelError.NOTHING_TO_UNDO)
+        entry = self._undo.pop()
+        self._apply(entry, reversed(entry[1]), _revert_change)
+        self._redo.append(entry)
+        return entry[0]
+
+    def redo(self) -> str:
+        """Повторює останній скасований крок. Кидає CommandException, якщо повторювати нічого."""
+        if not self._redo:
+            raise CommandException(ModelError.NOTHING_TO_REDO)
+        entry = self._redo.pop()
+        self._apply(entry, entry[1], _repeat_change)
+        self._undo.append(entry)
+        return entry[0]
+
+    def __len__(self) -> int:
+        return len(self._undo)
+
+
+# ============================= СТРАТЕГІЇ ЗБЕРЕЖЕННЯ =============================
+
+class SnapshotStorage:
+    """Повний знімок книги після кожної модифікуючої команди (поведінка за замовчуванням)."""
+    def __init__(self, filename: str = DEFAULT_FILENAME, backups: int = 0) -> None:
+        self.filename = filename
+        self.backups = backups # Кількість попередніх поколінь знімка
+        self.book: AddressBook | None = None
+        # Блокування, під яким виконуються команди: зміни - виключно, читання - спільно
+        # (фонові потоки та паралельні запити сервера бачать цілісну книгу)
+        self.lock = ReadWriteLock()
+        # Блокування файлу між процесами та відбиток файлу на момент останнього читання/запису
+        self.file_lock = FileLock(filename)
+        self._signature = None
+        self._transaction_locked = False # Відкрита транзакція тримає виключне блокування
+
+    def load(self) -> AddressBook:
+        with self.file_lock.hold(exclusive=False):
+            self.book = _load_book(self.filename)
+            self._signature = self._current_signature()
+        return self.book
+
+    def _current_signature(self):
+        return file_signature(self.filename)
+
+    def _has_unsaved(self) -> bool:
+        """Чи є зміни, яких ще немає у файлі (тоді перечитувати файл не можна)."""
+        return False
+
+    def refresh(self, book: AddressBook) -> bool:
+        """
+        Перевіряє відбиток файлу (без читання) і, якщо його змінив інший процес, перечитує книгу.
+
+        Returns:
+            bool: True, якщо книгу оновлено.
+
+        Кидає StorageException, якщо змінений файл не вдалося прочитати: книга лишається як є,
+        а відбиток не оновлюється (наступна команда спробує знову).
+        """
+        if book.in_transaction or self._current_signature() == self._signature or self._has_unsaved():
+            return False
+        with self.file_lock.hold(exclusive=False):
+            try:
+                self._reload(book)
+            except (OSError, *SNAPSHOT_ERRORS) as e:
+                raise StorageException(ModelError.RELOAD_FAILED, filename=self.filename, error_message=str(e))
+        return True
+
+    def _reload(self, book: AddressBook) -> None:
+        book._replace_contents(_load_book(self.filename, fallback=False))
+        self._signature = self._current_signature()
+
+    @contextmanager
+    def writing(self, book: AddressBook):
+        """
+        Виключне блокування файлу на час модифікуючої команди: інші процеси не пишуть,
+        поки команда підтягує їхні зміни (refresh) і зберігає свої, тож їхня робота не затирається.
+        Якщо команда відкрила транзакцію, блокування лишається до її завершення.
+        """
+        with self.file_lock.hold():
+            yield
+            if book.in_transaction != self._transaction_locked:
+                (self.file_lock.acquire if book.in_transaction else self.file_lock.release)()
+                self._transaction_locked = book.in_transaction
+
+    def commit(self, book: AddressBook) -> None:
+        """Фіксує зміни, зроблені командою."""
+        with self.file_lock.hold():
+            _save_book(book, self.filename, self.backups)
+            self._signature = self._current_signature()
+
+    def close(self) -> None:
+        """Завершує роботу зі сховищем (викликається при виході)."""
+        if self._transaction_locked:
+            self.file_lock.release()
+            self._transaction_locked = False
+
+
+class JournalStorage(SnapshotStorage):
+    """
+    Зберігання журналом: кожна зміна дописується у файл журналу,
+    а повний знімок пишеться лише при ущільненні (кожні compact_every записів та при виході).
+    Записи накопичуються в пам'яті й дописуються одним записом у commit() під виключним
+    блокуванням, а зміни відкритої транзакції - лише після її завершення, тож збій посеред
+    транзакції не залишає на диску її частину.
+    """
+    def __init__(self, filename: str = DEFAULT_FILENAME, backups: int = 0,
+                 compact_every: int = JOURNAL_COMPACT_EVERY) -> None:
+        super().__init__(filename, backups)
+        self.journal_filename = filename + JOURNAL_SUFFIX
+        self.compact_every = compact_every
+        self._pending = 0 # Записів журналу з моменту останнього ущільнення
+        self._buffer: list[list] = [] # Ще не дописані у файл записи (номер - при записі)
+        self._file = None
+        self._journal_end = 0 # До якого байта журнал уже застосовано до книги
+
+    def load(self) -> AddressBook:
+        with self.file_lock.hold(): # Виключне: обірваний хвіст журналу обрізається
+            book = _load_snapshot(self.filename)
+            valid_length = replay_journal(book, self.journal_filename)
+            # Відкриваємо журнал на дозапис, відрізавши обірваний хвіст, якщо він був
+            self._file = open(self.journal_filename, "ab")
+            self._file.truncate(valid_length)
+            self._journal_end = valid_length
+            self._signature = self._current_signature()
+        self.book = book
+        book.subscribe(self._append)
+        return book
+
+    def _current_signature(self):
+        """Відбиток знімка і розмір журналу: інший процес або дописав журнал, або ущільнив його."""
+        return file_signature(self.filename), os.path.getsize(self.journal_filename)
+
+    def _has_unsaved(self) -> bool:
+        return bool(self._buffer)
+
+    def _reload(self, book: AddressBook) -> None:
+        """Якщо знімок не змінювався - дочитує лише нові записи журналу, інакше перечитує все."""
+        snapshot, journal_size = self._current_signature()
+        with book._muted(): # Чужі записи не дописуються у наш журнал і не потрапляють в історію
+            if snapshot == self._signature[0] and journal_size >= self._journal_end:
+                self._journal_end = replay_journal(book, self.journal_filename, self._journal_end)
+            else:
+                fresh = _load_snapshot(self.filename, fallback=False)
+                self._journal_end = replay_journal(fresh, self.journal_filename)
+                book._replace_contents(fresh)
+                self._pending = 0
+        self._signature = self._current_signature()
+
+    def _append(self, op: str, name: str, *args) -> None:
+        """Слухач змін книги: додає запис до буфера журналу (на диск він потрапить у commit)."""
+        self._buffer.append(_encode_change(0, op, name, args))
+        self._pending += 1
+
+    def commit(self, book: AddressBook) -> None:
+        """Скидає журнал на диск (fsync) та за потреби ущільнює його у знімок."""
+        with self.file_lock.hold():
+            self._sync()
+            if self._pending >= self.compact_every:
+                self.compact()
+
+    def _sync(self) -> None:
+        """Дописує буфер журналу одним записом і скидає файл на диск (викликач тримає виключне блокування)."""
+        if self._buffer and not self.book.in_transaction:
+            if os.fstat(self._file.fileno()).st_size != self._journal_end:
+                # Далі за прочитаним може бути лише обірваний хвіст процесу, що впав посеред запису:
+                # цілі рядки (якщо є) дочитуємо, а хвіст відрізаємо, інакше наш запис злипся б з ним
+                with self.book._muted():
+                    self._journal_end = replay_journal(self.book, self.journal_filename, self._journal_end)
+                self._file.truncate(self._journal_end)
+            # Номери видаються лише тепер - після записів, дочитаних з файлу
+            lines = []
+            for entry in self._buffer:
+                self.book.journal_seq += 1
+                entry[0] = self.book.journal_seq
+                lines.append(json.dumps(entry, ensure_ascii=False, separators=(',', ':')).encode() + b"\n")
+            self._file.write(b"".join(lines))
+            self._buffer.clear()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._journal_end = os.fstat(self._file.fileno()).st_size
+        self._signature = self._current_signature()
+
+    def compact(self) -> None:
+        """Пише повний знімок і очищує журнал (лише якщо знімок успішно збережено)."""
+        if self.book.in_transaction:
+            return # Знімок не може містити незавершену транзакцію
+        with self.file_lock.hold():
+            if _save_book(self.book, self.filename, self.backups):
+                self._buffer.clear() # Усе це вже у знімку
+                self._file.truncate(0)
+                self._pending = 0
+                self._journal_end = 0
+                self._signature = self._current_signature()
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        with self.file_lock.hold():
+            try:
+                self.refresh(self.book) # Знімок при ущільненні має містити і записи інших процесів
+                compact = self._pending > 0
+            except StorageException as e:
+                # Знімок не прочитано - наш журнал лишається, але знімок поверх чужого не пишемо
+                print(f"Помилка завантаження даних з файлу '{self.filename}': {e.kwargs['error_message']}.")
+                compact = False
+            self._sync()
+            if compact:
+                self.compact()
+            self._file.close()
+            self._file = None
+        super().close()
+
+
+# Параметри фонового збереження за замовчуванням
+SAVE_DELAY_MS = 500     # Не частіше ніж раз на стільки мілісекунд
+SAVE_MAX_CHANGES = 100  # ...або одразу після стількох змін
+
+class BackgroundStorage(SnapshotStorage):
+    """
+    Фонове збереження: зміни лише позначають книгу «брудною», а окремий потік
+    об'єднує їх і пише знімок не частіше ніж раз на delay_ms або після max_changes змін.
+    Під блокуванням команд виконується лише серіалізація, запис на диск - поза ним.
+    Незбережені зміни запам'ятовуються як записи журналу: якщо файл тим часом записав
+    інший процес, вони застосовуються до його версії, а не затирають її.
+    """
+    def __init__(self, filename: str = DEFAULT_FILENAME, backups: int = 0,
+                 delay_ms: int = SAVE_DELAY_MS, max_changes: int = SAVE_MAX_CHANGES) -> None:
+        super().__init__(filename, backups)
+        self.delay = delay_ms / 1000
+        self.max_changes = max_changes
+        self._unsaved: list[list] = []  # Незбережені зміни (записи журналу)
+        self._last_save = 0.0
+        self._stopping = False
+        self._wakeup = threading.Condition()
+        self._write_lock = threading.Lock() # Впорядковує записи файлу
+        self._thread: threading.Thread | None = None
+
+    def load(self) -> AddressBook:
+        book = super().load()
+        book.subscribe(self._mark_dirty)
+        self._thread = threading.Thread(target=self._run, name="contacts-writer", daemon=True)
+        self._thread.start()
+        return book
+
+    def _has_unsaved(self) -> bool:
+        """Поки є незбережені зміни, файл перечитує не команда, а фоновий потік - разом з ними."""
+        return bool(self._unsaved)
+
+    def _mark_dirty(self, op: str, name: str, *args) -> None:
+        """Слухач змін книги: запам'ятовує незбережену зміну."""
+        entry = _encode_change(0, op, name, args)
+        with self._wakeup:
+            self._unsaved.append(entry)
+
+    def commit(self, book: AddressBook) -> None:
+        """Не пише на диск, лише будить фоновий потік."""
+        with self._wakeup:
+            self._wakeup.notify()
+
+    def _run(self) -> None:
+        """Цикл фонового потоку."""
+        while True:
+            with self._wakeup:
+                # Під час транзакції чекаємо її завершення (commit сховища знову розбудить потік)
+                while (not self._unsaved or self.book.in_transaction) and not self._stopping:
+                    self._wakeup.wait()
+                if self._stopping:
+                    return # Фінальне збереження робить close()
+                # Чекаємо, поки мине затримка або назбирається достатньо змін
+                deadline = self._last_save + self.delay
+                while (len(self._unsaved) < self.max_changes and not self._stopping
+                       and (remaining := deadline - time.monotonic()) > 0):
+                    self._wakeup.wait(remaining)
+            self.flush()
+
+    def _serialize(self) -> tuple[bytes, int] | None:
+        """Знімок книги і кількість змін, які він містить (None - зберігати нічого або не можна)."""
+        with self._wakeup:
+            if self.book.in_transaction and not self._stopping:
+                return None # Незавершену транзакцію не зберігаємо - дочекаємось commit/rollback
+            changes = len(self._unsaved)
+        if not changes:
+            return None
+        try:
+            return encode_book(self.book), changes
+        except (ValueError, OverflowError) as e:
+            print(f"Помилка збереження файлу '{self.filename}': {e}")
+            return None
+
+    def _write(self, payload: bytes, changes: int) -> None:
+        """Пише знімок (викликач тримає виключне блокування файлу) і забуває збережені зміни."""
+        if _write_snapshot(self.filename, payload, self.backups):
+            with self._wakeup:
+                del self._unsaved[:changes]
+        self._signature = self._current_signature()
+        self._last_save = time.monotonic()
+
+    def flush(self) -> None:
+        """Зберігає книгу, якщо є незбережені зміни (якщо файл змінив інший процес - спершу зливає їх)."""
+        try:
+            self._flush()
+        except StorageException: # Файл довго тримає інший процес - зміни лишаються до наступної спроби
+            print(f"Файл '{self.filename}' зайнятий іншим процесом: зміни поки не записано.")
+            self._last_save = time.monotonic()
+
+    def _flush(self) -> None:
+        with self.lock.shared(): # Серіалізація лише читає книгу
+            serialized = self._serialize()
+            if serialized is None:
+                return
+            # Порядок записів відповідає порядку серіалізації
+            self._write_lock.acquire()
+        try:
+            with self.file_lock.hold():
+                if self._current_signature() == self._signature:
+                    self._write(*serialized)
+                    return
+        finally:
+            self._write_lock.release()
+        self._merge()
+
+    def _merge(self) -> None:
+        """
+        Перечитує змінений іншим процесом файл, застосовує до нього незбережені зміни і записує результат.
+        Телефони та email змінюються за значенням, тож зміни, що суперечать чужим (контакт уже видалено,
+        змінений чи видалений телефон або email уже прибрано), не зачіпають інших значень, а відкидаються з повідомленням.
+        Якщо файл не вдалося прочитати, нічого не пишеться - зміни лишаються до наступної спроби.
+        """
+        # Книга змінюється - виключно; порядок блокувань той самий, що й у flush
+        with self.lock, self._write_lock, self.file_lock.hold():
+            if self.book.in_transaction:
+                return # Відкриту транзакцію не перебудовуємо - злиття після її завершення
+            try:
+                fresh = _load_book(self.filename, fallback=False)
+            except (OSError, *SNAPSHOT_ERRORS) as e:
+                print(f"Файл '{self.filename}' змінено іншим процесом, але його не вдалося прочитати: {e}. "
+                      f"Зміни не записано, щоб не затерти чужі.")
+                self._last_save = time.monotonic()
+                return
+            skipped = 0
+            with self._wakeup:
+                entries = list(self._unsaved)
+            for _, op, name, *args in entries:
+                try:
+                    _apply_change(fresh, op, name, args)
+                except (ContactException, PhoneException, EmailException, BirthdayException, ValueError):
+                    skipped += 1
+            self.book._replace_contents(fresh)
+            if skipped:
+                print(f"Файл '{self.filename}' змінено іншим процесом: {skipped} змін(и), що суперечать йому, відкинуто.")
+            serialized = self._serialize()
+            if serialized is not None: # Інакше відбиток лишається старим - наступна спроба зіллє знову
+                self._write(*serialized)
+
+    def close(self) -> None:
+        """Зупиняє фоновий потік і гарантовано зберігає всі зміни."""
+        super().close() # Знімаємо блокування транзакції, інакше потік не зможе записати файл
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify()
+        self.flush()
@@ -0,0 +1,99 @@
+import cProfile
+import json
+import os
+import re
+import threading
+import time
+from typing import Callable
+
+# ============================ ПАРАМЕТРИ ============================
+# Змінні оточення для ввімкнення профілювання без зміни коду:
+#   ADDRESSBOOK_PROFILE     - поріг у мс (порожнє значення - поріг за замовчуванням);
+#   ADDRESSBOOK_PROFILE_DIR - каталог для профілів.
+ENV_PROFILE = "ADDRESSBOOK_PROFILE"
+ENV_PROFILE_DIR = "ADDRESSBOOK_PROFILE_DIR"
+THRESHOLD_MS = 100.0 # Зберігаються лише профілі команд, повільніших за поріг
+PROFILE_DIR = "profiles"
+
+# Поки вимкнено, обробник викликається напряму - без жодних витрат
+enabled = False
+threshold_ms = THRESHOLD_MS
+directory = PROFILE_DIR
+# Одночасно в процесі може працювати лише один cProfile: паралельні команди виконуються без профілю
+_active = threading.Lock()
+
+
+def configure(enable: bool = True, threshold: float | None = None, path: str | None = None) -> None:
+    """Вмикає/вимикає профілювання; threshold - поріг у мс, path - каталог для профілів."""
+    global enabled, threshold_ms, directory
+    enabled = enable
+    if threshold is not None:
+        threshold_ms = threshold
+    if path is not None:
+        directory = path
+
+
+def configure_from_env(environ=os.environ) -> None:
+    """Вмикає профілювання, якщо задано змінну ADDRESSBOOK_PROFILE (каталог діє і для 'profile on')."""
+    value = environ.get(ENV_PROFILE)
+    threshold = None
+    if value is not None:
+        try:
+            threshold = float(value) if value.strip() else None
+        except ValueError:
+            pass # Невідоме значення - просто вмикаємо з порогом за замовчуванням
+    configure(enabled or value is not None, threshold, environ.get(ENV_PROFILE_DIR))
+
+
+# ============================ ПРОФІЛЮВАННЯ ============================
+# cProfile детермінований: щоб мати профіль повільного виклику, профілюється кожен виклик,
+# а на диск потрапляють лише ті, що перевищили поріг.
+
+def run(handler: Callable, args: list[str], **kwargs):
+    """
+    Викликає handler(args, **kwargs) під cProfile (якщо профілювання ввімкнено).
+
+    Returns:
+        tuple: (результат обробника, (профіль, тривалість у мс) або None, якщо виклик не повільний).
+    """
+    if not enabled or not _active.acquire(blocking=False):
+        return handler(args, **kwargs), None
+    try:
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            result = handler(args, **kwargs)
+        finally:
+            profile.disable()
+    finally:
+        _active.release()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return result, (profile, elapsed_ms) if elapsed_ms >= threshold_ms else None
+
+
+def save(profile: cProfile.Profile, command: str, args: list[str], elapsed_ms: float) -> str:
+    """
+    Записує профіль (<назва>.prof, читається pstats/snakeviz) і опис виклику (<назва>.json).
+    Повертає шлях до файлу профілю.
+    """
+    os.makedirs(directory, exist_ok=True)
+    # Назва: час, команда (лише безпечні для файлової системи символи) і тривалість
+    slug = re.sub(r"[^\w-]", "_", command) or "command"
+    base = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{elapsed_ms:.0f}ms")
+    filename = f"{base}.prof"
+    suffix = 1
+    while os.path.exists(filename): # Кілька повільних команд за одну секунду
+        filename = f"{base}-{suffix}.prof"
+        suffix += 1
+    profile.dump_stats(filename)
+    with open(filename[:-len(".prof")] + ".json", "w", encoding="utf-8") as file:
+        json.dump({
+            "command"      : command,
+            "args"         : args,
+            "elapsed_ms"   : round(elapsed_ms, 3),
+            "threshold_ms" : threshold_ms,
+            "time"         : time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "pid"          : os.getpid(),
+        }, file, ensure_ascii=False, indent=2)
+    return filename
@@ -0,0 +1,175 @@
+import asyncio
+import contextlib
+import json
+import os
+import signal
+import socket
+import stat
+import controller as ctrl
+import metrics
+import model as mdl
+import view as v
+
+# ============================ ПАРАМЕТРИ ============================
+
+SERVER_HOST = "127.0.0.1" # Лише локальні підключення
+SERVER_PORT = 8765
+SOCKET_MODE = 0o600 # Unix-сокет доступний лише власнику (TCP-порт - будь-якому локальному користувачу)
+
+# Команди, які стосуються терміналу клієнта або спільного для всіх стану сесії:
+# очищення екрана та вихід обробляє сам клієнт, а транзакції та undo/redo
+# на спільній книзі зачіпали б зміни інших операторів.
+CLIENT_COMMANDS = {'clr'} | ctrl.QUIT_COMMANDS
+SESSION_COMMANDS = {'begin', 'commit', 'rollback', 'undo', 'redo'}
+# Команди, що читають або пишуть довільні файли на машині сервера від імені його користувача:
+# клієнти не автентифікуються, тож через сервер вони недоступні.
+FILE_COMMANDS = {'import', 'export', 'profile'}
+
+
+# ============================ СЕРВЕР ============================
+# Протокол рядковий: клієнт надсилає команду одним рядком (як у REPL),
+# сервер відповідає одним рядком JSON {"output": "..."} з уже відформатованим виводом view.
+# Команди виконуються у пулі потоків, щоб довгий запис на диск не зупиняв інших клієнтів:
+# читання йдуть паралельно під спільним блокуванням сховища, зміни - по одній під виключним.
+# Жоден клієнт не перечитує файл контактів - книга завантажується один раз.
+
+def run_command(line: str, book: mdl.AddressBook) -> str:
+    """Виконує рядок команди через controller.execute і повертає її вивід (з кольорами)."""
+    command, args = ctrl.parse_input(line)
+    with v.capture() as output: # Буфер view окремий для кожного потоку
+        if command in CLIENT_COMMANDS:
+            pass
+        elif command in SESSION_COMMANDS:
+            v.warn("server_unsupported", command=command)
+            v.flush()
+        elif command in FILE_COMMANDS:
+            v.warn("server_forbidden", command=command)
+            v.flush()
+        else:
+            ctrl.execute(command, args, book)
+    return output.getvalue()
+
+
+async def _serve_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, book: mdl.AddressBook) -> None:
+    """Обслуговує одне підключення до його закриття."""
+    try:
+        while line := await reader.readline():
+            line = line.decode("utf-8", errors="replace").strip()
+            if not line:
+                continue
+            output = await asyncio.get_running_loop().run_in_executor(None, run_command, line, book)
+            response = {"output": output}
+            writer.write(json.dumps(response, ensure_ascii=False).encode() + b"\n")
+            await writer.drain()
+    except (ConnectionError, ValueError): # Обірване з'єднання або надто довгий рядок
+        pass
+    finally:
+        writer.close()
+
+
+def _address(host: str, port: int, path: str | None) -> str:
+    return path or f"{host}:{port}"
+
+
+async def _start_unix_server(handler, path: str) -> asyncio.AbstractServer:
+    """Unix-сокет з правами SOCKET_MODE (залишений після аварійної зупинки сокет прибирається)."""
+    with contextlib.suppress(FileNotFoundError):
+        if stat.S_ISSOCK(os.stat(path).st_mode):
+            os.remove(path)
+    umask = os.umask(0o777 & ~SOCKET_MODE) # Права діють з моменту створення сокета, без проміжку
+    try:
+        server = await asyncio.start_unix_server(handler, path)
+    finally:
+        os.umask(umask)
+    os.chmod(path, SOCKET_MODE)
+    return server
+
+
+async def serve(book: mdl.AddressBook, host: str = SERVER_HOST, port: int = SERVER_PORT,
+                path: str | None = None) -> None:
+    """Приймає підключення клієнтів (через TCP або Unix-сокет path), доки процес не зупинять."""
+    v.configure(colors=True, terminal=False) # Кольори прибирає клієнт, якщо його вивід - не термінал
+    handler = lambda reader, writer: _serve_client(reader, writer, book)
+    if path:
+        server = await _start_unix_server(handler, path)
+    else:
+        server = await asyncio.start_server(handler, host, port)
+    stop = asyncio.Event()
+    with contextlib.suppress(NotImplementedError): # На Windows сигнали циклом подій не обробляються
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    print(f"Сервер адресної книги слухає {_address(host, port, path)} (Ctrl+C - зупинити).")
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        if path:
+            with contextlib.suppress(OSError):
+                os.remove(path)
+
+
+def run_server(storage: mdl.SnapshotStorage, book: mdl.AddressBook,
+               host: str = SERVER_HOST, port: int = SERVER_PORT, path: str | None = None) -> None:
+    """Запускає сервер і при зупинці дописує всі незбережені зміни."""
+    try:
+        asyncio.run(serve(book, host, port, path))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        try:
+            storage.close()
+        except mdl.StorageException as e:
+            v.error(e.error_code.value, **e.kwargs)
+            v.flush()
+        metrics.close()
+
+
+# ============================ КЛІЄНТ ============================
+
+def _connect(host: str, port: int, path: str | None) -> socket.socket:
+    if not path:
+        return socket.create_connection((host, port))
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(path)
+    except OSError:
+        connection.close()
+        raise
+    return connection
+
+
+def run_client(host: str = SERVER_HOST, port: int = SERVER_PORT, path: str | None = None) -> None:
+    """Тонкий клієнт: читає команди як REPL, а виконує їх сервер."""
+    address = _address(host, port, path)
+    try:
+        connection = _connect(host, port, path)
+    except (OSError, AttributeError) as e: # AttributeError - платформа без AF_UNIX
+        v.error("server_unavailable", address=address, error_message=str(e))
+        v.flush()
+        return
+    with connection, connection.makefile("rwb") as stream:
+        v.clear_screen()
+        v.say_hello()
+        while True:
+            try:
+                line = v.ask()
+            except (KeyboardInterrupt, EOFError):
+                line = "exit"
+            command, _ = ctrl.parse_input(line)
+            if not command:
+                v.cursor_up(1)
+                continue
+            if command == 'clr':
+                v.clear_screen()
+                continue
+            if command in ctrl.QUIT_COMMANDS:
+                v.info("goodbye_message")
+                v.flush()
+                return
+            stream.write(line.strip().encode() + b"\n")
+            stream.flush()
+            response = stream.readline()
+            if not response:
+                v.error("server_unavailable", address=address, error_message="з'єднання закрито")
+                v.flush()
+                return
+            v.write_rendered(json.loads(response)["output"])
@@ -0,0 +1,433 @@
+import os
+import sqlite3
+import weakref
+from contextlib import contextmanager
+from collections.abc import Iterator, MutableMapping
+from datetime import date, timedelta
+import model as mdl
+from model import AddressBook, Record, Phone, Email, Birthday
+
+# ============================= СХЕМА БАЗИ ДАНИХ =============================
+
+DEFAULT_DB_FILENAME = "contacts.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    id       INTEGER PRIMARY KEY,
+    name     TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS phones (
+    contact_id INTEGER NOT NULL REFERENCES contacts(id) ON DELETE CASCADE,
+    position   INTEGER NOT NULL,
+    phone      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS phones_contact ON phones(contact_id, position);
+CREATE INDEX IF NOT EXISTS phones_phone   ON phones(phone);
+CREATE TABLE IF NOT EXISTS emails (
+    contact_id INTEGER NOT NULL REFERENCES contacts(id) ON DELETE CASCADE,
+    position   INTEGER NOT NULL,
+    email      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS emails_contact ON emails(contact_id, position);
+CREATE INDEX IF NOT EXISTS emails_email   ON emails(email);
+CREATE TABLE IF NOT EXISTS birthdays (
+    contact_id INTEGER PRIMARY KEY REFERENCES contacts(id) ON DELETE CASCADE,
+    birthday   INTEGER NOT NULL,  -- date.toordinal()
+    month_day  INTEGER NOT NULL   -- місяць * 100 + день, для вибірки вікна днів народження
+);
+CREATE INDEX IF NOT EXISTS birthdays_month_day ON birthdays(month_day);
+"""
+
+# Підзапит ідентифікатора контакту за іменем
+CONTACT_ID = "(SELECT id FROM contacts WHERE name = ?)"
+
+# Поле запису -> (таблиця, стовпець)
+FIELD_TABLES = {
+    'phone' : ("phones", "phone"),
+    'email' : ("emails", "email"),
+}
+
+
+def _month_day(value: date) -> int:
+    return value.month * 100 + value.day
+
+
+def _insert_record(connection: sqlite3.Connection, record: Record) -> None:
+    """Вставляє контакт з усіма телефонами, email та днем народження."""
+    contact_id = connection.execute("INSERT INTO contacts(name) VALUES (?)", (record.name.value,)).lastrowid
+    connection.executemany("INSERT INTO phones(contact_id, position, phone) VALUES (?, ?, ?)",
+                           [(contact_id, i, p.value) for i, p in enumerate(record.phones)])
+    connection.executemany("INSERT INTO emails(contact_id, position, email) VALUES (?, ?, ?)",
+                           [(contact_id, i, e.value) for i, e in enumerate(record.emails)])
+    if record.birthday:
+        birthday = record.birthday.value
+        connection.execute("INSERT INTO birthdays(contact_id, birthday, month_day) VALUES (?, ?, ?)",
+                           (contact_id, birthday.toordinal(), _month_day(birthday)))
+
+
+# ============================= ЗАПИСИ У БАЗІ =============================
+
+class _SqliteRecords(MutableMapping):
+    """
+    Відображення ім'я -> Record поверх таблиць SQLite (замість dict у UserDict).
+    Записи створюються лише на запит; живі об'єкти кешуються, щоб зберегти їхню ідентичність.
+    """
+    def __init__(self, book: "SqliteAddressBook") -> None:
+        self._book = book
+        self._db = book.connection
+        self._cache: weakref.WeakValueDictionary[str, Record] = weakref.WeakValueDictionary()
+
+    def __getitem__(self, name: str) -> Record:
+        record = self._cache.get(name)
+        if record is not None:
+            return record
+        row = self._db.execute("SELECT id FROM contacts WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        contact_id = row[0]
+        phones = [p for (p,) in self._db.execute(
+            "SELECT phone FROM phones WHERE contact_id = ? ORDER BY position", (contact_id,))]
+        emails = [e for (e,) in self._db.execute(
+            "SELECT email FROM emails WHERE contact_id = ? ORDER BY position", (contact_id,))]
+        birthday = self._db.execute(
+            "SELECT birthday FROM birthdays WHERE contact_id = ?", (contact_id,)).fetchone()
+        return self._build(name, phones, emails, birthday[0] if birthday else None)
+
+    def _build(self, name: str, phones: list[str], emails: list[str], birthday: int | None) -> Record:
+        """Створює об'єкт Record з рядків бази і прив'язує його до книги."""
+        record = Record(name)
+        # Поля заповнюються напряму: значення з бази вже перевірені на дублікати
+        record.phones = [Phone(phone) for phone in phones]
+        record.emails = [Email(email) for email in emails]
+        if birthday is not None:
+            record.birthday = Birthday(date.fromordinal(birthday))
+        record._book = self._book
+        self._cache[name] = record
+        return record
+
+    def __setitem__(self, name: str, record: Record) -> None:
+        """Вставляє новий контакт з усіма полями."""
+        _insert_record(self._db, record)
+        self._cache[name] = record
+
+    def __delitem__(self, name: str) -> None:
+        if self._db.execute("DELETE FROM contacts WHERE name = ?", (name,)).rowcount == 0:
+            raise KeyError(name)
+        self._cache.pop(name, None)
+
+    def __contains__(self, name: object) -> bool:
+        return self._db.execute("SELECT 1 FROM contacts WHERE name = ?", (name,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+
+    def __bool__(self) -> bool:
+        return self._db.execute("SELECT 1 FROM contacts LIMIT 1").fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for (name,) in self._db.execute("SELECT name FROM contacts ORDER BY id"):
+            yield name
+
+    def values(self) -> Iterator[Record]:
+        """Потоково читає всі записи трьома впорядкованими курсорами (без запиту на кожен контакт)."""
+        phones = self._db.execute("SELECT contact_id, phone FROM phones ORDER BY contact_id, position")
+        emails = self._db.execute("SELECT contact_id, email FROM emails ORDER BY contact_id, position")
+        birthdays = self._db.execute("SELECT contact_id, birthday FROM birthdays ORDER BY contact_id")
+        next_phone, next_email, next_birthday = phones.fetchone(), emails.fetchone(), birthdays.fetchone()
+        for contact_id, name in self._db.execute("SELECT id, name FROM contacts ORDER BY id"):
+            contact_phones, contact_emails, birthday = [], [], None
+            while next_phone and next_phone[0] == contact_id:
+                contact_phones.append(next_phone[1])
+                next_phone = phones.fetchone()
+            while next_email and next_email[0] == contact_id:
+                contact_emails.append(next_email[1])
+                next_email = emails.fetchone()
+            if next_birthday and next_birthday[0] == contact_id:
+                birthday = next_birthday[1]
+                next_birthday = birthdays.fetchone()
+            record = self._cache.get(name)
+            yield record if record is not None else self._build(name, contact_phones, contact_emails, birthday)
+
+    def items(self) -> Iterator[tuple[str, Record]]:
+        for record in self.values():
+            yield record.name.value, record
+
+
+# ============================= АДРЕСНА КНИГА НА SQLITE =============================
+
+class SqliteAddressBook(AddressBook):
+    """
+    Адресна книга, що зберігає записи у SQLite.
+    Пошук, додавання, видалення та вибірка днів народження виконуються індексованими запитами,
+    а зміни полів записів (через події Record) одразу пишуться у відповідні таблиці.
+    """
+    def __init__(self, connection: sqlite3.Connection) -> None:
+        self.connection = connection
+        super().__init__()
+        self.data = _SqliteRecords(self)
+        # Цифровий індекс телефонів у пам'яті (LIKE '%...%' не використовує індекси бази)
+        self._phone_digits = mdl.SubstringIndex(mdl.PHONE_GRAM_SIZE)
+
+    def __getstate__(self) -> dict:
+        raise TypeError("SqliteAddressBook зберігається у базі даних, а не через pickle")
+
+    def rebuild_indexes(self) -> None:
+        """Індекси полів підтримує сама база; скидаються лише кеш записів та ліниві індекси в пам'яті."""
+        self.data._cache.clear()
+        self._names.reset()
+        for order in self._orders.values():
+            order.reset()
+        self._phone_digits.reset()
+
+    def check_indexes(self, repair: bool = True) -> list[str]:
+        return []
+
+    def _find_by(self, field: str, value: str) -> list[Record]:
+        """Пошук власників значення за індексом phones_phone / emails_email."""
+        table, column = FIELD_TABLES[field]
+        rows = self.connection.execute(
+            f"SELECT DISTINCT c.name FROM {table} t JOIN contacts c ON c.id = t.contact_id "
+            f"WHERE t.{column} = ? ORDER BY c.name", (value,))
+        return [self.data[name] for name, in rows]
+
+    def find_by_phone(self, phone: str) -> list[Record]:
+        return self._find_by("phone", phone)
+
+    def find_by_email(self, email: str) -> list[Record]:
+        return self._find_by("email", email)
+
+    def _index_change(self, op: str, name: str, *args) -> None:
+        """Замість індексів у пам'яті записує зміну поля у таблиці бази (індекси пошуку та сортування - у пам'яті)."""
+        self._index_lookups(op, name, *args)
+        action, _, field = op.partition("_")
+        if field in FIELD_TABLES:
+            self._write_field(action, FIELD_TABLES[field], name, *args)
+        elif field == "birthday":
+            self._write_birthday(action, name, *args)
+        if self._phone_digits.built:
+            self._index_phone_digits(op, args)
+
+    def _index_phone_digits(self, op: str, args: tuple) -> None:
+        """Підтримує цифровий індекс: значення прибирається, лише коли в базі не лишилось такого телефону."""
+        added, removed = [], []
+        if op == "add_record" or op == "delete":
+            phones = [phone.value for phone in args[0].phones]
+            (added if op == "add_record" else removed).extend(phones)
+        elif op == "add_phone":
+            added.append(args[0])
+        elif op == "edit_phone":
+            added.append(args[1])
+            removed.append(args[2])
+        elif op == "remove_phone":
+            removed.append(args[1])
+        for phone in added:
+            self._phone_digits.add(phone)
+        for phone in removed:
+            if self.connection.execute("SELECT 1 FROM phones WHERE phone = ? LIMIT 1", (phone,)).fetchone() is None:
+                self._phone_digits.discard(phone)
+
+    def _order_entries(self) -> Iterator[tuple[str, date | None]]:
+        """Для сортування потрібні лише імена та дати - без побудови записів."""
+        rows = self.connection.execute(
+            "SELECT c.name, b.birthday FROM contacts c LEFT JOIN birthdays b ON b.contact_id = c.id")
+        for name, birthday in rows:
+            yield name, date.fromordinal(birthday) if birthday is not None else None
+
+    def search_phones(self, digits: str) -> dict[str, list[Record]]:
+        with self._lazy:
+            if not self._phone_digits.built:
+                self._phone_digits.build(phone for phone, in self.connection.execute("SELECT DISTINCT phone FROM phones"))
+            phones = self._phone_digits.search(digits)
+        return {phone: self.find_by_phone(phone) for phone in phones}
+
+    def _write_field(self, action: str, table: tuple[str, str], name: str, *args) -> None:
+        """
+        Телефони та email зберігаються однаково, з позицією для індексних команд.
+        Рядок змінюється і видаляється за значенням: подія видалення за значенням не несе позиції.
+        """
+        table, column = table
+        if action == "add":
+            self.connection.execute(
+                f"INSERT INTO {table}(contact_id, position, {column}) "
+                f"SELECT id, (SELECT COUNT(*) FROM {table} WHERE contact_id = contacts.id), ? "
+                f"FROM contacts WHERE name = ?", (args[0], name))
+        elif action == "edit":
+            _index, value, old_value = args
+            self.connection.execute(
+                f"UPDATE {table} SET {column} = ? WHERE contact_id = {CONTACT_ID} AND {column} = ?",
+                (value, name, old_value))
+        elif action == "remove":
+            # За значенням (унікальним у межах контакту): видалення за значенням не обчислює позицію
+            old_value = args[1]
+            self.connection.execute(
+                f"UPDATE {table} SET position = position - 1 WHERE contact_id = {CONTACT_ID} AND position > "
+                f"(SELECT position FROM {table} WHERE contact_id = {CONTACT_ID} AND {column} = ?)",
+                (name, name, old_value))
+            self.connection.execute(
+                f"DELETE FROM {table} WHERE contact_id = {CONTACT_ID} AND {column} = ?", (name, old_value))
+
+    def _write_birthday(self, action: str, name: str, *args) -> None:
+        if action == "set":
+            birthday = args[0]
+            self.connection.execute(
+                f"INSERT OR REPLACE INTO birthdays(contact_id, birthday, month_day) VALUES ({CONTACT_ID}, ?, ?)",
+                (name, birthday.toordinal(), _month_day(birthday)))
+        elif action == "remove":
+            self.connection.execute(f"DELETE FROM birthdays WHERE contact_id = {CONTACT_ID}", (name,))
+
+    def get_upcoming_birthdays(self, days: int = 7, leap_day: mdl.LeapDayPolicy | None = None) -> list[dict[str, str]]:
+        """
+        Вибирає за індексом month_day лише дні народження з вікна (та 29 лютого, яке може
+        переноситися), а порядок і дати привітання визначає той самий календар, що й у AddressBook.
+        """
+        today = date.today()
+        query = ("SELECT c.name, b.birthday, b.month_day FROM birthdays b JOIN contacts c ON c.id = b.contact_id "
+                 "{where} ORDER BY c.name")
+        if days >= 366:
+            rows = self.connection.execute(query.format(where=""))
+        else:
+            first, last = _month_day(today), _month_day(today + timedelta(days=days - 1))
+            # Вікно може переходити через Новий рік
+            condition = "BETWEEN ? AND ?" if first <= last else ">= ? OR b.month_day <= ?"
+            rows = self.connection.execute(
+                query.format(where=f"WHERE b.month_day {condition} OR b.month_day = 229"), (first, last))
+        by_day: dict[tuple[int, int], list[tuple[str, int]]] = {}
+        for name, birthday, month_day in rows:
+            by_day.setdefault(divmod(month_day, 100), []).append((name, birthday))
+        upcoming = []
+        for ordinal, keys in mdl.calendar_window(today, days, leap_day):
+            for key in keys:
+                for name, birthday in by_day.get(key, ()):
+                    upcoming.append(self._greeting(name, date.fromordinal(birthday), date.fromordinal(ordinal)))
+        return upcoming
+
+
+# ============================= СХОВИЩЕ =============================
+
+def connect(filename: str = DEFAULT_DB_FILENAME) -> sqlite3.Connection:
+    """Відкриває (і за потреби створює) базу контактів."""
+    # Сервер виконує команди у пулі потоків; одночасний доступ впорядковує блокування сховища.
+    # Запис, який тримає інший процес, чекаємо стільки ж, скільки блокування файлу контактів
+    connection = sqlite3.connect(filename, timeout=mdl.LOCK_TIMEOUT, check_same_thread=False)
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA synchronous = NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def migrate_pickle(pickle_filename: str, connection: sqlite3.Connection) -> int:
+    """
+    Переносить книгу з файлу pickle у базу SQLite однією транзакцією.
+
+    Returns:
+        int: Кількість перенесених контактів.
+    """
+    count = 0
+    for record in mdl.load_contacts(pickle_filename).data.values():
+        try:
+            _insert_record(connection, record)
+            count += 1
+        except sqlite3.IntegrityError:
+            print(f"Контакт '{record.name.value}' вже є у базі, пропущено.")
+    connection.commit()
+    return count
+
+
+@contextmanager
+def _busy_error(filename: str):
+    """«database is locked» (інший процес тримає запис довше за LOCK_TIMEOUT) -> StorageException(FILE_BUSY)."""
+    try:
+        yield
+    except sqlite3.OperationalError as e:
+        if "database is locked" not in str(e):
+            raise
+        raise mdl.StorageException(mdl.ModelError.FILE_BUSY, filename=filename) from e
+
+
+class SqliteStorage(mdl.SnapshotStorage):
+    """
+    Зберігання у SQLite: зміни пишуться одразу, commit лише фіксує транзакцію.
+    Покоління (backups > 0) знімаються при відкритті бази - по одному на сеанс роботи.
+    """
+    def __init__(self, filename: str = DEFAULT_DB_FILENAME, backups: int = 0,
+                 pickle_filename: str = mdl.DEFAULT_FILENAME) -> None:
+        super().__init__(filename, backups)
+        self.pickle_filename = pickle_filename # Звідки переносити контакти при першому запуску
+        self.connection: sqlite3.Connection | None = None
+        self._data_version = None # PRAGMA data_version: змінюється після транзакцій інших з'єднань
+        self._writing = 0 # Глибина вкладених writing (пакетний режим огортає ним усі команди)
+
+    def load(self) -> SqliteAddressBook:
+        is_new = not os.path.exists(self.filename)
+        self.connection = connect(self.filename)
+        if is_new and os.path.exists(self.pickle_filename):
+            count = migrate_pickle(self.pickle_filename, self.connection)
+            print(f"Перенесено {count} контактів з '{self.pickle_filename}' у '{self.filename}'.")
+        elif self.backups > 0:
+            self._backup()
+        self.book = SqliteAddressBook(self.connection)
+        self._data_version = self._current_signature()
+        return self.book
+
+    def _backup(self) -> None:
+        """
+        Копіює базу у покоління filename.1 (старіші зсуваються до filename.N).
+        Копіювання - через backup API SQLite: файл бази не можна просто скопіювати,
+        бо частина змін може бути ще у WAL, а інший процес - писати в цей момент.
+        """
+        tmp_filename = f"{self.filename}.tmp{os.getpid()}"
+        try:
+            target = sqlite3.connect(tmp_filename)
+            try:
+                self.connection.backup(target)
+            finally:
+                target.close()
+            os.replace(tmp_filename, mdl._shift_backups(self.filename, self.backups))
+        except (sqlite3.Error, OSError) as e:
+            print(f"Не вдалося зберегти резервну копію бази '{self.filename}': {e}")
+            try:
+                os.remove(tmp_filename)
+            except OSError:
+                pass
+
+    def _current_signature(self) -> int:
+        return self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def refresh(self, book: AddressBook) -> bool:
+        """Якщо базу змінив інший процес, скидає кеш записів і ліниві індекси (самі дані читаються з бази)."""
+        if book.in_transaction or (version := self._current_signature()) == self._data_version:
+            return False
+        self._data_version = version
+        book.rebuild_indexes()
+        return True
+
+    @contextmanager
+    def writing(self, book: AddressBook):
+        """
+        Право запису на час модифікуючої команди: BEGIN IMMEDIATE одразу бере блокування запису SQLite,
+        тож інші процеси не пишуть, поки команда підтягує їхні зміни (refresh) і пише свої.
+        Транзакція SQLite фіксується при виході з зовнішнього writing, а якщо команда відкрила
+        транзакцію книги - лишається відкритою до її завершення.
+        Кидає StorageException(FILE_BUSY), якщо інший процес тримає запис довше за LOCK_TIMEOUT.
+        """
+        if not self.connection.in_transaction:
+            with _busy_error(self.filename):
+                self.connection.execute("BEGIN IMMEDIATE")
+        self._writing += 1
+        try:
+            yield
+        finally:
+            self._writing -= 1
+            if not self._writing and not book.in_transaction:
+                self.commit(book)
+
+    def commit(self, book: AddressBook) -> None:
+        with _busy_error(self.filename):
+            self.connection.commit()
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.commit()
+            self.connection.close()
+            self.connection = None
@@ -0,0 +1,52 @@
+import os
+import sys
+from datetime import date
+
+import pytest
+
+# Модулі програми лежать у корені репозиторію (без пакета)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model import AddressBook, Record # noqa: E402
+
+
+@pytest.fixture
+def contacts_file(tmp_path) -> str:
+    """Шлях до файлу контактів у тимчасовому каталозі (сам файл не створюється)."""
+    return str(tmp_path / "contacts.pkl")
+
+
+@pytest.fixture
+def make_record():
+    """Фабрика записів: make_record(ім'я, телефони, emails, дата народження)."""
+    def make(name: str, phones=(), emails=(), birthday: date | None = None) -> Record:
+        record = Record(name)
+        for phone in phones:
+            record.add_phone(phone)
+        for email in emails:
+            record.add_email(email)
+        if birthday is not None:
+            record.add_birthday(birthday)
+        return record
+    return make
+
+
+@pytest.fixture
+def sample_book(make_record) -> AddressBook:
+    """Невелика книга з усіма видами полів (порядок телефонів навмисно не відсортований)."""
+    book = AddressBook()
+    book.add_record(make_record("Ann", ["0000000003", "0000000001", "0000000002"], ["ann@mail.com"], date(1990, 2, 28)))
+    book.add_record(make_record("Тарас Шевченко", ["0501234567"], [], date(1814, 3, 9)))
+    book.add_record(make_record("Bob", [], ["bob@mail.com", "b@work.org"]))
+    book.journal_seq = 7
+    return book
+
+
+@pytest.fixture
+def contents():
+    """Вміст книги у простих типах - для порівняння книг між собою."""
+    def extract(book: AddressBook) -> dict:
+        return {name: ([p.value for p in record.phones], [e.value for e in record.emails],
+                       record.birthday.value if record.birthday else None)
+                for name, record in book.data.items()}
+    return extract
@@ -0,0 +1,78 @@
+import pytest
+
+from model import AddressBook, BackgroundStorage, SnapshotStorage, load_contacts, save_contacts
+
+
+@pytest.fixture
+def shared_file(contacts_file, make_record) -> str:
+    """Файл, який відкривають два «процеси» (два сховища)."""
+    book = AddressBook()
+    book.add_record(make_record("Ann", ["0000000001", "0000000002", "0000000003"], ["ann@mail.com"]))
+    book.add_record(make_record("Bob", ["0000000005"]))
+    save_contacts(book, contacts_file)
+    return contacts_file
+
+
+@pytest.fixture
+def background(shared_file):
+    # Затримка більша за тест: зберігає лише явний flush/close
+    storage = BackgroundStorage(shared_file, delay_ms=60_000)
+    yield storage
+    storage.close()
+
+
+def change_elsewhere(filename: str, change) -> None:
+    """Інший процес відкриває файл, змінює книгу і зберігає її."""
+    other = SnapshotStorage(filename)
+    book = other.load()
+    change(book)
+    other.commit(book)
+    other.close()
+
+
+def test_merge_applies_phone_changes_by_value(background, shared_file, contents, capsys):
+    book = background.load()
+    book.find("Ann").remove_phone(2)                 # 0000000003
+    book.find("Ann").edit_phone(1, "0000000009")     # 0000000002 -> 0000000009
+    change_elsewhere(shared_file, lambda other: other.find("Ann").remove_phone(0)) # 0000000001
+
+    background.flush()
+    expected = {"Ann": (["0000000009"], ["ann@mail.com"], None), "Bob": (["0000000005"], [], None)}
+    assert contents(book) == expected
+    assert contents(load_contacts(shared_file)) == expected
+    assert "відкинуто" not in capsys.readouterr().out
+
+
+def test_merge_skips_changes_of_removed_values(background, shared_file, make_record, contents, capsys):
+    book = background.load()
+    book.find("Ann").edit_phone(1, "0000000009")     # 0000000002 -> 0000000009
+    book.find("Bob").remove_phone(0)
+    book.add_record(make_record("Cid", ["0000000007"]))
+
+    def change(other: AddressBook) -> None:
+        other.find("Ann").remove_phone(1)            # 0000000002 - той, що правимо
+        other.find("Ann").add_phone("0000000004")
+        other.find("Bob").remove_phone(0)
+    change_elsewhere(shared_file, change)
+
+    background.flush()
+    expected = {
+        "Ann" : (["0000000001", "0000000003", "0000000004"], ["ann@mail.com"], None),
+        "Bob" : ([], [], None),
+        "Cid" : (["0000000007"], [], None),
+    }
+    assert contents(book) == expected
+    assert contents(load_contacts(shared_file)) == expected
+    assert "2 змін(и), що суперечать йому, відкинуто" in capsys.readouterr().out
+
+
+def test_merge_keeps_contacts_deleted_elsewhere_deleted(background, shared_file, contents):
+    book = background.load()
+    book.find("Bob").add_phone("0000000006")
+    book.find("Ann").add_email("a@work.org")
+    change_elsewhere(shared_file, lambda other: other.delete("Bob"))
+
+    background.close()
+    assert contents(load_contacts(shared_file)) == {
+        "Ann": (["0000000001", "0000000002", "0000000003"], ["ann@mail.com", "a@work.org"], None),
+    }
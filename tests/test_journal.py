@@ -0,0 +1,113 @@
+import json
+
+from model import JOURNAL_SUFFIX, JournalStorage, _read_snapshot, load_contacts
+
+
+def crash(storage: JournalStorage) -> None:
+    """Імітує аварійне завершення: журнал не ущільнюється, файл просто закривається."""
+    storage._file.close()
+    storage._file = None
+
+
+def journal_seqs(contacts_file: str) -> list[int]:
+    with open(contacts_file + JOURNAL_SUFFIX, "rb") as file:
+        return [json.loads(line)[0] for line in file]
+
+
+def test_replay_ignores_truncated_last_line(contacts_file, make_record, contents):
+    storage = JournalStorage(contacts_file)
+    book = storage.load()
+    book.add_record(make_record("Ann", ["0000000001"]))
+    storage.commit(book)
+    book.find("Ann").add_phone("0000000002")
+    storage.commit(book)
+    crash(storage)
+    journal = contacts_file + JOURNAL_SUFFIX
+    with open(journal, "rb") as file:
+        valid_length = len(file.read())
+    with open(journal, "ab") as file:
+        file.write(b'[3,"add_phone","Ann","00000') # Збій посеред запису рядка
+
+    storage = JournalStorage(contacts_file)
+    book = storage.load()
+    assert contents(book) == {"Ann": (["0000000001", "0000000002"], [], None)}
+    with open(journal, "rb") as file:
+        assert len(file.read()) == valid_length # Хвіст відрізано
+
+    # Наступний запис не злипається з обірваним хвостом і переживає перезапуск
+    book.find("Ann").add_email("ann@mail.com")
+    storage.commit(book)
+    crash(storage)
+    assert journal_seqs(contacts_file) == [1, 2, 3]
+    assert contents(load_contacts(contacts_file)) == {"Ann": (["0000000001", "0000000002"], ["ann@mail.com"], None)}
+
+
+def test_compaction_keeps_seq_numbers(contacts_file, make_record):
+    storage = JournalStorage(contacts_file, compact_every=3)
+    book = storage.load()
+    for name in ("Ann", "Bob", "Cid", "Dan", "Eve"):
+        book.add_record(make_record(name, ["0000000001"]))
+        storage.commit(book)
+    crash(storage)
+
+    # Після третього запису журнал ущільнено: знімок пам'ятає номер, журнал продовжує нумерацію
+    snapshot = _read_snapshot(contacts_file)
+    assert snapshot.journal_seq == 3
+    assert sorted(snapshot.data) == ["Ann", "Bob", "Cid"]
+    assert journal_seqs(contacts_file) == [4, 5]
+
+    book = load_contacts(contacts_file)
+    assert book.journal_seq == 5
+    assert sorted(book.data) == ["Ann", "Bob", "Cid", "Dan", "Eve"]
+
+
+def test_entries_already_in_snapshot_are_not_applied_twice(contacts_file, make_record, contents, capsys):
+    storage = JournalStorage(contacts_file)
+    book = storage.load()
+    book.add_record(make_record("Ann", ["0000000001"]))
+    book.find("Ann").add_phone("0000000002")
+    book.find("Ann").remove_phone(0)
+    storage.commit(book)
+    book.add_record(make_record("Bob"))
+    storage.commit(book)
+    with open(contacts_file + JOURNAL_SUFFIX, "rb") as file:
+        journal = file.read()
+    storage.compact()
+    crash(storage)
+    # Збій між записом знімка та очищенням журналу: старі записи лишились у файлі
+    with open(contacts_file + JOURNAL_SUFFIX, "wb") as file:
+        file.write(journal)
+    capsys.readouterr()
+
+    book = load_contacts(contacts_file)
+    assert contents(book) == {"Ann": (["0000000002"], [], None), "Bob": ([], [], None)}
+    assert book.journal_seq == 4
+    assert "Не вдалося застосувати" not in capsys.readouterr().out
+
+
+def test_replay_reads_legacy_position_entries(contacts_file, contents):
+    lines = [
+        [1, "add_record", "Ann", ["0000000001", "0000000002", "0000000003"], [], None],
+        [2, "edit_phone", "Ann", 0, "0000000009"], # Старий формат: [індекс, нове]
+        [3, "remove_phone", "Ann", 1],             # Старий формат: індекс
+    ]
+    with open(contacts_file + JOURNAL_SUFFIX, "w", encoding="utf-8") as file:
+        file.writelines(json.dumps(line) + "\n" for line in lines)
+
+    book = load_contacts(contacts_file)
+    assert contents(book) == {"Ann": (["0000000009", "0000000003"], [], None)}
+    assert book.journal_seq == 3
+
+
+def test_value_entries_touch_the_changed_value(contacts_file, contents):
+    # Позиції у записах не збігаються з книгою (її змінили інші записи) - діє значення
+    lines = [
+        [1, "add_record", "Ann", ["0000000001", "0000000002", "0000000003"], [], None],
+        [2, "remove_phone", "Ann", "0000000003"],
+        [3, "edit_phone", "Ann", 2, "0000000009", "0000000002"],
+    ]
+    with open(contacts_file + JOURNAL_SUFFIX, "w", encoding="utf-8") as file:
+        file.writelines(json.dumps(line) + "\n" for line in lines)
+
+    book = load_contacts(contacts_file)
+    assert contents(book) == {"Ann": (["0000000001", "0000000009"], [], None)}
@@ -0,0 +1,182 @@
+import copyreg
+import io
+import pickle
+import struct
+
+import pytest
+
+import model
+from model import (SNAPSHOT_MAGIC, SNAPSHOT_VERSION, AddressBook, Field, Record, _pack_column,
+                   decode_book, encode_book, load_contacts, save_contacts)
+
+
+class BaselinePickler(pickle.Pickler):
+    """Pickle у форматі першої версії програми: поля і записи зі словником атрибутів, книга без journal_seq."""
+    def reducer_override(self, obj):
+        if isinstance(obj, Field):
+            state = {'_value': obj.value}
+        elif isinstance(obj, Record):
+            state = {'name': obj.name, 'phones': obj.phones, 'emails': obj.emails, 'birthday': obj.birthday}
+        elif isinstance(obj, AddressBook):
+            state = {'data': dict(obj.data)}
+        else:
+            return NotImplemented
+        return copyreg.__newobj__, (type(obj),), state
+
+
+def baseline_pickle(book: AddressBook) -> bytes:
+    buffer = io.BytesIO()
+    BaselinePickler(buffer).dump(book)
+    return buffer.getvalue()
+
+
+def assert_indexes_work(book: AddressBook) -> None:
+    """Індекси відновленої книги відповідають записам."""
+    assert book.check_indexes(repair=False) == []
+    assert [record.name.value for record in book.find_by_phone("0000000001")] == ["Ann"]
+    assert [record.name.value for record in book.find_by_email("b@work.org")] == ["Bob"]
+    assert book.find("Ann")._book is book
+
+
+def test_binary_round_trip(sample_book, contents):
+    book = decode_book(encode_book(sample_book))
+    assert contents(book) == contents(sample_book)
+    assert list(book.data) == list(sample_book.data)
+    assert book.journal_seq == 7
+    assert_indexes_work(book)
+
+
+def test_binary_round_trip_of_empty_book(contents):
+    book = decode_book(encode_book(AddressBook()))
+    assert contents(book) == {}
+    assert book.journal_seq == 0
+
+
+# Формати, якими книгу зберігали попередні версії програми
+EARLIER_FORMATS = {
+    "baseline-pickle" : baseline_pickle,   # Поля зі словником атрибутів, без journal_seq
+    "slots-pickle"    : pickle.dumps,      # Поля з __slots__, до двійкового знімка
+    "binary"          : encode_book,       # Двійковий знімок поточної версії
+}
+
+
+@pytest.mark.parametrize("dump", EARLIER_FORMATS.values(), ids=EARLIER_FORMATS.keys())
+def test_loads_earlier_formats(dump, sample_book, contents, contacts_file):
+    with open(contacts_file, "wb") as file:
+        file.write(dump(sample_book))
+
+    book = load_contacts(contacts_file)
+    assert contents(book) == contents(sample_book)
+    assert_indexes_work(book)
+    if dump is baseline_pickle:
+        assert book.journal_seq == 0
+    # Наступне збереження - вже двійковий знімок поточної версії
+    assert save_contacts(book, contacts_file)
+    with open(contacts_file, "rb") as file:
+        data = file.read()
+    assert data.startswith(SNAPSHOT_MAGIC)
+    assert contents(decode_book(data)) == contents(sample_book)
+
+
+def test_migrations_run_from_each_earlier_version(monkeypatch, sample_book, contents):
+    data = encode_book(sample_book) # Знімок версії SNAPSHOT_VERSION - для програми з версією +2 він «старий»
+    applied = []
+
+    def first(header, columns):
+        applied.append(SNAPSHOT_VERSION)
+        # Міграція змінює стовпці на місці - декодер бачить вже змінені
+        columns["birthdays"] = memoryview(_pack_column("i32", [0] * header["count"]))
+
+    def second(header, columns):
+        applied.append(SNAPSHOT_VERSION + 1)
+        header["journal_seq"] += 1
+
+    monkeypatch.setattr(model, "SNAPSHOT_VERSION", SNAPSHOT_VERSION + 2)
+    monkeypatch.setitem(model.SNAPSHOT_MIGRATIONS, SNAPSHOT_VERSION, first)
+    monkeypatch.setitem(model.SNAPSHOT_MIGRATIONS, SNAPSHOT_VERSION + 1, second)
+
+    book = decode_book(data)
+    assert applied == [SNAPSHOT_VERSION, SNAPSHOT_VERSION + 1]
+    assert book.journal_seq == 8
+    assert contents(book) == {name: (phones, emails, None) for name, (phones, emails, _) in contents(sample_book).items()}
+    assert_indexes_work(book)
+
+
+def test_every_earlier_version_has_migration():
+    # Кожна попередня версія повинна мати міграцію на наступну
+    assert all(version in model.SNAPSHOT_MIGRATIONS for version in range(1, SNAPSHOT_VERSION))
+
+
+
+# ============================= ПОШКОДЖЕНІ ЗНІМКИ =============================
+
+def corrupt(data: bytes, kind: str) -> bytes:
+    """Псує двійковий знімок одним зі способів, що трапляються на практиці."""
+    prefix = model._SNAPSHOT_PREFIX
+    if kind == "magic":
+        return b"XXXX" + data[4:]
+    if kind == "version": # Знімок новішої програми
+        _, _, header_size = prefix.unpack_from(data)
+        return prefix.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION + 1, header_size) + data[prefix.size:]
+    if kind == "column": # Обрізано посеред останнього стовпця
+        return data[:-3]
+    if kind == "header": # Обрізано ще до заголовка
+        return data[:prefix.size - 1]
+    raise ValueError(kind)
+
+
+@pytest.mark.parametrize("kind, exception, message", [
+    ("magic", ValueError, "не є знімком"),
+    ("version", ValueError, f"версії {SNAPSHOT_VERSION + 1}"),
+    ("column", ValueError, "обрізано на стовпці 'birthdays'"),
+    ("header", struct.error, "buffer"),
+])
+def test_decode_rejects_corrupt_snapshot(kind, exception, message, sample_book):
+    with pytest.raises(exception, match=message) as error:
+        decode_book(corrupt(encode_book(sample_book), kind))
+    assert isinstance(error.value, model.SNAPSHOT_ERRORS) # Такі помилки перехоплюють завантажувачі
+
+
+@pytest.mark.parametrize("kind", ["magic", "version", "column", "header"])
+def test_corrupt_snapshot_falls_back_to_previous_generation(kind, sample_book, make_record, contents,
+                                                           contacts_file, capsys):
+    previous = contents(sample_book)
+    save_contacts(sample_book, contacts_file)
+    sample_book.add_record(make_record("Cid"))
+    save_contacts(sample_book, contacts_file, backups=2) # Попереднє покоління - у .1
+    with open(contacts_file, "rb") as file:
+        data = file.read()
+    with open(contacts_file, "wb") as file:
+        file.write(corrupt(data, kind))
+
+    # Читання одного файлу кидає лише помилки з SNAPSHOT_ERRORS - їх і перехоплюють завантажувачі
+    with pytest.raises(model.SNAPSHOT_ERRORS):
+        model._read_snapshot(contacts_file)
+    with pytest.raises(model.SNAPSHOT_ERRORS):
+        model._load_snapshot(contacts_file, fallback=False) # Перечитування живої книги - без підміни
+
+    book = load_contacts(contacts_file)
+    assert contents(book) == previous
+    assert f"Завантажено попереднє покоління '{contacts_file}.1'" in capsys.readouterr().out
+
+
+def test_corrupt_snapshot_without_backups_gives_empty_book(sample_book, contacts_file, capsys):
+    with open(contacts_file, "wb") as file:
+        file.write(corrupt(encode_book(sample_book), "column"))
+
+    book = load_contacts(contacts_file)
+    assert len(book) == 0
+    assert "Створення нової адресної книги" in capsys.readouterr().out
+
+
+def test_reload_of_corrupt_snapshot_keeps_live_book(sample_book, contacts_file, contents):
+    save_contacts(sample_book, contacts_file)
+    storage = model.SnapshotStorage(contacts_file)
+    book = storage.load()
+    with open(contacts_file, "wb") as file:
+        file.write(corrupt(encode_book(sample_book), "version"))
+
+    with pytest.raises(model.StorageException) as error:
+        storage.refresh(book)
+    assert error.value.error_code == model.ModelError.RELOAD_FAILED
+    assert contents(book) == contents(sample_book)
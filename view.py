@@ -1,7 +1,13 @@
 import os
+import re
+import sys
+import threading
+from contextlib import contextmanager
+from io import StringIO
+from string import Formatter
 import random as rnd
-from datetime import datetime, date, timedelta
-from model import AddressBook, Record, ModelError # Імпортуємо ModelError для використання ключів повідомлень
+from datetime import date
+from model import AddressBook, Record, ModelError, format_date # Імпортуємо ModelError для використання ключів повідомлень
 
 # ============================ КОЛЬОРИ ТА ФОРМАТУВАННЯ ============================
 
@@ -19,6 +25,15 @@ class Colors:
     END       = '\033[0m'
 
 
+# Колонки таблиці днів народження
+BIRTHDAYS_ROW = "{:<20} {:<18} {:<5}"
+BIRTHDAYS_TABLE_HEADER = BIRTHDAYS_ROW.format("Ім'я", "Дата привітання", "День тижня")
+
+# Колонки таблиці метрик команд (затримки в мс)
+STATS_ROW = "{:<14} {:<8} {:>7} {:>9} {:>9} {:>9} {:>9}"
+STATS_TABLE_HEADER = STATS_ROW.format("Команда", "Фаза", "Разів", "Середнє", "p50 ≤", "p95 ≤", "Макс")
+
+
 # ============================ СЛОВНИК ПОВІДОМЛЕНЬ ============================
 # Ключі відповідають значенням ModelError Enum
 
@@ -38,6 +53,14 @@ MESSAGES = {
     ModelError.EMPTY_CONTACTS.value        : f"ℹ️ {Colors.BLUE}Адресна книга порожня.{Colors.END}",
     ModelError.INVALID_INDEX.value         : f"⛔ {Colors.RED}Вказано недійсний індекс: {{index}}.{Colors.END}",
     ModelError.EMPTY_CONTACT_FIELDS.value  : f"ℹ️ {Colors.BLUE}Контакт {{name}} не містить телефонів чи email.{Colors.END}",
+    ModelError.FILE_ERROR.value            : f"⛔ {Colors.RED}Помилка роботи з файлом '{{filename}}': {{error_message}}{Colors.END}",
+    ModelError.UNSUPPORTED_FORMAT.value    : f"⛔ {Colors.RED}Непідтримуваний формат файлу '{{filename}}'. Підтримуються: {{formats}} (можна .gz).{Colors.END}",
+    ModelError.TRANSACTION_ACTIVE.value    : f"😲 {Colors.YELLOW}Транзакцію вже розпочато. Завершіть її командою 'commit' або 'rollback'.{Colors.END}",
+    ModelError.NO_TRANSACTION.value        : f"🤔 {Colors.YELLOW}Немає відкритої транзакції. Почніть її командою 'begin'.{Colors.END}",
+    ModelError.NOTHING_TO_UNDO.value       : f"ℹ️ {Colors.BLUE}Немає змін, які можна скасувати.{Colors.END}",
+    ModelError.NOTHING_TO_REDO.value       : f"ℹ️ {Colors.BLUE}Немає скасованих змін, які можна повторити.{Colors.END}",
+    ModelError.FILE_BUSY.value             : f"⛔ {Colors.RED}Файл '{{filename}}' зайнятий іншим процесом (можливо, у ньому відкрита транзакція). Спробуйте пізніше.{Colors.END}",
+    ModelError.RELOAD_FAILED.value         : f"⛔ {Colors.RED}Файл '{{filename}}' змінено іншим процесом, але прочитати його не вдалося: {{error_message}}. Книгу не оновлено, команди зі змінами відхиляються.{Colors.END}",
 
     "invalid_command"         : f"😕 {Colors.YELLOW}Невідома команда: '{{command}}'. Введіть '?' для допомоги.{Colors.END}",
     "invalid_arguments"       : f"🤔 {Colors.YELLOW}Невірні аргументи для команди '{{command}}'. Очікується: {{expected}}{Colors.END}",
@@ -54,6 +77,31 @@ MESSAGES = {
     "phone_deleted"           : f"✅ {Colors.GREEN}Телефон за індексом {{index}} у '{{name}}' видалено.{Colors.END}",
     "email_deleted"           : f"✅ {Colors.GREEN}Email за індексом {{index}} у '{{name}}' видалено.{Colors.END}",
     "birthday_deleted"        : f"✅ {Colors.GREEN}День народження для '{{name}}' видалено.{Colors.END}",
+    "import_done"             : f"✅ {Colors.GREEN}Імпорт завершено: додано {{added}}, оновлено {{updated}}, рядків з помилками {{failed}}.{Colors.END}",
+    "import_interrupted"      : f"⛔ {Colors.RED}Імпорт перервано помилкою читання файлу: {{error_message}}. Прочитані до неї рядки збережено: додано {{added}}, оновлено {{updated}}, рядків з помилками {{failed}}.{Colors.END}",
+    "import_line_error"       : f"{Colors.YELLOW}  Рядок {{line}}:{Colors.END} {{message}}",
+    "import_more_errors"      : f"{Colors.YELLOW}  ...та ще {{count}} помилок.{Colors.END}",
+    "export_done"             : f"✅ {Colors.GREEN}Експортовано {{count}} контактів у '{{filename}}'.{Colors.END}",
+    "server_unsupported"      : f"😕 {Colors.YELLOW}Команда '{{command}}' недоступна у режимі сервера: книга спільна для всіх клієнтів.{Colors.END}",
+    "server_forbidden"        : f"⛔ {Colors.RED}Команда '{{command}}' недоступна у режимі сервера: вона працює з файлами на машині сервера.{Colors.END}",
+    "server_unavailable"      : f"⛔ {Colors.RED}Немає з'єднання з сервером {{address}}: {{error_message}}{Colors.END}",
+    "stats_header"            : f"⏱️ {Colors.BOLD}Затримки команд, мс:{Colors.END}",
+    "stats_table_header"      : f"{Colors.BOLD}{STATS_TABLE_HEADER}{Colors.END}",
+    "no_stats"                : f"ℹ️ {Colors.BLUE}Ще не виконано жодної команди.{Colors.END}",
+    "metrics_disabled"        : f"ℹ️ {Colors.BLUE}Метрики вимкнено. Запустіть програму з --metrics.{Colors.END}",
+    "metrics_reset"           : f"✅ {Colors.GREEN}Метрики очищено.{Colors.END}",
+    "profiling_enabled"       : f"🔬 {Colors.BLUE}Профілювання ввімкнено: команди, довші за {{threshold:g}} мс, зберігаються у '{{directory}}'.{Colors.END}",
+    "profiling_disabled"      : f"ℹ️ {Colors.BLUE}Профілювання вимкнено. Увімкнути: 'profile on [мс]'.{Colors.END}",
+    "profile_saved"           : f"🔬 {Colors.YELLOW}Команда '{{command}}' тривала {{elapsed:.1f}} мс - профіль збережено у '{{filename}}'.{Colors.END}",
+    "profile_save_failed"     : f"⛔ {Colors.RED}Не вдалося зберегти профіль: {{error_message}}{Colors.END}",
+    "contacts_reloaded"       : f"🔄 {Colors.BLUE}Файл контактів змінено іншим процесом - книгу оновлено.{Colors.END}",
+    "transaction_started"     : f"ℹ️ {Colors.BLUE}Транзакцію розпочато: зміни буде збережено лише після 'commit'.{Colors.END}",
+    "transaction_committed"   : f"✅ {Colors.GREEN}Транзакцію завершено, збережено змін: {{count}}.{Colors.END}",
+    "transaction_rolled_back" : f"✅ {Colors.GREEN}Транзакцію скасовано, відкочено змін: {{count}}.{Colors.END}",
+    "undone"                  : f"↩️ {Colors.GREEN}Скасовано: '{{command}}'.{Colors.END}",
+    "redone"                  : f"↪️ {Colors.GREEN}Повторено: '{{command}}'.{Colors.END}",
+    "history_step_too_large"  : f"⚠️ {Colors.YELLOW}Зміни команди '{{command}}' більші за межу історії ({{limit}} байт): скасувати можна лише цю команду.{Colors.END}",
+    "transaction_aborted"     : f"⚠️ {Colors.YELLOW}Незавершену транзакцію скасовано, відкочено змін: {{count}}.{Colors.END}",
 
     "goodbye_message"         : f"👋 {Colors.GREEN}До побачення!{Colors.END}",
     "command_prompt"          : f"{Colors.BOLD}Введіть команду > {Colors.END}",
@@ -65,10 +113,22 @@ MESSAGES = {
     "contact_emails"          : "  📧 Emails: {emails_str}",
     "no_birthday"             : "  🎂 День народження: Не вказано",
     "contact_birthday"        : "  🎂 День народження: {birthday_str}",
-    "all_contacts_header"     : f"📖 {Colors.BOLD}Усі контакти в книзі:{Colors.END}",
+    "contacts_page_header"    : f"📖 {Colors.BOLD}Контакти, сторінка {{page}} з {{pages}}:{Colors.END}",
+    "page_out_of_range"       : f"ℹ️ {Colors.BLUE}Сторінки {{page}} немає, всього сторінок: {{pages}}.{Colors.END}",
     "contacts_count"          : f"📊 {Colors.BLUE}Всього контактів: {{count}}.{Colors.END}",
+    "search_header"           : f"🔎 {Colors.BOLD}Результати пошуку '{{query}}':{Colors.END}",
+    "search_result"           : f"  {{rank}}. {Colors.CYAN}{{name}}{Colors.END} {{phones}}",
+    "no_search_results"       : f"ℹ️ {Colors.BLUE}За запитом '{{query}}' нічого не знайдено.{Colors.END}",
+    "owners_header"           : f"🔎 {Colors.BOLD}Контакти зі значенням '{{value}}':{Colors.END}",
+    "no_owners"               : f"ℹ️ {Colors.BLUE}Жоден контакт не має значення '{{value}}'.{Colors.END}",
+    "phone_matches_header"    : f"🔎 {Colors.BOLD}Телефони, що містять '{{digits}}':{Colors.END}",
+    "phone_match"             : f"  {Colors.CYAN}{{phone}}{Colors.END} - {{names}}",
+    "more_phone_matches"      : f"{Colors.BLUE}  ...та ще {{count}} номерів. Уточніть запит.{Colors.END}",
+    "no_phone_matches"        : f"ℹ️ {Colors.BLUE}Телефонів, що містять '{{digits}}', не знайдено.{Colors.END}",
+    "birthdays_table_header"  : f"{Colors.BOLD}{BIRTHDAYS_TABLE_HEADER}{Colors.END}",
     "birthdays_header"        : f"🎉 {Colors.BOLD}Найближчі дні народження (наступні {{days}} днів):{Colors.END}",
     "no_upcoming_birthdays"   : f"ℹ️ {Colors.BLUE}На найближчі {{days}} днів немає днів народжень.{Colors.END}",
+    "batch_summary"           : f"⏱️ {Colors.BLUE}Виконано команд: {{commands}} (змін: {{changed}}) за {{total_ms:.1f}} мс, збереження {{save_ms:.1f}} мс, {{rate:.0f}} команд/с.{Colors.END}",
     "help_header"             : f"🆘 {Colors.BOLD}Список доступних команд:{Colors.END}",
 }
 
@@ -91,36 +151,121 @@ HELLO_OPTIONS = (
 # Дні тижня для гарного виводу днів народжень
 DAYS_NAMES = ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Нд']
 
+# ============================ БУФЕР ВИВОДУ ============================
+# Рядки накопичуються у буфері і виводяться одним записом на команду (flush).
+# Шаблони повідомлень готуються один раз - з кольорами або без (для виводу не в термінал).
+
+ANSI_CODES = re.compile(r"\033\[[0-9;]*m")
+COLOR_CODES = {name: code for name, code in vars(Colors).items() if name.isupper()}
+
+class _Output(threading.local):
+    """Буфер виводу окремий для кожного потоку: сервер виконує команди клієнтів паралельно."""
+    def __init__(self) -> None:
+        self.buffer: list[str] = []
+        self.stream = None # None - sys.stdout
+
+_output = _Output()
+_templates: dict[str, str] = {}
+_index_labels: list[str] = [] # "[i] " з кольором, для списків телефонів та email
+_parts: dict[str, tuple[str, str, str]] = {} # Шаблони з одним простим полем: (до поля, поле, після)
+_enabled = True
+_colors = True
+_terminal = True
+
+def configure(colors: bool = True, enabled: bool = True, terminal: bool = True):
+    """
+    Налаштовує вивід: colors=False прибирає ANSI-коди з усіх повідомлень,
+    enabled=False вмикає тихий режим (вивід відкидається),
+    terminal=False - вивід не в термінал (пакетний режим, перенаправлення): екран і курсор не керуються.
+    Кольори і керування терміналом незалежні: NO_COLOR вимикає лише кольори.
+    """
+    global _enabled, _colors, _terminal
+    _enabled, _colors, _terminal = enabled, colors, terminal
+    for name, code in COLOR_CODES.items():
+        setattr(Colors, name, code if colors else "")
+    _index_labels.clear()
+    _templates.clear()
+    _templates.update((key, template if colors else ANSI_CODES.sub("", template)) for key, template in MESSAGES.items())
+    # Шаблони з одним полем заповнюються конкатенацією - це помітно швидше за str.format
+    _parts.clear()
+    for key, template in _templates.items():
+        fields = [(field, spec, conversion) for _, field, spec, conversion in Formatter().parse(template)
+                  if field is not None]
+        if len(fields) == 1 and fields[0][0].isidentifier() and not fields[0][1] and not fields[0][2]:
+            prefix, _, suffix = template.partition("{" + fields[0][0] + "}")
+            _parts[key] = (prefix.replace("{{", "{").replace("}}", "}"), fields[0][0],
+                           suffix.replace("{{", "{").replace("}}", "}"))
+
+def write(text: str, end: str = "\n"):
+    """Додає текст до буфера виводу."""
+    if _enabled:
+        _output.buffer.append(text + end)
+
+def write_rendered(text: str):
+    """Додає вже відформатований вивід (наприклад, від сервера), прибираючи кольори, якщо їх вимкнено."""
+    write(text if _colors else ANSI_CODES.sub("", text), end="")
+
+def flush():
+    """Виводить накопичений буфер одним записом."""
+    stream = _output.stream or sys.stdout
+    if _output.buffer:
+        stream.write("".join(_output.buffer))
+        _output.buffer.clear()
+    stream.flush()
+
+@contextmanager
+def capture():
+    """Перехоплює вивід поточного потоку у StringIO (інші потоки пишуть як раніше)."""
+    previous, _output.stream = _output.stream, StringIO()
+    try:
+        yield _output.stream
+    finally:
+        _output.stream = previous
+
+def render(key: str, **kwargs) -> str:
+    """Повертає повідомлення за ключем з підставленими аргументами."""
+    parts = _parts.get(key)
+    if parts is not None and parts[1] in kwargs:
+        return parts[0] + str(kwargs[parts[1]]) + parts[2]
+    return _templates.get(key, _templates["unknown_error"]).format(**kwargs)
+
+configure()
+
+
 # ============================ БАЗОВІ МЕТОДИ ============================
 
 def clear_screen():
     """Очищує екран консолі."""
-    os.system('cls' if os.name == 'nt' else 'clear')
+    flush()
+    if _terminal: # Поза терміналом (пакетний режим, перенаправлений вивід) екран не чіпаємо
+        os.system('cls' if os.name == 'nt' else 'clear')
 
 def say_hello():
     """Виводить випадкове вітання."""
-    print(rnd.choice(HELLO_OPTIONS))
+    write(rnd.choice(HELLO_OPTIONS))
 
 # ============================ МЕТОДИ ВЗАЄМОДІЇ ============================
 
 def ask() -> str:
-    """Запитує команду у користувача."""
-    return input(MESSAGES["command_prompt"])
+    """Запитує команду у користувача (спершу виводячи все накопичене)."""
+    flush()
+    return input(_templates["command_prompt"])
 
 def _print_message(key: str, **kwargs):
     """Базова функція для виводу повідомлень за ключем."""
-    message_template = MESSAGES.get(key, MESSAGES["unknown_error"])
+    message_template = _templates.get(key, _templates["unknown_error"])
     try:
-        print(message_template.format(**kwargs))
+        write(render(key, **kwargs))
     except KeyError as e:
         # Якщо в шаблоні є плейсхолдер, для якого не передали аргумент
-        print(f"{Colors.RED}Помилка форматування повідомлення '{key}': відсутній аргумент {e}{Colors.END}")
-        print(f"Отримані аргументи: {kwargs}")
-        print(f"Шаблон: {message_template}")
+        write(f"{Colors.RED}Помилка форматування повідомлення '{key}': відсутній аргумент {e}{Colors.END}")
+        write(f"Отримані аргументи: {kwargs}")
+        write(f"Шаблон: {message_template}")
 def cursor_up(lines: int = 1):
     """Переміщує курсор вгору на задану кількість рядків."""
     """Використовує ANSI escape код для переміщення курсора."""
-    print(f"\033[{lines}A", end='')
+    if _terminal: # Поза терміналом керуючі коди не потрібні
+        write(f"\033[{lines}A", end='')
 
 def info(key: str, **kwargs):
     """Виводить інформаційне повідомлення."""
@@ -140,42 +285,86 @@ def error(key: str, **kwargs):
 
 # ============================ СПЕЦИФІЧНІ МЕТОДИ ВІДОБРАЖЕННЯ ============================
 
+def _indexed(values: list) -> str:
+    """'[0] a; [1] b' з підсвіченими індексами (мітки індексів готуються заздалегідь)."""
+    labels = _index_labels
+    if len(values) > len(labels):
+        labels.extend(f"{Colors.CYAN}[{i}]{Colors.END} " for i in range(len(labels), len(values)))
+    return "; ".join([labels[i] + field.value for i, field in enumerate(values)])
+
+
+def _contact_lines(record: Record) -> list[str]:
+    """Рядки детальної інформації про контакт (без виводу)."""
+    templates, parts = _templates, _parts
+    phones, emails, birthday = record.phones, record.emails, record.birthday
+    header, phones_line, emails_line, birthday_line = (
+        parts["contact_details_header"], parts["contact_phones"], parts["contact_emails"], parts["contact_birthday"])
+    return [
+        header[0] + record.name.value + header[2],
+        phones_line[0] + _indexed(phones) + phones_line[2] if phones else templates["no_phones"],
+        emails_line[0] + _indexed(emails) + emails_line[2] if emails else templates["no_emails"],
+        birthday_line[0] + format_date(birthday.value) + birthday_line[2] if birthday else templates["no_birthday"],
+    ]
+
+
 def show_contact(record: Record):
     """Виводить детальну інформацію про один контакт."""
-    info("contact_details_header", name=record.name.value)
+    write("\n".join(_contact_lines(record)))
 
-    if record.phones:
-        phones_str = "; ".join(f"{Colors.CYAN}[{i}]{Colors.END} {p.value}" for i, p in enumerate(record.phones))
-        info("contact_phones", phones_str=phones_str)
-    else:
-        info("no_phones")
 
-    if record.emails:
-        emails_str = "; ".join(f"{Colors.CYAN}[{i}]{Colors.END} {e.value}" for i, e in enumerate(record.emails))
-        info("contact_emails", emails_str=emails_str)
-    else:
-        info("no_emails")
+def show_contacts_page(records: list[Record], page: int, pages: int, total: int):
+    """Виводить одну сторінку контактів одним записом у термінал."""
+    if not total:
+        warn("empty_contacts")
+        return
+    if not records:
+        warn("page_out_of_range", page=page, pages=pages)
+        return
 
-    if record.birthday:
-        info("contact_birthday", birthday_str=str(record.birthday))
-    else:
-        info("no_birthday")
+    lines = [render("contacts_page_header", page=page, pages=pages), "═" * 50] # Розділювач
+    for record in records:
+        lines += _contact_lines(record)
+        lines.append("─" * 50) # Розділювач між контактами
+    lines.append(render("contacts_count", count=total))
+    write("\n".join(lines))
 
 
-def show_all_contacts(book: AddressBook):
-    """Виводить всі контакти з книги."""
-    if not book.data:
-        warn("empty_contacts")
+def show_search_results(records: list[Record], query: str):
+    """Виводить знайдені контакти у порядку релевантності, по рядку на контакт."""
+    if not records:
+        info("no_search_results", query=query)
         return
 
-    info("all_contacts_header")
-    print("═" * 50) # Розділювач
-    for record in book.data.values():
-        # Використовуємо ту саму функцію для одного контакту
-        show_contact(record)
-        print("─" * 50) # Розділювач між контактами
+    info("search_header", query=query)
+    for rank, record in enumerate(records, start=1):
+        info("search_result", rank=rank, name=record.name.value,
+             phones=", ".join(p.value for p in record.phones))
+
+
+MAX_SHOWN_PHONE_MATCHES = 50 # Скільки знайдених номерів показувати
+
+def show_phone_matches(matches: dict[str, list[Record]], digits: str):
+    """Виводить знайдені номери з іменами їхніх власників."""
+    if not matches:
+        info("no_phone_matches", digits=digits)
+        return
 
-    info("contacts_count", count=len(book.data))
+    info("phone_matches_header", digits=digits)
+    for phone, records in list(matches.items())[:MAX_SHOWN_PHONE_MATCHES]:
+        info("phone_match", phone=phone, names=", ".join(record.name.value for record in records))
+    if len(matches) > MAX_SHOWN_PHONE_MATCHES:
+        info("more_phone_matches", count=len(matches) - MAX_SHOWN_PHONE_MATCHES)
+
+
+def show_owners(records: list[Record], value: str):
+    """Виводить контакти, знайдені за телефоном чи email."""
+    if not records:
+        info("no_owners", value=value)
+        return
+
+    info("owners_header", value=value)
+    for record in records:
+        show_contact(record)
 
 
 def show_upcoming_birthdays(birthdays_list: list[dict], days: int):
@@ -185,35 +374,61 @@ def show_upcoming_birthdays(birthdays_list: list[dict], days: int):
         info("no_upcoming_birthdays", days=days)
         return
 
-    print(f"{Colors.BOLD}{'Ім\'я':<20} {'Дата привітання':<18} {'День тижня':<5}{Colors.END}")
-    print("═" * 50)
+    today = date.today()
+    lines = [_templates["birthdays_table_header"], "═" * 50]
     for item in birthdays_list:
-        name = item['name']
-        congrats_date_str = item['congratulation_date']
-        try:
-             congrats_date = datetime.strptime(congrats_date_str, '%d.%m.%Y').date()
-             day_name = DAYS_NAMES[congrats_date.weekday()]
-
-             # Виділимо сьогоднішні та завтрашні дні народження
-             today = date.today()
-             delta = (congrats_date - today).days
-             color = Colors.END
-             if delta == 0:
-                 day_name = f"{Colors.GREEN}Сьогодні!{Colors.END}"
-                 color = Colors.GREEN
-             elif delta == 1:
-                 day_name = f"{Colors.YELLOW}Завтра{Colors.END}"
-                 color = Colors.YELLOW
-             elif congrats_date.weekday() == 0 and item['original_weekday'] >= 5:
-                  day_name = f"{Colors.CYAN}Пн (з вих){Colors.END}" # Позначимо перенесені
-                  color = Colors.CYAN
-
-             print(f"{color}{name:<20}{Colors.END} {congrats_date_str:<18} {day_name:<5}")
-
-        except ValueError:
-             # На випадок некоректної дати у списку (не повинно бути)
-             print(f"{Colors.RED}Помилка даних для {name}{Colors.END}")
-    print("─" * 50)
+        congrats_date = item['congratulation_day'] # Дата вже є у записі - не розбираємо рядок
+        day_name = DAYS_NAMES[congrats_date.weekday()]
+
+        # Виділимо сьогоднішні та завтрашні дні народження
+        delta = (congrats_date - today).days
+        color = Colors.END
+        if delta == 0:
+            day_name = f"{Colors.GREEN}Сьогодні!{Colors.END}"
+            color = Colors.GREEN
+        elif delta == 1:
+            day_name = f"{Colors.YELLOW}Завтра{Colors.END}"
+            color = Colors.YELLOW
+        elif congrats_date.weekday() == 0 and item['original_weekday'] >= 5:
+            day_name = f"{Colors.CYAN}Пн (з вих){Colors.END}" # Позначимо перенесені
+            color = Colors.CYAN
+
+        lines.append(f"{color}{item['name']:<20}{Colors.END} {item['congratulation_date']:<18} {day_name:<5}")
+    lines.append("─" * 50)
+    write("\n".join(lines))
+
+
+MAX_SHOWN_IMPORT_ERRORS = 20 # Скільки помилок імпорту показувати поіменно
+
+def show_import_report(report: dict):
+    """Виводить підсумок імпорту та перші помилки по рядках."""
+    errors = report["errors"]
+    failed_lines = len({line for line, _, _ in errors})
+    if report.get("interrupted"):
+        error("import_interrupted", added=report["added"], updated=report["updated"], failed=failed_lines,
+              error_message=report["interrupted"])
+    else:
+        success("import_done", added=report["added"], updated=report["updated"], failed=failed_lines)
+    for line, key, kwargs in errors[:MAX_SHOWN_IMPORT_ERRORS]:
+        message = render(key, **kwargs)
+        warn("import_line_error", line=line, message=message)
+    if len(errors) > MAX_SHOWN_IMPORT_ERRORS:
+        warn("import_more_errors", count=len(errors) - MAX_SHOWN_IMPORT_ERRORS)
+
+
+def show_stats(stats: dict[str, dict[str, dict[str, float]]]):
+    """Виводить таблицю затримок: рядок на кожну фазу кожної команди."""
+    info("stats_header")
+    if not stats:
+        info("no_stats")
+        return
+    lines = [_templates["stats_table_header"], "═" * 72]
+    for command, phases in stats.items():
+        for phase, summary in phases.items():
+            lines.append(STATS_ROW.format(command, phase, summary["count"], f"{summary['mean']:.3f}",
+                                          f"{summary['p50']:.3f}", f"{summary['p95']:.3f}", f"{summary['max']:.3f}"))
+            command = "" # Назву команди показуємо лише в першому рядку
+    write("\n".join(lines))
 
 
 def show_help():
@@ -229,7 +444,11 @@ def show_help():
         ("change <ім'я> p.<індекс> <новий тел>",   "Змінити телефон за індексом (p=phone)"),
         ("change <ім'я> e.<індекс> <новий email>", "Змінити email за індексом (e=email)"),
         ("phone <ім'я>",                           "Показати всі дані контакту (телефони, email, д/н)"),
-        ("all",                                    "Показати всі контакти в книзі"),
+        ("all [сторінка] [розмір] [порядок]",      "Показати контакти посторінково; порядок: name (за замовч.) або birthday"),
+        ("search <запит>",                         "Знайти контакти за частиною імені (допускає одруківки)"),
+        ("who-phone <телефон>",                    "Знайти контакти за телефоном"),
+        ("find-phone <цифри>",                     "Знайти телефони за частиною номера"),
+        ("who-email <email>",                      "Знайти контакти за email"),
         ("delete <ім'я>",                          "Видалити контакт"),
         ("del-phone <ім'я> <індекс>",              "Видалити телефон за індексом"),
         ("del-email <ім'я> <індекс>",              "Видалити email за індексом"),
@@ -237,10 +456,15 @@ def show_help():
         ("show-birthday <ім'я>",                   "Показати дату народження (або 'show-bd')"),
         ("del-birthday <ім'я>",                    "Видалити дату народження (або 'del-bd')"),
         ("birthdays [дні]",                        "Показати дні народження на наступні N днів (за замовч. 7) (або 'all-bd')"),
+        ("import <файл>",                          "Імпортувати контакти з .csv або .jsonl (можна .gz)"),
+        ("export <файл> [формат]",                 "Експортувати контакти у csv, jsonl або vcf (з .gz - стиснено)"),
+        ("begin / commit / rollback",              "Почати транзакцію / зберегти / скасувати її зміни"),
+        ("stats [reset]",                          "Показати затримки команд за фазами (з --metrics) / очистити"),
+        ("profile [on [мс] | off]",                "Профілювати команди, довші за поріг (за замовч. 100 мс)"),
+        ("undo / redo",                            "Скасувати останню зміну / повторити скасовану"),
         ("clr",                                    "Очистити екран"),
         ("?",                                      "Показати цю довідку (або 'help')"),
         ("exit",                                   "Вийти з програми (або 'close', 'quit')"),
     ]
     max_cmd_len = max(len(cmd[0]) for cmd in commands_help)
-    for cmd, desc in commands_help:
-        print(f"  {Colors.CYAN}{cmd:<{max_cmd_len}}{Colors.END} - {desc}")
\ No newline at end of file
+    write("\n".join(f"  {Colors.CYAN}{cmd:<{max_cmd_len}}{Colors.END} - {desc}" for cmd, desc in commands_help))
\ No newline at end of file